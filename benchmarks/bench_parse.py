@@ -0,0 +1,66 @@
+"""Benchmark runpodctl output parsing.
+
+Run with: python -m benchmarks.bench_parse
+"""
+import json
+import time
+
+from benchmarks.fleet import generate_pod_output, generate_pods
+from utils.pod_parser import parse_pod_lines, parse_pod_json
+
+
+def naive_parse(output):
+    """The per-call header lookup parser this module replaced, for comparison."""
+    pods = []
+    lines = output.strip().split('\n')
+    header = lines[0].strip()
+    id_pos = header.find('ID')
+    name_pos = header.find('NAME')
+    gpu_pos = header.find('GPU')
+    image_pos = header.find('IMAGE')
+    status_pos = header.find('STATUS')
+    for line in lines[1:]:
+        if not line.strip():
+            continue
+        pod_id = line[id_pos:name_pos].strip()
+        gpu_info = ' '.join(line[gpu_pos:image_pos].strip().split())
+        status = line[status_pos:].strip()
+        gpu_parts = gpu_info.split()
+        if len(gpu_parts) >= 2 and gpu_parts[0].isdigit():
+            gpu, quantity = ' '.join(gpu_parts[1:]), int(gpu_parts[0])
+        else:
+            gpu, quantity = gpu_info, 1
+        pods.append({'id': pod_id, 'gpu': gpu, 'status': status, 'quantity': quantity})
+    return pods
+
+
+def best_of(func, repeat=5):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+
+def main(rows=10000):
+    output = generate_pod_output(rows)
+    lines = output.splitlines(keepends=True)
+    json_output = json.dumps([{'id': pod['id'], 'gpu': f"{pod['quantity']} {pod['gpu']}",
+                               'status': pod['status']} for pod in generate_pods(rows)])
+
+    assert len(list(parse_pod_lines(lines))) == rows
+
+    results = {
+        'naive_table': best_of(lambda: naive_parse(output)),
+        'compiled_table': best_of(lambda: list(parse_pod_lines(lines))),
+        'json': best_of(lambda: parse_pod_json(json_output)),
+    }
+    print(f"Parsing {rows} rows ({len(output) / 1e6:.1f} MB of table output):")
+    for name, seconds in results.items():
+        print(f"  {name:<16} {seconds * 1000:8.1f} ms  ({rows / seconds:,.0f} rows/s)")
+    return results
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,53 @@
+"""Compare per-tick latency of the runpodctl and API pod sources.
+
+Both backends run against local stand-ins (benchmarks/fake_runpodctl.py
+and benchmarks/fake_api.py), so this measures client-side overhead:
+process spawns and CLI startup versus a pooled HTTP session.
+
+Run with: python -m benchmarks.bench_pod_source
+"""
+import os
+import statistics
+import tempfile
+import time
+
+from benchmarks import fake_runpodctl
+from benchmarks.fake_api import FakeRunpodApi, api_pod
+from benchmarks.fleet import generate_pods
+from pod_monitor import RunpodctlSource
+from utils.runpod_api import RunpodApiSource
+
+
+def time_ticks(source, ticks):
+    timings = []
+    for _ in range(ticks):
+        start = time.perf_counter()
+        source.get_pods()
+        timings.append(time.perf_counter() - start)
+    return timings
+
+
+def main(pod_count=10, ticks=10):
+    results = {}
+    with tempfile.TemporaryDirectory() as bin_dir:
+        fake_runpodctl.install(bin_dir)
+        os.environ['PATH'] = bin_dir + os.pathsep + os.environ['PATH']
+        os.environ['FAKE_RUNPODCTL_PODS'] = str(pod_count)
+        results['runpodctl'] = time_ticks(RunpodctlSource(), ticks)
+
+    pods = [api_pod(pod['id'], pod['gpu'], pod['quantity'], pod['status'])
+            for pod in generate_pods(pod_count)]
+    with FakeRunpodApi(pods) as api:
+        source = RunpodApiSource('bench', url=api.url)
+        results['api'] = time_ticks(source, ticks)
+        source.close()
+
+    print(f"Per-tick latency with {pod_count} pods over {ticks} ticks:")
+    for name, timings in results.items():
+        print(f"  {name:<10} median {statistics.median(timings) * 1000:8.1f} ms"
+              f"   max {max(timings) * 1000:8.1f} ms")
+    return results
+
+
+if __name__ == '__main__':
+    main()
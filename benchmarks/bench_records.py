@@ -0,0 +1,70 @@
+"""Compare memory and load cost of dict history entries and HistoryRecords.
+
+Run with: python -m benchmarks.bench_records
+"""
+import json
+import time
+import tracemalloc
+from datetime import datetime, timedelta
+
+from benchmarks.fleet import generate_pods
+from utils.records import HistoryRecord
+
+
+def make_history_dicts(count):
+    """Build history entries the way pod_history.json stores them."""
+    base = datetime(2024, 1, 1)
+    history = {}
+    for i, pod in enumerate(generate_pods(count)):
+        seen = base + timedelta(minutes=i)
+        history[pod['id']] = {
+            'gpu': pod['gpu'],
+            'first_seen': seen.isoformat(),
+            'start_time': seen.isoformat(),
+            'last_seen': (seen + timedelta(hours=2)).isoformat(),
+            'total_runtime': 2.0,
+            'total_cost': 0.34 * pod['quantity'] * 2,
+            'status': pod['status']
+        }
+    return history
+
+
+def measure(build):
+    tracemalloc.start()
+    start = time.perf_counter()
+    result = build()
+    elapsed = time.perf_counter() - start
+    size, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return result, size, elapsed
+
+
+def main(count=50000):
+    text = json.dumps(make_history_dicts(count))
+
+    dicts, dict_bytes, dict_time = measure(lambda: json.loads(text))
+    del dicts
+    records, record_bytes, record_time = measure(
+        lambda: {pod_id: HistoryRecord.from_dict(data) for pod_id, data in json.loads(text).items()})
+
+    # The main loop reads timestamps on every tick; compare that cost too
+    sample = make_history_dicts(count)
+    start = time.perf_counter()
+    for data in sample.values():
+        datetime.fromisoformat(data['last_seen'])
+    iso_read = time.perf_counter() - start
+    start = time.perf_counter()
+    for record in records.values():
+        record.last_seen
+    epoch_read = time.perf_counter() - start
+
+    print(f"History with {count} pods:")
+    print(f"  dict entries:   {dict_bytes / 1e6:7.1f} MB   load {dict_time * 1000:7.1f} ms"
+          f"   timestamp reads {iso_read * 1000:6.1f} ms")
+    print(f"  HistoryRecords: {record_bytes / 1e6:7.1f} MB   load {record_time * 1000:7.1f} ms"
+          f"   timestamp reads {epoch_read * 1000:6.1f} ms")
+    return {'dict_bytes': dict_bytes, 'record_bytes': record_bytes}
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,79 @@
+"""Local stand-in for the RunPod GraphQL API used by tests and benchmarks."""
+import json
+import re
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+class FakeRunpodApi:
+    """Serves a fixed pod list and records terminations.
+
+    Use as a context manager; `url` points at the GraphQL endpoint.
+    """
+
+    def __init__(self, pods=None, fail=False):
+        self.pods = pods or []
+        self.fail = fail
+        self.terminated = []
+        self.requests = 0
+        self.connections = 0
+        api = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'  # Keep-alive
+            disable_nagle_algorithm = True
+
+            def setup(self):
+                super().setup()
+                api.connections += 1
+
+            def do_POST(self):
+                api.requests += 1
+                body = json.loads(self.rfile.read(int(self.headers['Content-Length'])))
+                if api.fail:
+                    payload = {'errors': [{'message': 'stand-in failure'}]}
+                elif body['query'].lstrip().startswith('mutation'):
+                    fields = re.findall(r'(t\d+): podTerminate', body['query'])
+                    ids = [body['variables'][f'p{field[1:]}'] for field in fields]
+                    api.terminated.extend(ids)
+                    api.pods = [pod for pod in api.pods if pod['id'] not in ids]
+                    payload = {'data': {field: None for field in fields}}
+                elif 'pod(input' in body['query']:
+                    pod_id = body['variables']['podId']
+                    match = [pod for pod in api.pods if pod['id'] == pod_id]
+                    payload = {'data': {'pod': match[0] if match else None}}
+                else:
+                    payload = {'data': {'myself': {'pods': api.pods}}}
+                data = json.dumps(payload).encode()
+                self.send_response(200)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def log_message(self, *args):
+                pass
+
+        self.server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+        self.url = f'http://127.0.0.1:{self.server.server_address[1]}/graphql'
+        self._thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+def api_pod(pod_id, gpu='RTX A4000', count=1, status='RUNNING', uptime_seconds=3600):
+    """Build a pod record shaped like the GraphQL response."""
+    return {
+        'id': pod_id,
+        'name': f'pod {pod_id}',
+        'desiredStatus': status,
+        'gpuCount': count,
+        'machine': {'gpuDisplayName': gpu},
+        'runtime': {'uptimeInSeconds': uptime_seconds} if status == 'RUNNING' else None
+    }
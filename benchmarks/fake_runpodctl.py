@@ -0,0 +1,40 @@
+#!/usr/bin/env python3
+"""Stand-in for the runpodctl CLI used by tests and benchmarks.
+
+Supports `get pod`, `get pod <id> --allfields` and `remove pod <id>`.
+The listing size is taken from FAKE_RUNPODCTL_PODS (default 10).
+"""
+import os
+import stat
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.fleet import generate_pod_output  # noqa: E402
+
+
+def install(directory):
+    """Write a `runpodctl` executable into `directory` that runs this script."""
+    path = os.path.join(directory, 'runpodctl')
+    with open(path, 'w') as f:
+        f.write(f'#!/bin/sh\nexec "{sys.executable}" "{os.path.abspath(__file__)}" "$@"\n')
+    os.chmod(path, os.stat(path).st_mode | stat.S_IEXEC)
+    return path
+
+
+def main(args):
+    if args[:2] == ['get', 'pod'] and len(args) == 2:
+        print(generate_pod_output(int(os.environ.get('FAKE_RUNPODCTL_PODS', '10'))))
+    elif args[:2] == ['get', 'pod']:
+        print('ID'.ljust(16) + 'NAME'.ljust(21) + 'UPTIME'.ljust(12) + 'STATUS')
+        print(args[2].ljust(16) + 'bench pod'.ljust(21) + '2h 30m'.ljust(12) + 'RUNNING')
+    elif args[:2] == ['remove', 'pod'] and len(args) == 3:
+        print(f'pod "{args[2]}" removed')
+    else:
+        print(f'unknown command: {" ".join(args)}', file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main(sys.argv[1:]))
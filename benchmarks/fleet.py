@@ -0,0 +1,44 @@
+"""Synthetic runpodctl output for benchmarks."""
+import random
+
+GPU_TYPES = ['RTX A4000', 'RTX A5000', 'RTX 4090', 'RTX 3090', 'A40', 'A100 SXM',
+             'H100 SXM', 'H100 PCIe', 'L40S', 'RTX A6000']
+STATUSES = ['RUNNING'] * 6 + ['EXITED'] * 3 + ['CREATED']
+
+# Column widths taken from real runpodctl output, which pads every field heavily
+ID_WIDTH = 16
+NAME_WIDTH = 21
+GPU_WIDTH = 236
+IMAGE_WIDTH = 269
+
+
+def generate_pods(count, seed=0):
+    """Generate `count` pod descriptions with mixed statuses and GPU counts."""
+    rng = random.Random(seed)
+    pods = []
+    for i in range(count):
+        pods.append({
+            'id': f'pod{i:011d}',
+            'name': f'bench pod {i}',
+            'gpu': rng.choice(GPU_TYPES),
+            'quantity': rng.choice([1, 1, 1, 2, 4, 8]),
+            'status': rng.choice(STATUSES)
+        })
+    return pods
+
+
+def format_pod_output(pods):
+    """Render pods the way `runpodctl get pod` prints them."""
+    lines = ['ID'.ljust(ID_WIDTH) + 'NAME'.ljust(NAME_WIDTH) + 'GPU'.ljust(GPU_WIDTH)
+             + 'IMAGE NAME'.ljust(IMAGE_WIDTH) + 'STATUS']
+    for pod in pods:
+        lines.append(pod['id'].ljust(ID_WIDTH) + pod['name'].ljust(NAME_WIDTH)
+                     + f"{pod['quantity']} {pod['gpu']}".ljust(GPU_WIDTH)
+                     + 'runpod/pytorch:2.4.0-py3.11-cuda12.4.1-devel-ubuntu22.04'.ljust(IMAGE_WIDTH)
+                     + pod['status'])
+    return '\n'.join(lines)
+
+
+def generate_pod_output(count, seed=0):
+    """Generate padded `runpodctl get pod` output for `count` pods."""
+    return format_pod_output(generate_pods(count, seed))
@@ -0,0 +1,306 @@
+"""Benchmark suite for the monitor's per-tick work, with regression baselines.
+
+Times parsing, history updates, history save/load, exited-pod reminders,
+one full status check (`run_tick`), the same check with a hundred
+policy rules, and a restart up to the end of its first check, cold and
+from the state snapshot, at several fleet sizes.
+The checks run against the local API stand-in, so they include the HTTP
+round trip and JSON parsing but no process spawns.
+
+Run with: python -m benchmarks.suite
+          python -m benchmarks.suite --update-baseline   (record new baselines)
+
+Results are compared with benchmarks/baselines.json; the run exits with
+status 1 if any case is slower than its baseline by more than the
+threshold.
+"""
+import argparse
+import contextlib
+import json
+import os
+import platform
+import sys
+import tempfile
+import time
+
+import pod_monitor
+from benchmarks.fake_api import FakeRunpodApi, api_pod
+from benchmarks.fleet import GPU_TYPES, format_pod_output, generate_pods
+from utils.policies import PolicyEngine
+from utils.runpod_api import RunpodApiSource
+from utils.runpod_pricing import PricingProvider, StaticPriceSource
+from utils.timers import TimerIndex
+
+BASELINE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'baselines.json')
+DEFAULT_SIZES = (10, 1000, 100000)
+DEFAULT_THRESHOLD = 2.0
+MIN_REGRESSION_SECONDS = 0.002  # Ignore slowdowns smaller than timer noise
+
+BENCH_CONFIG = {
+    'check_interval_seconds': 300,
+    'notification_threshold_minutes': 60,
+    'notification_cooldown_minutes': 60,
+    'shutdown_threshold_hours': 10000,  # Never kill pods during the benchmark
+    'notification_backends': ['log'],
+}
+
+
+def best_of(func, repeats):
+    """Return the fastest of `repeats` timed calls of `func`."""
+    timings = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+
+def repeats_for(size):
+    if size <= 100:
+        return 20
+    return 7 if size <= 1000 else 2
+
+
+def make_pods(size):
+    pods = generate_pods(size)
+    return pods, pod_monitor.parse_pod_output(format_pod_output(pods))
+
+
+def bench_parse(size):
+    output = format_pod_output(generate_pods(size))
+    return best_of(lambda: pod_monitor.parse_pod_output(output), repeats_for(size))
+
+
+def bench_update_history(size):
+    _, pods = make_pods(size)
+    history = {'pods': {}}
+    for pod in pods:
+        pod_monitor.update_pod_history(pod, history)
+    return best_of(lambda: [pod_monitor.update_pod_history(pod, history) for pod in pods],
+                   repeats_for(size))
+
+
+def bench_save_load(size):
+    """Time a save that touches every record, then a cold load."""
+    _, pods = make_pods(size)
+    with tempfile.TemporaryDirectory() as work, _chdir(work):
+        os.makedirs('data')
+        pod_monitor._history_store = None
+        history = pod_monitor.load_history()
+        history.setdefault('pods', {})
+        for pod in pods:
+            pod_monitor.update_pod_history(pod, history)
+        pod_monitor.save_history(history)
+
+        def touch_and_save():
+            now = time.time()
+            for pod in pods:
+                pod_monitor.update_pod_history(pod, history, now)
+            pod_monitor.save_history(history)
+
+        save = best_of(touch_and_save, repeats_for(size))
+        pod_monitor.get_history_store().close()
+
+        def load():
+            pod_monitor._history_store = None
+            pod_monitor.load_history()
+            pod_monitor.get_history_store().close()
+
+        load_time = best_of(load, repeats_for(size))
+        pod_monitor._history_store = None
+    return save, load_time
+
+
+def bench_check_exited(size):
+    _, pods = make_pods(size)
+    exited = [pod for pod in pods if pod.status == 'EXITED']
+    history = {'pods': {}}
+    timers = TimerIndex()
+    with _quiet():
+        pod_monitor.check_long_term_exited(exited, history, timers)
+        return best_of(lambda: pod_monitor.check_long_term_exited(exited, history, timers),
+                       repeats_for(size))
+
+
+def policy_rules(count):
+    """Build `count` rules mixing GPU, pod name and hourly rate matches.
+
+    None of them shuts anything down, so every check does the same work."""
+    rules = []
+    for i in range(count):
+        rule = {'name': f'rule {i}', 'shutdown_after_hours': 10000 + i,
+                'notify_after_minutes': 60 + i}
+        if i % 3 == 0:
+            rule['gpu'] = GPU_TYPES[i % len(GPU_TYPES)].split()[0] + '*'
+        elif i % 3 == 1:
+            rule['pod_name'] = f'pod {i % 10}*'
+        else:
+            rule['min_hourly_rate'] = i / 10
+        rules.append(rule)
+    return rules
+
+
+def bench_tick(size, rules=()):
+    """Time a steady-state status check after a warm-up check."""
+    pods = [api_pod(pod['id'], pod['gpu'], pod['quantity'], pod['status'])
+            for pod in generate_pods(size)]
+    with tempfile.TemporaryDirectory() as work, _chdir(work), FakeRunpodApi(pods) as api:
+        os.makedirs('data')
+        pod_monitor._history_store = None
+        pricing_provider = PricingProvider(StaticPriceSource(),
+                                           os.path.join('data', 'pricing_cache.json'))
+        pricing_provider.load_snapshot()
+        pod_monitor.get_notifier(BENCH_CONFIG)
+        source = RunpodApiSource('bench-key', url=api.url)
+        state = pod_monitor.create_monitor(BENCH_CONFIG, pricing_provider, source,
+                                           policies=PolicyEngine(rules, BENCH_CONFIG))
+        try:
+            with _quiet():
+                pod_monitor.run_tick(state)
+                return best_of(lambda: pod_monitor.run_tick(state), repeats_for(size))
+        finally:
+            state.terminator.shutdown()
+            source.close()
+            pod_monitor.get_history_store().close()
+            pod_monitor._history_store = None
+
+
+def bench_restart(size):
+    """Time setting up the monitor plus its first status check, cold and warm.
+
+    The cold restart loads history from its files; the warm one restores
+    it, with timers, from the state snapshot written at shutdown."""
+    pods = [api_pod(pod['id'], pod['gpu'], pod['quantity'], pod['status'])
+            for pod in generate_pods(size)]
+    with tempfile.TemporaryDirectory() as work, _chdir(work), FakeRunpodApi(pods) as api:
+        os.makedirs('data')
+        pricing_provider = PricingProvider(StaticPriceSource(),
+                                           os.path.join('data', 'pricing_cache.json'))
+        pricing_provider.load_snapshot()
+        pod_monitor.get_notifier(BENCH_CONFIG)
+        source = RunpodApiSource('bench-key', url=api.url)
+
+        def restart(state_path):
+            pod_monitor._history_store = None
+            start = time.perf_counter()
+            state = pod_monitor.create_monitor(BENCH_CONFIG, pricing_provider, source, state_path)
+            pod_monitor.run_tick(state)
+            elapsed = time.perf_counter() - start
+            # Shut down like close_monitor, so the next restart finds a current snapshot
+            state.terminator.shutdown()
+            pod_monitor.save_history(state.history)
+            pod_monitor.get_history_store().close()
+            if state_path:
+                pod_monitor.save_monitor_state(state)
+            return elapsed
+
+        try:
+            with _quiet():
+                restart(pod_monitor.STATE_PATH)
+                repeats = repeats_for(size)
+                cold = min(restart(None) for _ in range(repeats))
+                restart(pod_monitor.STATE_PATH)
+                warm = min(restart(pod_monitor.STATE_PATH) for _ in range(repeats))
+        finally:
+            source.close()
+            pod_monitor._history_store = None
+    return cold, warm
+
+
+def run(sizes):
+    results = {}
+    for size in sizes:
+        results[f'parse/{size}'] = bench_parse(size)
+        results[f'update_pod_history/{size}'] = bench_update_history(size)
+        results[f'save_history/{size}'], results[f'load_history/{size}'] = bench_save_load(size)
+        results[f'check_long_term_exited/{size}'] = bench_check_exited(size)
+        results[f'tick/{size}'] = bench_tick(size)
+        results[f'tick_policies/{size}'] = bench_tick(size, policy_rules(100))
+        results[f'restart_cold/{size}'], results[f'restart_warm/{size}'] = bench_restart(size)
+    return results
+
+
+def compare(results, baseline, threshold):
+    """Return (name, seconds, baseline seconds) for every case that regressed."""
+    regressions = []
+    for name, seconds in results.items():
+        expected = baseline.get(name)
+        if expected is None:
+            continue
+        if seconds > expected * threshold and seconds - expected > MIN_REGRESSION_SECONDS:
+            regressions.append((name, seconds, expected))
+    return regressions
+
+
+def load_baseline(path):
+    try:
+        with open(path) as f:
+            return json.load(f).get('results', {})
+    except FileNotFoundError:
+        return {}
+
+
+def write_results(path, results):
+    with open(path, 'w') as f:
+        json.dump({
+            'python': platform.python_version(),
+            'machine': platform.machine(),
+            'results': {name: round(seconds, 6) for name, seconds in sorted(results.items())}
+        }, f, indent=2)
+        f.write('\n')
+
+
+@contextlib.contextmanager
+def _chdir(path):
+    previous = os.getcwd()
+    os.chdir(path)
+    try:
+        yield
+    finally:
+        os.chdir(previous)
+
+
+@contextlib.contextmanager
+def _quiet():
+    """Silence the status output the monitor prints for every pod."""
+    with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):
+        yield
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[0])
+    parser.add_argument('--sizes', default=','.join(map(str, DEFAULT_SIZES)),
+                        help='comma-separated fleet sizes')
+    parser.add_argument('--baseline', default=BASELINE_PATH, help='baseline file to compare with')
+    parser.add_argument('--threshold', type=float, default=DEFAULT_THRESHOLD,
+                        help='fail if a case takes longer than threshold x baseline')
+    parser.add_argument('--update-baseline', action='store_true',
+                        help='write these results to the baseline file instead of comparing')
+    parser.add_argument('--output', help='also write results to this JSON file')
+    args = parser.parse_args(argv)
+
+    results = run([int(size) for size in args.sizes.split(',')])
+    baseline = load_baseline(args.baseline)
+
+    print(f"{'case':<32} {'seconds':>10} {'baseline':>10}")
+    for name, seconds in results.items():
+        expected = baseline.get(name)
+        expected = f'{expected:.4f}' if expected is not None else '-'
+        print(f"{name:<32} {seconds:>10.4f} {expected:>10}")
+
+    if args.output:
+        write_results(args.output, results)
+    if args.update_baseline:
+        write_results(args.baseline, {**baseline, **results})
+        print(f"Baseline written to {args.baseline}")
+        return 0
+
+    regressions = compare(results, baseline, args.threshold)
+    for name, seconds, expected in regressions:
+        print(f"REGRESSION {name}: {seconds:.4f}s vs baseline {expected:.4f}s "
+              f"(threshold {args.threshold}x)")
+    return 1 if regressions else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -47,5 +47,5 @@ if __name__ == "__main__":
 
 """
 After setup, the script will run silently in the background when you log into Windows.
-You can check the logs in logs/pod_monitor_YYYYMMDD.log
+You can check the logs in logs/pod_monitor.log
 """ 
\ No newline at end of file
@@ -0,0 +1,149 @@
+#!/usr/bin/env python3
+import argparse
+import json
+import os
+import sys
+import requests
+from colorama import init, Fore, Style
+from utils.archive import HistoryArchive
+
+# Initialize colorama with autoreset=True to handle resets automatically
+init(autoreset=True)
+
+def default_port():
+    """Return control_port from data/config.json, if the monitor has one set."""
+    try:
+        with open(os.path.join('data', 'config.json'), 'r') as f:
+            return json.load(f).get('control_port')
+    except (OSError, ValueError):
+        return None
+
+def parse_args(argv=None):
+    """Parse command line options."""
+    parser = argparse.ArgumentParser(description="Query a running RunPod monitor.")
+    parser.add_argument('--host', default='127.0.0.1', help="control API host (default 127.0.0.1)")
+    parser.add_argument('--port', type=int, default=default_port(),
+                        help="control API port (default control_port from data/config.json)")
+    parser.add_argument('--json', action='store_true', help="print the raw JSON")
+    commands = parser.add_subparsers(dest='command', required=True)
+    commands.add_parser('status', help="burn rate, spend and pod counts")
+    commands.add_parser('pods', help="every pod in the last listing")
+    pod = commands.add_parser('pod', help="one pod")
+    pod.add_argument('pod_id')
+    commands.add_parser('deadlines', help="pending notifications and shutdowns")
+    commands.add_parser('ledger', help="daily spend and totals per GPU")
+    watch = commands.add_parser('watch', help="print pod status changes as they happen")
+    watch.add_argument('--since', type=int, help="replay events after this sequence number")
+    archive = commands.add_parser('archive', help="pods moved out of the history (read from "
+                                                  "data/archive, the monitor needn't be running)")
+    archive.add_argument('month', nargs='?', help="list the pods archived under YYYY-MM")
+    archive.add_argument('--pod', help="show one archived pod")
+    return parser.parse_args(argv)
+
+def fetch(base_url, path):
+    response = requests.get(base_url + path, timeout=5)
+    response.raise_for_status()
+    return response.json()
+
+def print_status(status):
+    print(f"{Fore.CYAN}Last check: {status['checked_at']}{Style.RESET_ALL}")
+    print(f"  Pods: {status['pods']} ({status['running']} running)")
+    print(f"  Burn rate: ${status['burn_rate']:.2f}/hour")
+    print(f"  Spend today: ${status['spend_today']:.2f}, this month: ${status['spend_month']:.2f}")
+    if status['pending_terminations']:
+        print(f"  Terminating: {', '.join(status['pending_terminations'])}")
+    if status['stale_accounts']:
+        print(f"  No fresh listing from: {', '.join(status['stale_accounts'])}")
+
+def print_pod(pod):
+    account = f" [{pod['account']}]" if pod['account'] else ""
+    line = f"{pod['id']:<16} {pod['gpu']:<24} {pod['status']:<8} ${pod['hourly_rate']:.2f}/hour"
+    if 'total_cost' in pod:
+        line += f"  ${pod['total_cost']:.2f} total"
+    print(line + account)
+
+def print_event(event):
+    color = Fore.GREEN if event['new_status'] == 'RUNNING' else Fore.YELLOW
+    old = event['old_status'] or 'new'
+    new = event['new_status'] or 'gone'
+    print(f"{event['time']} {color}{event['pod_id']} ({event['gpu']}): "
+          f"{old} -> {new}{Style.RESET_ALL}")
+
+def watch(base_url, since, raw):
+    """Print status change events until the monitor stops or Ctrl+C."""
+    url = base_url + '/events' + (f'?since={since}' if since is not None else '')
+    with requests.get(url, stream=True, timeout=(5, None)) as response:
+        response.raise_for_status()
+        for line in response.iter_lines(chunk_size=None):
+            if not line:
+                continue  # Heartbeat
+            if raw:
+                print(line.decode('utf-8'), flush=True)
+            else:
+                print_event(json.loads(line))
+                sys.stdout.flush()
+
+def show_archive(args):
+    """Report on the history archive, reading only the segments the query needs."""
+    archive = HistoryArchive(os.path.join('data', 'archive'))
+    if args.pod:
+        record = archive.find(args.pod)
+        if record is None:
+            print(f"{Fore.RED}Pod {args.pod} is not in the archive{Style.RESET_ALL}")
+            sys.exit(1)
+        print(json.dumps(record.to_dict(), indent=2))
+    elif args.month:
+        pods = archive.segment(args.month)
+        if args.json:
+            print(json.dumps({pod_id: record.to_dict() for pod_id, record in pods.items()},
+                             indent=2))
+            return
+        for pod_id, record in sorted(pods.items()):
+            print(f"{pod_id:<16} {record.gpu or '-':<24} {str(record.status or '-'):<8} "
+                  f"${record.total_cost:.2f} total")
+        print(f"{len(pods)} pods, ${sum(record.total_cost for record in pods.values()):.2f}")
+    else:
+        for month in archive.months():
+            print(month)
+
+def main(argv=None):
+    args = parse_args(argv)
+    if args.command == 'archive':
+        show_archive(args)
+        return
+    if not args.port:
+        print(f"{Fore.RED}No control port: pass --port or set control_port in "
+              f"data/config.json{Style.RESET_ALL}")
+        sys.exit(2)
+    base_url = f"http://{args.host}:{args.port}"
+
+    try:
+        if args.command == 'watch':
+            watch(base_url, args.since, args.json)
+            return
+        path = f"/pods/{args.pod_id}" if args.command == 'pod' else f"/{args.command}"
+        data = fetch(base_url, path)
+    except KeyboardInterrupt:
+        return
+    except requests.HTTPError as e:
+        print(f"{Fore.RED}{e}{Style.RESET_ALL}")
+        sys.exit(1)
+    except requests.RequestException as e:
+        print(f"{Fore.RED}Could not reach the monitor at {base_url}: {e}{Style.RESET_ALL}")
+        sys.exit(1)
+
+    if args.json or args.command in ('pod', 'ledger'):
+        print(json.dumps(data, indent=2))
+    elif data is None:
+        print("The monitor hasn't finished its first check yet.")
+    elif args.command == 'status':
+        print_status(data)
+    elif args.command == 'pods':
+        for pod in data:
+            print_pod(pod)
+    elif args.command == 'deadlines':
+        for deadline in data:
+            print(f"{deadline['due']}  {deadline['kind']:<8} {deadline['pod_id']}")
+
+if __name__ == "__main__":
+    main()
@@ -1,10 +1,36 @@
 #!/usr/bin/env python3
+import argparse
+import contextlib
+import gc
 import json
 import subprocess
+import tempfile
 import time
-from datetime import datetime, timedelta
-from win10toast import ToastNotifier
-from utils.runpod_pricing import fetch_runpod_pricing
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import datetime
+from utils.runpod_pricing import fetch_runpod_pricing, create_pricing_provider, price_catalog
+from utils.history_journal import HistoryJournal
+from utils.pod_parser import RowCache, parse_pod_lines, parse_pod_json
+from utils.runpod_api import RunpodApiSource, RUNPOD_GRAPHQL_URL, get_api_key
+from utils.termination import TerminationExecutor
+from utils.scheduler import TickScheduler
+from utils.timers import TimerIndex
+from utils.records import HistoryRecord, PodStatus, to_iso
+from utils.ledger import CostLedger
+from utils.fleet import FleetSource, account_configs
+from utils.archive import HistoryArchive, expired_pods
+from utils.policies import PolicyEngine, load_policies
+from utils.forecast import (SpendForecast, DEFAULT_HORIZONS_HOURS, format_horizon,
+                            hours_until_day_end, hours_until_month_end)
+from utils.timeseries import TimeSeriesStore
+from utils.metrics import REGISTRY, MetricsServer
+from utils.control import ControlServer, MonitorView
+from utils.state_snapshot import (save_state, load_state, fingerprint, encode_history,
+                                  decode_history)
+from utils.tracing import TickProfiler, get_tracer
+from utils.logging_setup import configure_logging, log_dump, stop_logging
+from utils.notifications import NotificationDispatcher, create_backends, default_backend_names
+from utils.history_sqlite import SqliteHistoryStore, migrate_json_history
 import logging
 import os
 import sys
@@ -13,6 +39,38 @@ from colorama import init, Fore, Style
 # Initialize colorama with autoreset=True to handle resets automatically
 init(autoreset=True)
 
+ONE_DAY_SECONDS = 24 * 3600
+
+RUNPODCTL_SECONDS = REGISTRY.histogram('runpodctl_call_seconds', 'Time spent in runpodctl calls',
+                                       ['command'])
+GET_PODS_SECONDS = RUNPODCTL_SECONDS.labels('get_pods')
+GET_POD_SECONDS = RUNPODCTL_SECONDS.labels('get_pod')
+REMOVE_POD_SECONDS = RUNPODCTL_SECONDS.labels('remove_pod')
+PARSE_SECONDS = REGISTRY.histogram('parse_seconds', 'Time spent parsing pod listings')
+SAVE_SECONDS = REGISTRY.histogram('history_save_seconds', 'Time spent saving history')
+TICK_SECONDS = REGISTRY.histogram('tick_duration_seconds', 'Time spent in each status check')
+TICK_LAG = REGISTRY.gauge('tick_lag_seconds', 'How late the last status check started')
+PODS = REGISTRY.gauge('pods', 'Pods in the last listing', ['status', 'gpu'])
+BURN_RATE = REGISTRY.gauge('burn_rate_dollars_per_hour', 'Current spend rate of all listed pods')
+TERMINATIONS = REGISTRY.counter('terminations', 'Finished pod terminations', ['result'])
+TERMINATION_ATTEMPTS = REGISTRY.counter('termination_attempts', 'terminate calls made')
+ACCOUNT_SPEND = REGISTRY.gauge('account_spend_today_dollars', 'Spend so far today per fleet account',
+                               ['account'])
+PROJECTED_SPEND = REGISTRY.gauge('projected_spend_dollars',
+                                 'Spend over the next horizon at the current burn rate', ['horizon'])
+NOTIFICATION_QUEUE = REGISTRY.gauge('notification_queue_depth',
+                                    'Notification batches waiting for delivery')
+STARTUP_SECONDS = REGISTRY.gauge('startup_seconds',
+                                 'Time from start to the end of the first status check')
+
+HISTORY_JSON_PATH = os.path.join('data', 'pod_history.json')
+HISTORY_DB_PATH = os.path.join('data', 'pod_history.db')
+STATE_PATH = os.path.join('data', 'monitor_state.bin')
+ARCHIVE_DIR = os.path.join('data', 'archive')
+POLICIES_PATH = os.path.join('data', 'policies.json')
+
+TRACER = get_tracer()
+
 def load_config():
     """Load configuration from config.json or run setup if not found."""
     config_path = os.path.join('data', 'config.json')
@@ -34,124 +92,188 @@ def load_config():
 
 def parse_pod_output(output):
     """Parse runpodctl pod list output."""
-    pods = []
-    lines = output.strip().split('\n')
-    
-    if len(lines) <= 1:
-        return []
-        
-    try:
-        # First find the header positions
-        header = lines[0].strip()
-        id_pos = header.find('ID')
-        name_pos = header.find('NAME')
-        gpu_pos = header.find('GPU')
-        image_pos = header.find('IMAGE')
-        status_pos = header.find('STATUS')
-        
-        for line in lines[1:]:
-            if not line.strip():
-                continue
-            
-            # Get each field and clean it thoroughly
-            pod_id = line[id_pos:name_pos].strip()
-            gpu_info = line[gpu_pos:image_pos].strip()
-            # Status might be at the very end
-            status = line[status_pos:].strip()
-            
-            # Clean up GPU info by removing excessive whitespace
-            gpu_info = ' '.join(gpu_info.split())
-            
-            # Handle GPU info (e.g., "1 RTX A4000")
-            gpu_parts = gpu_info.split()
-            if len(gpu_parts) >= 2 and gpu_parts[0].isdigit():
-                gpu = ' '.join(gpu_parts[1:])  # Remove quantity prefix
-                quantity = int(gpu_parts[0])
-            else:
-                gpu = gpu_info
-                quantity = 1
-            
-            pod = {
-                'id': pod_id,
-                'gpu': gpu.strip(),  # Extra strip to be safe
-                'status': status.strip(),  # Extra strip to be safe
-                'runtime': '0h',
-                'quantity': quantity
-            }
-            pods.append(pod)
-            
-    except Exception as e:
-        logging.error(f"Error parsing pod output: {e}")
-        return []
-    
-    return pods
+    return list(parse_pod_lines(output.splitlines()))
 
 def parse_runtime(runtime_str):
-    """Convert runtime string (e.g., '2h', '5d') to hours."""
+    """Convert runtime string (e.g., '2h', '5d', '1d 3h 20m') to hours."""
     if not runtime_str:
         return 0
     
-    try:
-        value = float(runtime_str[:-1])
-        unit = runtime_str[-1].lower()
+    hours = 0
+    for part in runtime_str.split():
+        try:
+            value = float(part[:-1])
+            unit = part[-1].lower()
+        except (ValueError, IndexError):
+            continue
         
         if unit == 'h':
-            return value
+            hours += value
         elif unit == 'd':
-            return value * 24
+            hours += value * 24
         elif unit == 'm':
-            return value / 60
-        else:
-            return 0
-    except:
-        return 0
+            hours += value / 60
+    return hours
+
+def get_runpodctl_cmd():
+    """Return the runpodctl executable name for this platform."""
+    return 'runpodctl.exe' if os.name == 'nt' else 'runpodctl'
 
-def get_pod_status():
-    """Get status of all pods using runpodctl."""
+def get_pod_status(output_format='table', cache=None):
+    """Get status of all pods using runpodctl. Returns None if runpodctl failed.
+    
+    Table output is parsed line by line as it streams from the pipe; with a
+    RowCache, only rows that changed since the previous call are parsed. Use
+    output_format='json' with runpodctl builds that support JSON output."""
     try:
-        cmd = 'runpodctl.exe' if os.name == 'nt' else 'runpodctl'
-        result = subprocess.run([cmd, 'get', 'pod'],
-                              capture_output=True, text=True)
+        cmd = [get_runpodctl_cmd(), 'get', 'pod']
+        if output_format == 'json':
+            cmd += ['--output', 'json']
         
-        logging.debug(f"runpodctl return code: {result.returncode}")
-        logging.debug(f"runpodctl stdout: {result.stdout}")
-        logging.debug(f"runpodctl stderr: {result.stderr}")
+        raw_lines = []
+        keep_raw = logging.getLogger().isEnabledFor(logging.DEBUG)  # Only buffer output if it gets logged
+        has_output = False
+        read_seconds = 0.0
+        started = time.perf_counter()
         
-        if result.returncode != 0:
-            raise Exception(f"runpodctl error: {result.stderr}")
+        # stderr goes to a temp file so a chatty runpodctl can't block the stdout pipe
+        with tempfile.TemporaryFile(mode='w+') as stderr_file:
+            with subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=stderr_file,
+                                  text=True) as proc:
+                def read_lines():
+                    nonlocal has_output, read_seconds
+                    lines = iter(proc.stdout)
+                    while True:
+                        # Time spent waiting on the pipe isn't parse time
+                        wait_start = time.perf_counter()
+                        line = next(lines, None)
+                        read_seconds += time.perf_counter() - wait_start
+                        if line is None:
+                            return
+                        has_output = has_output or bool(line.strip())
+                        if keep_raw:
+                            raw_lines.append(line)
+                        yield line
+                
+                if output_format == 'json':
+                    output = ''.join(read_lines())
+                    parse_start = time.perf_counter()
+                    with TRACER.span('parse'):
+                        pods = parse_pod_json(output) if output.strip() else []
+                    PARSE_SECONDS.observe(time.perf_counter() - parse_start)
+                else:
+                    parse_start = time.perf_counter()
+                    with TRACER.span('read_and_parse'):
+                        pods = list(parse_pod_lines(read_lines(), cache))
+                    PARSE_SECONDS.observe(time.perf_counter() - parse_start - read_seconds)
+                    proc.stdout.read()  # Drain anything the parser stopped short of
+                returncode = proc.wait()
+                if cache is not None and returncode == 0:
+                    cache.finish()
+            GET_PODS_SECONDS.observe(time.perf_counter() - started)
+            stderr_file.seek(0)
+            stderr = stderr_file.read()
+        
+        logging.debug(f"runpodctl return code: {returncode}")
+        if keep_raw:
+            log_dump("runpodctl stdout", ''.join(raw_lines))
+            log_dump("runpodctl stderr", stderr)
+        
+        if returncode != 0:
+            raise Exception(f"runpodctl error: {stderr}")
             
-        if not result.stdout.strip():
+        if not has_output:
             logging.warning("runpodctl returned empty output")
             return []
             
-        return parse_pod_output(result.stdout)
+        return pods
     except FileNotFoundError as e:
         print("\nError: runpodctl not found. Please install it first.")
         sys.exit(1)
     except Exception as e:
         logging.error(f"Error getting pod status: {e}")
-        return []
+        return None
+
+def parse_pod_uptime(output):
+    """Extract the UPTIME column from `runpodctl get pod <id> --allfields` output."""
+    lines = output.strip().split('\n')
+    if len(lines) <= 1:
+        return None
+    
+    header = lines[0]
+    uptime_pos = header.find('UPTIME')
+    if uptime_pos == -1:
+        return None
+    
+    # The column ends where the next header field starts
+    end_pos = uptime_pos + len('UPTIME')
+    while end_pos < len(header) and header[end_pos] == ' ':
+        end_pos += 1
+    if end_pos >= len(header):
+        end_pos = None
+    
+    uptime = lines[1][uptime_pos:end_pos].strip()
+    return uptime or None
+
+def fetch_pod_runtime(pod_id, timeout=10):
+    """Ask runpodctl for the uptime of a single pod. Returns None if unknown."""
+    try:
+        with GET_POD_SECONDS.time(), TRACER.span('runpodctl_get_pod'):
+            result = subprocess.run([get_runpodctl_cmd(), 'get', 'pod', pod_id, '--allfields'],
+                                  capture_output=True, text=True, timeout=timeout)
+        if result.returncode != 0:
+            raise Exception(f"runpodctl error: {result.stderr}")
+        return parse_pod_uptime(result.stdout)
+    except subprocess.TimeoutExpired:
+        logging.warning(f"Timed out fetching uptime for pod {pod_id} after {timeout}s")
+        return None
+    except Exception as e:
+        logging.error(f"Error fetching uptime for pod {pod_id}: {e}")
+        return None
+
+def fetch_pod_runtimes(pods, max_workers=8, timeout=10):
+    """Fill in 'runtime' for each pod by querying runpodctl concurrently."""
+    if not pods:
+        return pods
+    
+    workers = max(1, min(max_workers, len(pods)))
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        futures = {executor.submit(fetch_pod_runtime, pod.id, timeout): pod for pod in pods}
+        for future in as_completed(futures):
+            futures[future].runtime = future.result()
+    return pods
 
 def calculate_cost(pod, pricing, runtime_hours):
     """Calculate cost for a pod based on its GPU and runtime."""
-    gpu_type = pod['gpu']
-    quantity = pod.get('quantity', 1)  # Get GPU quantity, default to 1
-    hourly_rate = pricing['gpus'].get(gpu_type, 0)
+    gpu_type = pod.gpu
+    quantity = pod.quantity
+    hourly_rate = price_catalog(pricing).rate(gpu_type)
     return hourly_rate * runtime_hours * quantity  # Multiply by quantity
 
+_notifier = None
+
+def get_notifier(config=None):
+    """Return the notification dispatcher, creating it on first use."""
+    global _notifier
+    if _notifier is None:
+        config = config or {}
+        names = config.get('notification_backends') or default_backend_names()
+        _notifier = NotificationDispatcher(
+            create_backends(names, config.get('notification_webhook_url')),
+            rate_limit_seconds=config.get('notification_rate_limit_seconds', 30)
+        )
+    return _notifier
+
 def notify(title, message):
-    """Send Windows notification."""
-    try:
-        toaster = ToastNotifier()
-        toaster.show_toast(title, message, duration=10)
-    except Exception as e:
-        print(f"Error sending notification: {e}")
+    """Queue a notification; it is delivered in the background after the tick."""
+    get_notifier().notify(title, message)
 
 def terminate_pod(pod_id):
     """Terminate a pod using runpodctl."""
     try:
-        result = subprocess.run(['runpodctl', 'remove', 'pod', pod_id],  # Changed to 'remove pod'
-                              capture_output=True, text=True)
+        with REMOVE_POD_SECONDS.time():
+            result = subprocess.run([get_runpodctl_cmd(), 'remove', 'pod', pod_id],  # Changed to 'remove pod'
+                                  capture_output=True, text=True)
         if result.returncode != 0:
             raise Exception(f"runpodctl error: {result.stderr}")
         logging.info(f"Successfully terminated pod {pod_id}")
@@ -161,252 +283,912 @@ def terminate_pod(pod_id):
         print(f"Error terminating pod {pod_id}: {e}")
         return False
 
+def report_terminations(terminator):
+    """Print and notify the outcome of kills finished since the last check."""
+    for result in terminator.drain_results():
+        runtime_hours = result.context['runtime_hours']
+        TERMINATION_ATTEMPTS.inc(result.attempts)
+        TERMINATIONS.labels('success' if result.success else 'failure').inc()
+        if result.success:
+            print(f"{Fore.GREEN}Pod {result.pod_id} terminated.{Style.RESET_ALL}")
+            notify("Pod Terminated", 
+                  f"Pod {result.pod_id} was terminated after {runtime_hours:.1f} hours\n"
+                  f"Total cost: ${result.context['cost']:.2f}")
+        else:
+            print(f"{Fore.RED}Failed to terminate pod {result.pod_id} after "
+                  f"{result.attempts} attempts: {result.error}{Style.RESET_ALL}")
+            notify("Pod Termination Failed",
+                  f"Pod {result.pod_id} could not be terminated after {runtime_hours:.1f} hours\n"
+                  f"It will be retried on the next check.")
+
+class RunpodctlSource:
+    """Pod source backed by the runpodctl CLI.
+    
+    With table output, rows that are unchanged since the previous listing
+    are neither parsed again nor asked for their uptime; their runtime is
+    worked out from the start time found when it was last fetched."""
+    
+    def __init__(self, output_format='table', runtime_workers=8, runtime_timeout=10):
+        self.output_format = output_format
+        self.runtime_workers = runtime_workers
+        self.runtime_timeout = runtime_timeout
+        self.rows = RowCache() if output_format != 'json' else None
+        self._started = {}  # Running pod id -> start timestamp, None if unknown
+    
+    def get_pods(self):
+        """Return all pods, with uptime filled in for running pods, or None if listing failed."""
+        with TRACER.span('runpodctl_get_pods'):
+            pods = get_pod_status(self.output_format, self.rows)
+        if pods is None:
+            return None  # Keep the known start times for when a listing works again
+        if self.rows is None:
+            running = [p for p in pods if p.status == PodStatus.RUNNING and not p.runtime]
+        else:
+            # New or changed rows, plus pods whose uptime couldn't be fetched last time
+            running = [p for p in (self.rows.parsed if pods else [])
+                       if p.status == PodStatus.RUNNING]
+            retry = {pod_id for pod_id, start in self._started.items() if start is None}
+            retry.difference_update(p.id for p in running)
+            if retry:
+                running += [p for p in pods if p.id in retry]
+        with TRACER.span('fetch_runtimes', pods=len(running)):
+            fetch_pod_runtimes(running, self.runtime_workers, self.runtime_timeout)
+        if self.rows is not None:
+            self._update_runtimes(pods, running)
+        return pods
+    
+    def _update_runtimes(self, pods, fetched):
+        now = time.time()
+        for pod in fetched:
+            self._started[pod.id] = now - parse_runtime(pod.runtime) * 3600 if pod.runtime else None
+        started = {}
+        for pod in pods:
+            if pod.status == PodStatus.RUNNING:
+                start = started[pod.id] = self._started.get(pod.id)
+                if start is not None:
+                    pod.runtime = f"{(now - start) / 60:.2f}m"
+        self._started = started
+    
+    def terminate(self, pod_id):
+        """Terminate a single pod."""
+        return terminate_pod(pod_id)
+    
+    def pod_exists(self, pod_id):
+        """Return whether runpodctl still lists the pod, or None if it can't tell."""
+        try:
+            result = subprocess.run([get_runpodctl_cmd(), 'get', 'pod', pod_id],
+                                  capture_output=True, text=True, timeout=self.runtime_timeout)
+        except Exception as e:
+            logging.warning(f"Could not check pod {pod_id}: {e}")
+            return None
+        if result.returncode != 0:
+            return False if 'not found' in result.stderr.lower() else None
+        return any(pod.id == pod_id for pod in parse_pod_output(result.stdout))
+    
+    def close(self):
+        pass
+
+def create_pod_source(config):
+    """Create the pod source selected by config['pod_source'] ('runpodctl' or 'api').
+    
+    runpodctl is always used as the fallback for the API source. If
+    config['accounts'] is set, a fleet source over those accounts is
+    returned instead."""
+    if config.get('accounts'):
+        return create_fleet_source(config)
+    runpodctl_source = RunpodctlSource(config.get('runpodctl_output_format', 'table'),
+                                       config.get('runtime_fetch_workers', 8),
+                                       config.get('runtime_fetch_timeout_seconds', 10))
+    if config.get('pod_source', 'runpodctl') != 'api':
+        return runpodctl_source
+    
+    api_key = get_api_key(config)
+    if not api_key:
+        print(f"{Fore.YELLOW}No RunPod API key configured, using runpodctl instead.{Style.RESET_ALL}")
+        logging.warning("pod_source is 'api' but no API key was found; using runpodctl")
+        return runpodctl_source
+    return RunpodApiSource(api_key,
+                           url=config.get('runpod_api_url', RUNPOD_GRAPHQL_URL),
+                           timeout=config.get('runpod_api_timeout_seconds', 10),
+                           fallback=runpodctl_source)
+
+def create_fleet_source(config):
+    """Create a FleetSource that polls every account in config['accounts'] via the API.
+    
+    runpodctl only knows one account, so accounts need their own API key."""
+    sources = {}
+    for account in config['accounts']:
+        if not account.get('runpod_api_key'):
+            print(f"{Fore.YELLOW}Account {account['name']} has no runpod_api_key, "
+                  f"skipping it.{Style.RESET_ALL}")
+            logging.warning(f"Account {account['name']} has no runpod_api_key; skipping it")
+            continue
+        sources[account['name']] = RunpodApiSource(
+            account['runpod_api_key'],
+            url=account.get('runpod_api_url', config.get('runpod_api_url', RUNPOD_GRAPHQL_URL)),
+            timeout=config.get('runpod_api_timeout_seconds', 10))
+    return FleetSource(sources, max_workers=config.get('fleet_workers'),
+                       timeout=config.get('account_timeout_seconds', 10))
+
+_history_store = None
+
+def get_history_store(backend='json'):
+    """Return the history store, creating it on first use.
+    
+    `backend` is only used the first time: 'json' keeps the snapshot plus
+    journal files, 'sqlite' uses data/pod_history.db and imports any
+    existing JSON history on first run."""
+    global _history_store
+    if _history_store is None:
+        if backend == 'sqlite':
+            _history_store = SqliteHistoryStore(HISTORY_DB_PATH)
+            migrate_json_history(HISTORY_JSON_PATH, _history_store)
+        else:
+            _history_store = HistoryJournal(HISTORY_JSON_PATH)
+    return _history_store
+
+def history_files(backend='json'):
+    """Return the files the history store for `backend` keeps its data in."""
+    if backend == 'sqlite':
+        return SqliteHistoryStore.files(HISTORY_DB_PATH)
+    return HistoryJournal.files(HISTORY_JSON_PATH)
+
 def load_history():
-    """Load pod history from file."""
-    history_path = os.path.join('data', 'pod_history.json')
-    try:
-        with open(history_path, 'r') as f:
-            history = json.load(f)
-            if 'pods' not in history:  # Ensure the structure exists
-                history['pods'] = {}
-            return history
-    except FileNotFoundError:
-        history = {'pods': {}}  # Create initial structure
-        save_history(history)  # Create the file
-        return history
-    except json.JSONDecodeError:  # Handle corrupted file
-        print("Warning: History file corrupted, creating new one")
-        history = {'pods': {}}
-        save_history(history)
-        return history
+    """Load pod history from the snapshot and journal."""
+    return get_history_store().load()
 
-def save_history(history):
-    """Save pod history to file."""
-    history_path = os.path.join('data', 'pod_history.json')
-    with open(history_path, 'w') as f:
-        json.dump(history, f, indent=4)
+def save_history(history, dirty=None):
+    """Persist pod history changes to the journal.
+    
+    With `dirty`, only those pods are checked and written; see run_tick."""
+    with SAVE_SECONDS.time(), TRACER.span('save_history'):
+        get_history_store().save(history, dirty)
 
-def update_pod_history(pod, runtime_hours, cost, history):
-    """Update history for a pod."""
+def update_pod_history(pod, history, now=None):
+    """Update history for a pod and return its record.
+    
+    Costs are accrued separately by the ledger; moving back to RUNNING only
+    resets `start_time`, so totals from earlier sessions are kept."""
     if not isinstance(history, dict):
         history = {}
     if 'pods' not in history:
         history['pods'] = {}
         
-    current_time = datetime.now()
-    pod_id = pod['id']
+    now = now or time.time()
+    pod_id = pod.id
     
     # Initialize pod history if it doesn't exist
     if pod_id not in history['pods']:
-        history['pods'][pod_id] = {
-            'gpu': pod['gpu'],
-            'first_seen': current_time.isoformat(),
-            'start_time': current_time.isoformat(),
-            'last_seen': current_time.isoformat(),
-            'total_runtime': 0,
-            'total_cost': 0,
-            'status': pod['status']
-        }
-        return  # Exit early for new pods
+        history['pods'][pod_id] = HistoryRecord(
+            gpu=pod.gpu,
+            status=pod.status,
+            first_seen=now,
+            start_time=now,
+            last_seen=now,
+            account=pod.account
+        )
+        return history['pods'][pod_id]
     
     # Update existing pod
     pod_history = history['pods'][pod_id]
     
     # Handle status changes
-    if pod['status'] != pod_history.get('status'):
-        if pod['status'] == 'RUNNING':
+    if pod.status != pod_history.status:
+        if pod.status == PodStatus.RUNNING:
             # Only update start time if transitioning to RUNNING
-            pod_history['start_time'] = current_time.isoformat()
-            pod_history['total_runtime'] = 0
-            pod_history['total_cost'] = 0
-        pod_history['status'] = pod['status']
+            pod_history.start_time = now
+        pod_history.status = pod.status
     
-    # Update runtime and cost for running pods
-    if pod['status'] == 'RUNNING':
-        pod_history['total_runtime'] = runtime_hours
-        pod_history['total_cost'] = cost
+    if pod.account is not None:
+        pod_history.account = pod.account
     
     # Always update last seen
-    pod_history['last_seen'] = current_time.isoformat()
+    pod_history.last_seen = now
+    return pod_history
 
-def setup_logging():
-    """Setup logging configuration."""
-    os.makedirs('logs', exist_ok=True)
-    logging.basicConfig(
-        filename=f'logs/pod_monitor_{datetime.now().strftime("%Y%m%d")}.log',
-        level=logging.DEBUG,  # Changed to DEBUG
-        format='%(asctime)s - %(levelname)s - %(message)s'
-    )
+def setup_logging(config=None):
+    """Setup logging configuration.
+    
+    Records are written by a background thread to logs/pod_monitor.log,
+    which is rotated and compressed by size and age."""
+    config = config or {}
+    configure_logging('logs',
+                      level=config.get('log_level', 'INFO'),
+                      max_bytes=int(config.get('log_max_mb', 10) * 1024 * 1024),
+                      max_age_seconds=config.get('log_max_age_hours', 24) * 3600,
+                      backup_count=config.get('log_backup_count', 14))
 
-def check_long_term_exited(pods, history, last_reminder):
-    """Check for pods that have been in EXITED state for a long time."""
+def check_long_term_exited(pods, history, timers, store=None, dirty=()):
+    """Send daily reminders for pods that have been in EXITED state for a long time.
+    
+    Each exited pod gets a 'reminder' timer due a day after it was last seen
+    running; only timers that are due are acted on. If `store` supports
+    indexed queries, only pods it reports as exited for at least a day are
+    scheduled; pods in `dirty` haven't been saved yet, so their in-memory
+    records are used instead."""
     if not pods:  # Skip if no pods
+        timers.retain(('reminder',), ())
         return
         
-    current_time = datetime.now()
-    one_day = timedelta(days=1)
+    now = time.time()
     
     # Ensure history structure exists
     if 'pods' not in history:
         history['pods'] = {}
     
+    candidates = None
+    if store is not None and hasattr(store, 'exited_before'):
+        cutoff = now - ONE_DAY_SECONDS
+        candidates = set(store.exited_before(datetime.fromtimestamp(cutoff)))
+        for pod_id in dirty:
+            record = history['pods'].get(pod_id)
+            if (record is not None and record.status == PodStatus.EXITED
+                    and (record.last_seen or record.first_seen or now) <= cutoff):
+                candidates.add(pod_id)
+            else:
+                candidates.discard(pod_id)
+    
+    exited_ids = set()
     for pod in pods:
-        if pod['status'] == 'EXITED':
-            pod_id = pod['id']
+        if pod.status == PodStatus.EXITED:
+            pod_id = pod.id
+            exited_ids.add(pod_id)
             
             # Initialize pod history if needed
             if pod_id not in history['pods']:
-                history['pods'][pod_id] = {
-                    'gpu': pod['gpu'],
-                    'first_seen': current_time.isoformat(),
-                    'last_seen': current_time.isoformat(),
-                    'total_runtime': 0,
-                    'total_cost': 0
-                }
+                history['pods'][pod_id] = HistoryRecord(
+                    gpu=pod.gpu,
+                    first_seen=now,
+                    last_seen=now,
+                    account=pod.account
+                )
             
-            pod_history = history['pods'][pod_id]
-            last_seen = datetime.fromisoformat(pod_history.get('last_seen', current_time.isoformat()))
-            days_exited = (current_time - last_seen).days
+            if ('reminder', pod_id) in timers:
+                continue
+            if candidates is not None and pod_id not in candidates:
+                continue
             
-            if (days_exited >= 1 and
-                (pod_id not in last_reminder or 
-                 current_time - last_reminder[pod_id] >= one_day)):
-                
-                notify("Exited Pod Reminder", 
-                       f"Pod {pod_id} has been in EXITED state for "
-                       f"{days_exited} {'day' if days_exited == 1 else 'days'}\n"
-                       f"Consider cleaning up to avoid storage costs.")
-                last_reminder[pod_id] = current_time
-                logging.info(f"Sent daily reminder for exited pod {pod_id}")
+            last_seen = history['pods'][pod_id].last_seen or now
+            timers.schedule('reminder', pod_id, last_seen + ONE_DAY_SECONDS)
+    
+    # Pods that were removed or restarted don't need reminders any more
+    timers.retain(('reminder',), exited_ids)
+    
+    for kind, pod_id, due in timers.pop_due(now, ('reminder',)):
+        last_seen = history['pods'][pod_id].last_seen or now
+        days_exited = int((now - last_seen) // ONE_DAY_SECONDS)
+        notify("Exited Pod Reminder", 
+               f"Pod {pod_id} has been in EXITED state for "
+               f"{days_exited} {'day' if days_exited == 1 else 'days'}\n"
+               f"Consider cleaning up to avoid storage costs.")
+        timers.schedule('reminder', pod_id, now + ONE_DAY_SECONDS)
+        logging.info(f"Sent daily reminder for exited pod {pod_id}")
+
+def record_samples(series, now, pods, history, ledger, pricing):
+    """Record this tick's pod counts, burn rate and cumulative costs.
+    
+    Pod counts and burn rate are also published as metrics."""
+    counts = {}
+    burn_rate = 0
+    PODS.clear()
+    for pod in pods:
+        counts[pod.status] = counts.get(pod.status, 0) + 1
+        PODS.labels(pod.status, pod.gpu).inc()
+        burn_rate += ledger.hourly_rate(pod, pricing)
+        record = history['pods'].get(pod.id)
+        if record is not None:
+            series.add(f'cost.pod.{pod.id}', now, record.total_cost)
+    for status in PodStatus:
+        series.add(f'pods.{status.value.lower()}', now, counts.get(status, 0))
+    series.add('burn_rate', now, burn_rate)
+    BURN_RATE.set(burn_rate)
+    for gpu, total in ledger.gpu_totals.items():
+        series.add(f'cost.gpu.{gpu}', now, total)
+
+def record_state(record):
+    """Return the parts of a history record that are written as soon as they change.
+    
+    Everything else (costs, runtime, last seen) moves with the clock and is
+    only written at checkpoints."""
+    if record is None:
+        return None
+    return (record.status, record.gpu, record.session is None, record.account)
+
+def pod_label(pod):
+    """Return how a pod is named in the status output."""
+    if pod.account:
+        return f"Pod {pod.id} ({pod.gpu}) [{pod.account}]"
+    return f"Pod {pod.id} ({pod.gpu})"
+
+def check_budgets(state, now):
+    """Print each fleet account's spend today and alert once a day when it is over budget."""
+    today = datetime.fromtimestamp(now).date().isoformat()
+    stale = getattr(state.pod_source, 'stale', ())
+    for name, account in state.accounts.items():
+        spent = state.ledger.day_total(account=name)
+        ACCOUNT_SPEND.labels(name).set(spent)
+        budget = account.get('daily_budget')
+        line = f"  {name}: ${spent:.2f}"
+        if budget:
+            line += f" of ${budget:.2f} budget"
+        if name in stale:
+            line += " (no fresh listing)"
+        print(line)
+        if budget and spent >= budget and state.budget_alerts.get(name) != today:
+            state.budget_alerts[name] = today
+            notify("Budget Exceeded",
+                   f"Account {name} has spent ${spent:.2f} today, "
+                   f"over its ${budget:.2f} daily budget")
+            logging.warning(f"Account {name} is over its daily budget: ${spent:.2f} of ${budget:.2f}")
+
+def check_forecast(state, pods, running, now, pricing):
+    """Project spend at the current rates and act on budgets it would exceed.
+    
+    The daily and monthly budgets are compared with what has been spent so
+    far plus the current burn rate until the end of the day or month. An
+    alert is sent once per period; with budget_action 'terminate', running
+    pods are also stopped, most expensive first, until the projection fits."""
+    config = state.config
+    ledger = state.ledger
+    forecast = state.forecast
+    forecast.update(pods, lambda pod: ledger.hourly_rate(pod, pricing))
+    
+    projections = forecast.project()
+    for hours, spend in projections.items():
+        PROJECTED_SPEND.labels(format_horizon(hours)).set(spend)
+    print("Projected spend: " + ", ".join(f"${spend:.2f} next {format_horizon(hours)}"
+                                          for hours, spend in projections.items()))
+    
+    current = datetime.fromtimestamp(now)
+    budgets = (
+        ('daily', config.get('daily_budget'), ledger.day_total(), hours_until_day_end(now),
+         current.date().isoformat()),
+        ('monthly', config.get('monthly_budget'), ledger.month_total(), hours_until_month_end(now),
+         current.strftime('%Y-%m')),
+    )
+    for kind, budget, spent, hours_left, period in budgets:
+        if not budget:
+            continue
+        projected = forecast.projected(spent, hours_left)
+        print(f"Projected {kind} spend: ${projected:.2f} of ${budget:.2f} budget")
+        if projected <= budget:
+            continue
+        if state.forecast_alerts.get(kind) != period:
+            state.forecast_alerts[kind] = period
+            notify("Budget Forecast",
+                   f"Projected {kind} spend is ${projected:.2f}, over the ${budget:.2f} budget\n"
+                   f"Current burn rate: ${forecast.total_rate:.2f}/hour")
+            logging.warning(f"Projected {kind} spend ${projected:.2f} is over the "
+                            f"${budget:.2f} budget")
+        if config.get('budget_action', 'notify') != 'terminate':
+            continue
+        for pod in forecast.shutdown_order(projected - budget, hours_left,
+                                           lambda pod: pod.id in running):
+            runtime_hours, cost, _ = running[pod.id]
+            if state.terminator.submit(pod.id, {'runtime_hours': runtime_hours, 'cost': cost}):
+                print(f"{Fore.YELLOW}Stopping pod {pod.id} "
+                      f"(${ledger.hourly_rate(pod, pricing):.2f}/hour) to stay within the "
+                      f"{kind} budget{Style.RESET_ALL}")
+                logging.warning(f"Stopping pod {pod.id} to stay within the {kind} budget")
+
+def publish_state(state, pods, now, pricing):
+    """Hand a snapshot of this check's pods, deadlines and costs to the control API."""
+    records = state.history['pods']
+    ledger = state.ledger
+    forecast = state.forecast
+    if forecast.pods is pods:
+        rates = forecast.rates
+    else:
+        rates = [ledger.hourly_rate(pod, pricing) for pod in pods]
+    
+    pod_rows = {}
+    running = 0
+    for pod, rate in zip(pods, rates):
+        row = {'id': pod.id, 'gpu': pod.gpu, 'status': str(pod.status), 'quantity': pod.quantity,
+               'account': pod.account, 'hourly_rate': rate}
+        record = records.get(pod.id)
+        if record is not None:
+            session = record.session
+            row['running_since'] = to_iso(session['start']) if session else None
+            row['session_cost'] = session['cost'] if session else 0
+            row['total_cost'] = record.total_cost
+            row['storage_cost'] = record.storage_cost
+            row['first_seen'] = to_iso(record.first_seen)
+            row['sessions'] = len(record.sessions or ()) + (1 if session else 0)
+        if pod.status == PodStatus.RUNNING:
+            running += 1
+        pod_rows[pod.id] = row
+    
+    deadlines = sorted(({'kind': kind, 'pod_id': pod_id, 'due': to_iso(due)}
+                        for kind, pod_id, due in state.timers.items()),
+                       key=lambda deadline: deadline['due'])
+    pending = sorted(state.terminator.pending())
+    burn_rate = sum(rates)
+    state.view.publish({
+        'status': {
+            'checked_at': to_iso(now),
+            'pods': len(pods),
+            'running': running,
+            'burn_rate': burn_rate,
+            'spend_today': ledger.day_total(),
+            'spend_month': ledger.month_total(),
+            'pending_terminations': pending,
+            'stale_accounts': sorted(getattr(state.pod_source, 'stale', ())),
+        },
+        'pods': pod_rows,
+        'deadlines': deadlines,
+        'ledger': {
+            'daily_costs': dict(ledger.daily),
+            'account_daily_costs': {account: dict(days) for account, days in
+                                    state.history.get('account_daily_costs', {}).items()},
+            'gpu_totals': dict(ledger.gpu_totals),
+            'burn_rate': burn_rate,
+            'projections': {format_horizon(hours): spend for hours, spend in
+                            forecast.project().items()} if pods else {},
+        },
+    }, to_iso(now))
+
+def archive_history(state, listed_ids, now):
+    """Move pods that are gone and haven't been seen for `retention_days` to the archive.
+    
+    Their lifetime cost stays in the per-GPU totals through
+    history['archived_gpu_totals']. Returns the number of pods moved."""
+    if not state.retention_days:
+        return 0
+    history = state.history
+    expired = expired_pods(history, listed_ids, now - state.retention_days * ONE_DAY_SECONDS)
+    if not expired:
+        return 0
+    try:
+        state.archive.archive(expired)
+    except OSError as e:
+        logging.error(f"Error archiving history: {e}")
+        return 0
+    totals = history.setdefault('archived_gpu_totals', {})
+    for pod_id, record in expired.items():
+        totals[record.gpu] = totals.get(record.gpu, 0) + record.total_cost
+        del history['pods'][pod_id]
+    logging.info(f"Archived {len(expired)} pods not seen for {state.retention_days} days")
+    return len(expired)
 
 def ensure_directories():
     """Create necessary directories if they don't exist."""
     os.makedirs('data', exist_ok=True)
     os.makedirs('logs', exist_ok=True)
 
-def main():
+class MonitorState:
+    """Long-lived objects shared by every status check."""
+    
+    def __init__(self, config, pricing_provider, pod_source, terminator, scheduler,
+                 timers, history, ledger, series, series_path):
+        self.config = config
+        self.pricing_provider = pricing_provider
+        self.pod_source = pod_source
+        self.terminator = terminator
+        self.scheduler = scheduler
+        self.timers = timers
+        self.history = history
+        self.ledger = ledger
+        self.series = series
+        self.series_path = series_path
+        self.series_save_seconds = config.get('timeseries_save_minutes', 10) * 60
+        self.next_series_save = time.time() + self.series_save_seconds
+        self.checkpoint_seconds = config.get('history_checkpoint_minutes', 5) * 60
+        self.next_checkpoint = time.time() + self.checkpoint_seconds
+        self.dirty = set()  # Pods whose record_state changed since the last save
+        self.accounts = account_configs(config)  # Fleet accounts with their own thresholds
+        self.policies = PolicyEngine([], config, self.accounts)  # Thresholds per pod
+        self.budget_alerts = {}  # Account -> day its over-budget alert was sent
+        self.forecast = SpendForecast(config.get('forecast_horizons_hours', DEFAULT_HORIZONS_HOURS))
+        self.forecast_alerts = {}  # 'daily'/'monthly' -> period its alert was sent
+        self.view = None  # MonitorView fed after each check while the control API runs
+        self.state_path = None  # Where the state snapshot is written, None to disable
+        self.retention_days = config.get('history_retention_days', 30)
+        self.archive = HistoryArchive(ARCHIVE_DIR)
+        self.warm = False  # Whether timers and alerts were restored from a snapshot
+
+def create_monitor(config, pricing_provider, pod_source, state_path=None, policies=None):
+    """Set up termination, scheduling, history and cost tracking for the main loop.
+    
+    With `state_path`, timers and sent-alert bookkeeping are restored from
+    the state snapshot there, and so is history if its files haven't
+    changed since the snapshot was taken. `policies` is a PolicyEngine
+    with per-pod thresholds; without one the configured thresholds apply."""
+    terminator = TerminationExecutor(
+        pod_source.terminate,
+        pod_exists=pod_source.pod_exists,
+        max_workers=config.get('termination_workers', 4),
+        max_attempts=config.get('termination_max_attempts', 4),
+        backoff_seconds=config.get('termination_backoff_seconds', 5),
+        terminate_many=getattr(pod_source, 'terminate_many', None)
+    )
+    scheduler = TickScheduler(
+        config.get('max_check_interval_seconds', config['check_interval_seconds']),
+        min_interval=config.get('min_check_interval_seconds', 10)
+    )
+    backend = config.get('history_backend', 'json')
+    with gc_paused():
+        saved = load_state(state_path) if state_path else None
+        history = None
+        if saved is not None and saved.get('history_backend') == backend:
+            # Compare before the store opens its files
+            if saved['history_files'] == fingerprint(history_files(backend)):
+                history = get_history_store(backend).adopt(decode_history(saved['history']))
+            else:
+                logging.info("History changed since the state snapshot was taken; loading it")
+        if history is None:
+            get_history_store(backend)
+            history = load_history()
+        
+        # Ensure history has the right structure
+        if not isinstance(history, dict):
+            history = {}
+        if 'pods' not in history:
+            history['pods'] = {}
+        ledger = CostLedger(history, storage_gb=config.get('default_storage_gb', 0),
+                            tier=config.get('pricing_tier'),
+                            account_tiers={name: account.get('pricing_tier') for name, account
+                                           in account_configs(config).items()})
+        
+        series_path = os.path.join('data', 'timeseries.bin')
+        series = TimeSeriesStore(max_bytes=int(config.get('timeseries_max_mb', 32) * 1024 * 1024))
+        series.load(series_path)
+        state = MonitorState(config, pricing_provider, pod_source, terminator, scheduler,
+                             TimerIndex(), history, ledger, series, series_path)
+        state.state_path = state_path
+        if policies is not None:
+            state.policies = policies
+        if saved is not None:
+            restore_monitor_state(state, saved)
+    return state
+
+@contextlib.contextmanager
+def gc_paused():
+    """Pause the cyclic garbage collector while many long-lived objects are built.
+    
+    Loading a large history creates millions of objects, and every
+    collection triggered on the way would walk all of them again."""
+    enabled = gc.isenabled()
+    gc.disable()
+    try:
+        yield
+    finally:
+        if enabled:
+            gc.enable()
+
+def save_monitor_state(state):
+    """Write timers, sent-alert bookkeeping and history to the state snapshot.
+    
+    Call right after a full history save: the snapshot's history is only
+    used if the history files are still as they were then."""
+    backend = state.config.get('history_backend', 'json')
+    try:
+        save_state(state.state_path, {
+            'saved_at': time.time(),
+            'timers': state.timers.items(),
+            'budget_alerts': state.budget_alerts,
+            'forecast_alerts': state.forecast_alerts,
+            'history_backend': backend,
+            'history_files': fingerprint(history_files(backend)),
+            'history': encode_history(state.history),
+        })
+    except OSError as e:
+        logging.error(f"Error saving state snapshot: {e}")
+
+def restore_monitor_state(state, saved):
+    """Put back timers and alert bookkeeping from a state snapshot.
+    
+    Restored notification and reminder timers keep their cooldowns, so a
+    restart doesn't send every alert again."""
+    state.timers.load(saved['timers'])
+    state.budget_alerts.update(saved['budget_alerts'])
+    state.forecast_alerts.update(saved['forecast_alerts'])
+    state.warm = True
+    logging.info(f"Restored {len(saved['timers'])} timers from the state snapshot saved at "
+                 f"{datetime.fromtimestamp(saved['saved_at']).strftime('%Y-%m-%d %H:%M:%S')}")
+
+def run_tick(state):
+    """Run one status check. The caller sleeps until the next one is due."""
+    config = state.config
+    history = state.history
+    timers = state.timers
+    ledger = state.ledger
+    scheduler = state.scheduler
+    terminator = state.terminator
+    dirty = state.dirty
+    
+    scheduler.start_tick()
+    TICK_LAG.set(scheduler.lag)
+    current_time = datetime.now()
+    now = current_time.timestamp()
+    pricing = state.pricing_provider.pricing  # Picks up background refreshes
+    with TRACER.span('report_terminations'):
+        report_terminations(terminator)
+    with TRACER.span('get_pods'):
+        pods = state.pod_source.get_pods()
+    
+    status_msg = f"\n{Fore.CYAN}Status check at {current_time.strftime('%Y-%m-%d %H:%M:%S')}:{Style.RESET_ALL}"
+    print(status_msg)
+    logging.info(status_msg)
+    
+    if pods is None:
+        # Not the same as no pods: keep sessions and timers until a listing succeeds
+        print(f"{Fore.YELLOW}Could not list pods; will try again next check.{Style.RESET_ALL}")
+        get_notifier().flush()
+        TICK_SECONDS.observe(scheduler.elapsed())
+        return
+    if not pods:
+        print("No pods found.")
+    
+    active_pods = [p for p in pods if p.status == PodStatus.RUNNING]
+    exited_pods = [p for p in pods if p.status == PodStatus.EXITED]
+    
+    running = {}
+    stale = getattr(state.pod_source, 'stale', ())
+    if active_pods:
+        print("\nACTIVE PODS:")
+    with TRACER.span('policies', pods=len(active_pods), rules=len(state.policies)):
+        policies = state.policies.evaluate(active_pods, lambda pod: ledger.hourly_rate(pod, pricing))
+    with TRACER.span('active_pods', pods=len(active_pods)):
+        for pod, policy in zip(active_pods, policies):
+            pod_id = pod.id
+            
+            known = history['pods'].get(pod_id)
+            before = record_state(known)
+            pod_history = update_pod_history(pod, history, now)
+            
+            # Calculate runtime, preferring the uptime reported by runpodctl.
+            # A stale account's uptime is from an earlier poll, so keep the
+            # start time already recorded instead of moving it later.
+            if pod.runtime and (known is None or pod.account not in stale):
+                runtime_hours = parse_runtime(pod.runtime)
+                pod_history.start_time = now - runtime_hours * 3600
+            else:
+                runtime_hours = (now - pod_history.start_time) / 3600
+            
+            # Charge the time since the last tick at today's prices
+            ledger.accrue(pod, pod_history, now, pricing, runtime_hours)
+            cost = pod_history.session['cost']
+            if record_state(pod_history) != before:
+                dirty.add(pod_id)
+            
+            # Display info
+            print(f"{pod_label(pod)}:")
+            print(f"  Running for: {runtime_hours:.1f} hours")
+            print(f"  Cost so far: ${cost:.2f} "
+                  f"(${ledger.hourly_rate(pod, pricing):.2f}/hour)")
+            if pod_history.sessions:
+                print(f"  All sessions: ${pod_history.total_cost:.2f} "
+                      f"over {len(pod_history.sessions) + 1} sessions")
+            
+            # Timers are only (re)set when this pod's deadlines move
+            start_ts = now - runtime_hours * 3600
+            if policy.notify_after is None:
+                timers.cancel('notify', pod_id)
+            elif ('notify', pod_id) not in timers:
+                timers.schedule('notify', pod_id, start_ts + policy.notify_after)
+            if policy.shutdown_after is None:
+                timers.cancel('shutdown', pod_id)
+            else:
+                timers.schedule('shutdown', pod_id, start_ts + policy.shutdown_after,
+                                tolerance=30)
+            running[pod_id] = (runtime_hours, cost, policy)
+    
+    with TRACER.span('timers'):
+        # Drop timers and close sessions for pods that stopped running or disappeared
+        timers.retain(('notify', 'shutdown'), running)
+        terminator.retain({pod.id for pod in pods})
+        dirty.update(ledger.close_sessions(running))
+        
+        for kind, pod_id, due in timers.pop_due(now, ('notify', 'shutdown')):
+            runtime_hours, cost, policy = running[pod_id]
+            if kind == 'notify':
+                notify("Long-running Pod Alert", 
+                       f"Pod {pod_id} has been running for {runtime_hours:.1f} hours\n"
+                       f"Cost so far: ${cost:.2f}")
+                timers.schedule('notify', pod_id, now + policy.cooldown)
+            elif kind == 'shutdown':
+                rule = f" (policy {policy.rule!r})" if policy.rule else ""
+                print(f"WARNING: Pod {pod_id} exceeded shutdown threshold{rule}!")
+                if not terminator.submit(pod_id, {'runtime_hours': runtime_hours, 'cost': cost}):
+                    if terminator.is_pending(pod_id):
+                        print(f"  Termination already in progress")
+                    else:
+                        print(f"  Pod was already terminated")
+    
+    if exited_pods:
+        print("\nEXITED PODS:")
+    with TRACER.span('exited_pods', pods=len(exited_pods)):
+        for pod in exited_pods:
+            pod_id = pod.id
+            before = record_state(history['pods'].get(pod_id))
+            if pod_id not in history['pods']:
+                history['pods'][pod_id] = HistoryRecord(
+                    gpu=pod.gpu,
+                    status=PodStatus.EXITED,
+                    first_seen=now,
+                    last_seen=now,
+                    account=pod.account
+                )
+            elif history['pods'][pod_id].status != PodStatus.EXITED:
+                # Keep last_seen as-is so it marks when the pod exited
+                history['pods'][pod_id].status = PodStatus.EXITED
+            pod_history = history['pods'][pod_id]
+            ledger.accrue(pod, pod_history, now, pricing)
+            if record_state(pod_history) != before:
+                dirty.add(pod_id)
+            
+            print(f"{pod_label(pod)}:")
+            print(f"  Status: EXITED")
+            print(f"  Storage costs: ${pricing['storage']['idle']:.2f}/GB/Month (idle pod rate)")
+            if pod.storage_gb is None and not config.get('default_storage_gb'):
+                print("  Note: Check pod storage size for actual costs")
+            else:
+                print(f"  Storage cost so far: ${pod_history.storage_cost:.2f}")
+        
+    # Add daily reminder checks
+    with TRACER.span('reminders'):
+        check_long_term_exited(exited_pods, history, timers, get_history_store(), dirty)
+    
+    print(f"\nSpend today: ${ledger.day_total():.2f}")
+    if state.accounts:
+        check_budgets(state, now)
+    with TRACER.span('forecast'):
+        check_forecast(state, pods, running, now, pricing)
+    terminator.flush()  # Kills from this check go out together
+    with TRACER.span('record_samples'):
+        record_samples(state.series, now, pods, history, ledger, pricing)
+    if now >= state.next_series_save:
+        with TRACER.span('save_timeseries'):
+            state.series.save(state.series_path)
+        state.next_series_save = now + state.series_save_seconds
+    if state.view is not None:
+        with TRACER.span('publish_state'):
+            publish_state(state, pods, now, pricing)
+    
+    # Between checkpoints only pods whose status, GPU or session changed are
+    # written, so a steady-state check doesn't touch the disk. Costs accrue
+    # from `last_accrued`, so after a crash the time since the last
+    # checkpoint is charged on the next check instead of being lost.
+    if now >= state.next_checkpoint:
+        with TRACER.span('archive_history'):
+            archive_history(state, {pod.id for pod in pods}, now)
+        save_history(history)
+        if state.state_path:
+            with TRACER.span('save_state'):
+                save_monitor_state(state)
+        state.next_checkpoint = now + state.checkpoint_seconds
+    elif dirty:
+        save_history(history, dirty)
+    dirty.clear()
+    
+    # Send this tick's alerts as one summary, in the background
+    get_notifier().flush()
+    
+    # Wake up when the next timer is due, and soon while kills are in flight
+    next_due = timers.next_due()
+    if next_due is not None:
+        scheduler.add_deadline(next_due - time.time())
+    if terminator.pending():
+        scheduler.add_deadline(0)
+    TICK_SECONDS.observe(scheduler.elapsed())
+
+def close_monitor(state):
+    """Finish pending kills and release everything the main loop opened."""
+    state.terminator.shutdown()
+    report_terminations(state.terminator)
+    state.pod_source.close()
+    state.pricing_provider.stop()
+    state.series.save(state.series_path)
+    save_history(state.history)
+    get_notifier().stop()
+    get_history_store().close()
+    if state.state_path:
+        save_monitor_state(state)
+
+def parse_args(argv=None):
+    """Parse command line options."""
+    parser = argparse.ArgumentParser(description="Monitor RunPod pods, track costs and stop "
+                                                 "pods that run too long.")
+    parser.add_argument('--trace', metavar='PATH',
+                        help="record how long each stage of every check takes and write a "
+                             "Chrome trace (open in Perfetto) to PATH on exit")
+    parser.add_argument('--profile', type=int, metavar='TICKS',
+                        help="profile the next TICKS checks with cProfile")
+    parser.add_argument('--profile-dir', default=os.path.join('logs', 'profile'),
+                        help="where --profile writes its report (default logs/profile)")
+    return parser.parse_args(argv)
+
+def main(argv=None):
+    started = time.monotonic()
+    args = parse_args(argv)
     ensure_directories()  # Create directories at startup
     print(f"{Fore.CYAN}RunPod Monitor started. Press Ctrl+C to stop.{Style.RESET_ALL}")
-    setup_logging()
     
     try:
         config = load_config()
+        setup_logging(config)
         print(f"\n{Fore.YELLOW}Current configuration:{Style.RESET_ALL}")
         print(f"  Check interval: {config['check_interval_seconds']} seconds")
         print(f"  Notification threshold: {config['notification_threshold_minutes']} minutes")
         print(f"  Notification cooldown: {config['notification_cooldown_minutes']} minutes")
         print(f"  Shutdown threshold: {config['shutdown_threshold_hours']} hours")
+        if config.get('accounts'):
+            print(f"  Accounts: {', '.join(account['name'] for account in config['accounts'])}")
+        policies_path = config.get('policies_file', POLICIES_PATH)
+        policies = load_policies(policies_path, config, account_configs(config))
+        if len(policies):
+            print(f"  Policies: {len(policies)} rules from {policies_path}")
         
-        # Add longer pause between config and pricing
-        time.sleep(1.5)  # 1.5 second pause
-        
-        # Get pricing info (this will show colored output from runpod_pricing.py)
-        pricing = fetch_runpod_pricing()
+        state_path = STATE_PATH if config.get('state_snapshot', True) else None
+        warm = state_path is not None and os.path.exists(state_path)
+        if warm:
+            # Restarting: skip the pricing walkthrough
+            pricing_provider = create_pricing_provider(config, os.path.join('data', 'pricing_cache.json'))
+            print(f"  Pricing: {len(pricing_provider.pricing['gpus'])} GPU types (cached)")
+        else:
+            # Add longer pause between config and pricing
+            time.sleep(1.5)  # 1.5 second pause
+            
+            # Get pricing info (this will show colored output from runpod_pricing.py)
+            pricing_provider = create_pricing_provider(config, os.path.join('data', 'pricing_cache.json'))
+            fetch_runpod_pricing(pricing_provider)
         
-        get_pod_status()  # Initial test
+        NOTIFICATION_QUEUE.set_function(get_notifier(config).queue_depth)
+        pod_source = create_pod_source(config)
+        pod_source.get_pods()  # Initial test
     except Exception as e:
         print(f"{Fore.RED}Startup error: {e}{Style.RESET_ALL}")
         sys.exit(1)
     
-    last_notification = {}
-    last_reminder = {}
-    history = load_history()
+    state = create_monitor(config, pricing_provider, pod_source, state_path, policies)
+    gc.freeze()  # History loaded at startup lives as long as the monitor; don't rescan it
     
-    # Ensure history has the right structure
-    if not isinstance(history, dict):
-        history = {}
-    if 'pods' not in history:
-        history['pods'] = {}
+    metrics_server = None
+    if config.get('metrics_port'):
+        try:
+            metrics_server = MetricsServer(REGISTRY, config.get('metrics_host', '127.0.0.1'),
+                                           config['metrics_port']).start()
+            print(f"Metrics available at http://{config.get('metrics_host', '127.0.0.1')}:"
+                  f"{metrics_server.port}/metrics")
+        except OSError as e:
+            print(f"{Fore.YELLOW}Could not start metrics endpoint: {e}{Style.RESET_ALL}")
+            logging.error(f"Could not start metrics endpoint: {e}")
+    
+    control_server = None
+    if config.get('control_port'):
+        try:
+            control_server = ControlServer(MonitorView(), config.get('control_host', '127.0.0.1'),
+                                           config['control_port']).start()
+            state.view = control_server.view
+            print(f"Control API available at http://{config.get('control_host', '127.0.0.1')}:"
+                  f"{control_server.port}/status")
+        except OSError as e:
+            print(f"{Fore.YELLOW}Could not start control API: {e}{Style.RESET_ALL}")
+            logging.error(f"Could not start control API: {e}")
+    
+    TRACER.enabled = bool(args.trace)
+    profiler = TickProfiler(args.profile, args.profile_dir, TRACER) if args.profile else None
     
     logging.info("RunPod Monitor started")
     
+    first_tick = True
     while True:
         try:
-            current_time = datetime.now()
-            pods = get_pod_status()
-            
-            # Re-initialize colorama before each status update
-            init()
-            
-            status_msg = f"\n{Fore.CYAN}Status check at {current_time.strftime('%Y-%m-%d %H:%M:%S')}:{Style.RESET_ALL}"
-            print(status_msg)
-            logging.info(status_msg)
-            
-            active_pods = [p for p in pods if p['status'] == 'RUNNING']
-            exited_pods = [p for p in pods if p['status'] == 'EXITED']
-            
-            if not pods:
-                print("No pods found.")
-                time.sleep(config['check_interval_seconds'])
-                continue
-            
-            if active_pods:
-                print("\nACTIVE PODS:")
-                for pod in active_pods:
-                    pod_id = pod['id']
-                    
-                    # First update history
-                    update_pod_history(pod, 0, 0, history)
-                    pod_history = history['pods'][pod_id]
-                    
-                    # Now calculate runtime
-                    start_time = datetime.fromisoformat(pod_history['start_time'])
-                    runtime_hours = (current_time - start_time).total_seconds() / 3600
-                    
-                    # Calculate cost
-                    cost = calculate_cost(pod, pricing, runtime_hours)
-                    
-                    # Update history with final values
-                    update_pod_history(pod, runtime_hours, cost, history)
-                    
-                    # Display info
-                    print(f"Pod {pod['id']} ({pod['gpu']}):")
-                    print(f"  Running for: {runtime_hours:.1f} hours")
-                    print(f"  Cost so far: ${cost:.2f} "
-                          f"(${pricing['gpus'].get(pod['gpu'], 0):.2f}/hour)")
-                    
-                    # Check if notification needed
-                    if (runtime_hours >= config['notification_threshold_minutes'] / 60 and
-                        (pod['id'] not in last_notification or 
-                         (current_time - last_notification[pod['id']]).total_seconds() 
-                         >= config['notification_cooldown_minutes'] * 60)):  # Convert minutes to seconds
-                        
-                        notify("Long-running Pod Alert", 
-                               f"Pod {pod['id']} has been running for {runtime_hours:.1f} hours\n"
-                               f"Cost so far: ${cost:.2f}")
-                        last_notification[pod['id']] = current_time
-                    
-                    # Check if shutdown needed
-                    if runtime_hours >= config['shutdown_threshold_hours']:
-                        print(f"  WARNING: Pod exceeded shutdown threshold!")
-                        if terminate_pod(pod['id']):
-                            notify("Pod Terminated", 
-                                  f"Pod {pod['id']} was terminated after {runtime_hours:.1f} hours\n"
-                                  f"Total cost: ${cost:.2f}")
-            
-            if exited_pods:
-                print("\nEXITED PODS:")
-                for pod in exited_pods:
-                    pod_id = pod['id']
-                    if pod_id not in history['pods']:
-                        history['pods'][pod_id] = {
-                            'gpu': pod['gpu'],
-                            'first_seen': current_time.isoformat(),
-                            'status': 'EXITED'
-                        }
-                    
-                    print(f"Pod {pod_id} ({pod['gpu']}):")
-                    print(f"  Status: EXITED")
-                    print(f"  Storage costs: ${pricing['storage']['idle']:.2f}/GB/Month (idle pod rate)")
-                    print("  Note: Check pod storage size for actual costs")
-                
-                # Add daily reminder checks
-                check_long_term_exited(exited_pods, history, last_reminder)
-            
-            # Save updated history
-            save_history(history)
-            
-            time.sleep(config['check_interval_seconds'])
+            if profiler is not None and profiler.active:
+                with profiler.tick(), TRACER.span('tick'):
+                    run_tick(state)
+                if not profiler.active:
+                    print(f"Profile of {args.profile} checks written to {args.profile_dir}")
+            else:
+                with TRACER.span('tick'):
+                    run_tick(state)
+            if first_tick:
+                first_tick = False
+                STARTUP_SECONDS.set(time.monotonic() - started)
+                logging.info(f"First check finished {time.monotonic() - started:.2f}s after start "
+                             f"({'warm' if state.warm else 'cold'} start)")
+            state.scheduler.sleep()
             
         except KeyboardInterrupt:
             msg = "\nMonitor stopped by user."
@@ -419,6 +1201,18 @@ def main():
             logging.error(msg)
             print("Monitor stopped due to critical error. Check the logs for details.")
             break
+    
+    if metrics_server is not None:
+        metrics_server.stop()
+    if control_server is not None:
+        control_server.stop()
+    close_monitor(state)
+    if profiler is not None and profiler.active:
+        profiler.write()  # Stopped before all profiled checks ran
+    if args.trace:
+        TRACER.export(args.trace)
+        print(f"Trace written to {args.trace}")
+    stop_logging()
 
 if __name__ == "__main__":
-    main() 
\ No newline at end of file
+    main()
@@ -0,0 +1,61 @@
+import gzip
+import time
+from datetime import datetime
+import pod_monitor
+from utils.archive import HistoryArchive, expired_pods
+from utils.ledger import CostLedger
+from utils.records import HistoryRecord
+
+JAN = datetime(2024, 1, 15).timestamp()
+FEB = datetime(2024, 2, 10).timestamp()
+
+def test_archive_appends_monthly_segments(tmp_path):
+    """Test pods land in the segment of the month they were last seen, across appends."""
+    archive = HistoryArchive(str(tmp_path / 'archive'))
+    archive.archive({'a': HistoryRecord('A40', 'EXITED', last_seen=JAN, total_cost=1.0),
+                     'b': HistoryRecord('A40', 'EXITED', last_seen=FEB, total_cost=2.0)})
+    archive.archive({'c': HistoryRecord('L4', 'EXITED', last_seen=JAN + 60, total_cost=3.0)})
+    assert archive.months() == ['2024-01', '2024-02']
+    assert sorted(archive.segment('2024-01')) == ['a', 'c']
+    assert archive.find('b').total_cost == 2.0
+    assert archive.find('zz') is None
+    assert HistoryArchive(str(tmp_path / 'none')).months() == []
+
+def test_segments_load_lazily_and_survive_a_torn_append(tmp_path):
+    """Test only queried segments are read, and a damaged tail keeps the earlier pods."""
+    archive = HistoryArchive(str(tmp_path), cache_segments=1)
+    archive.archive({'a': HistoryRecord('A40', 'EXITED', last_seen=JAN)})
+    archive.archive({'b': HistoryRecord('A40', 'EXITED', last_seen=FEB)})
+    assert archive._cache == {}
+    archive.segment('2024-02')
+    assert list(archive._cache) == ['2024-02']
+    archive.segment('2024-01')
+    assert list(archive._cache) == ['2024-01']
+
+    path = tmp_path / 'pods-2024-01.jsonl.gz'
+    path.write_bytes(path.read_bytes() + gzip.compress(b'{"id":"x"}\n')[:12])
+    assert list(HistoryArchive(str(tmp_path)).segment('2024-01')) == ['a']
+
+def test_archive_history_keeps_listed_and_recent_pods(tmp_path, monkeypatch):
+    """Test only unlisted pods past the retention period move, and GPU totals keep their cost."""
+    monkeypatch.setattr(pod_monitor, 'ARCHIVE_DIR', str(tmp_path))
+    now = time.time()
+    old = now - 40 * pod_monitor.ONE_DAY_SECONDS
+    history = {'pods': {
+        'gone': HistoryRecord('A40', 'EXITED', last_seen=old, total_cost=5.0),
+        'listed': HistoryRecord('A40', 'EXITED', last_seen=old, total_cost=1.0),
+        'recent': HistoryRecord('A40', 'EXITED', last_seen=now - 3600, total_cost=1.0),
+        'open': HistoryRecord('L4', 'RUNNING', last_seen=old, session={'start': old, 'cost': 1}),
+    }}
+    assert sorted(expired_pods(history, {'listed'}, now - 30 * 86400)) == ['gone']
+
+    state = pod_monitor.MonitorState({'history_retention_days': 30}, None, None, None, None,
+                                     None, history, None, None, None)
+    assert pod_monitor.archive_history(state, {'listed'}, now) == 1
+    assert sorted(history['pods']) == ['listed', 'open', 'recent']
+    assert state.archive.find('gone').total_cost == 5.0
+    assert CostLedger(history).gpu_totals['A40'] == 7.0
+
+    state.retention_days = 0
+    history['pods']['gone'] = HistoryRecord('A40', 'EXITED', last_seen=old)
+    assert pod_monitor.archive_history(state, set(), now) == 0
@@ -0,0 +1,16 @@
+from benchmarks import suite
+
+def test_compare_flags_regressions_past_threshold():
+    """Test only slowdowns past the threshold and the noise floor fail."""
+    baseline = {'parse/10': 0.1, 'tick/10': 0.1, 'load_history/10': 0.0001}
+    results = {'parse/10': 0.25, 'tick/10': 0.15, 'load_history/10': 0.001, 'new/10': 1.0}
+    assert suite.compare(results, baseline, 2.0) == [('parse/10', 0.25, 0.1)]
+
+def test_suite_runs_small_fleet(tmp_path):
+    """Test every case runs, including a full status check, and results can be saved."""
+    output = tmp_path / 'results.json'
+    assert suite.main(['--sizes', '10', '--baseline', str(tmp_path / 'none.json'),
+                       '--output', str(output)]) == 0
+    assert set(suite.load_baseline(str(output))) == {
+        'parse/10', 'update_pod_history/10', 'save_history/10', 'load_history/10',
+        'check_long_term_exited/10', 'tick/10', 'tick_policies/10', 'restart_cold/10', 'restart_warm/10'}
@@ -0,0 +1,82 @@
+import json
+import threading
+import time
+import requests
+from utils.control import ControlServer, MonitorView
+
+def snapshot(statuses):
+    pods = {pod_id: {'id': pod_id, 'gpu': 'RTX A4000', 'status': status, 'account': None,
+                     'hourly_rate': 1.0}
+            for pod_id, status in statuses.items()}
+    return {'status': {'pods': len(pods)}, 'pods': pods,
+            'deadlines': [{'kind': 'shutdown', 'pod_id': 'a', 'due': '2024-01-01T12:00:00'}],
+            'ledger': {'daily_costs': {'2024-01-01': 2.5}}}
+
+def test_publish_records_status_changes():
+    """Test events are emitted for new, changed and vanished pods only."""
+    view = MonitorView()
+    view.publish(snapshot({'a': 'RUNNING', 'b': 'RUNNING'}), 't1')
+    view.publish(snapshot({'a': 'RUNNING', 'b': 'EXITED'}), 't2')
+    view.publish(snapshot({'a': 'RUNNING'}), 't3')
+    events = view.events_after(0, timeout=0)
+    assert [(e['seq'], e['pod_id'], e['old_status'], e['new_status'], e['time']) for e in events] == [
+        (1, 'a', None, 'RUNNING', 't1'), (2, 'b', None, 'RUNNING', 't1'),
+        (3, 'b', 'RUNNING', 'EXITED', 't2'), (4, 'b', 'EXITED', None, 't3')]
+    assert view.events_after(3, timeout=0) == events[3:]
+    assert view.events_after(99, timeout=0) == []
+
+def test_encoded_sections_are_cached_per_snapshot():
+    """Test a section is encoded once per snapshot and refreshed by the next one."""
+    view = MonitorView()
+    assert view.encoded('pods') == b'null'
+    view.publish(snapshot({'a': 'RUNNING'}), 't1')
+    body = view.encoded('pods')
+    assert view.encoded('pods') is body
+    assert json.loads(body)[0]['id'] == 'a'
+    view.publish(snapshot({'a': 'EXITED'}), 't2')
+    assert json.loads(view.encoded('pods'))[0]['status'] == 'EXITED'
+    assert view.pod('missing') is None
+
+def test_control_server_serves_state_and_events():
+    """Test the sections, single pods and the event stream over HTTP."""
+    view = MonitorView()
+    view.publish(snapshot({'a': 'RUNNING'}), 't1')
+    server = ControlServer(view, port=0, heartbeat_seconds=0.2).start()
+    base = f'http://127.0.0.1:{server.port}'
+    try:
+        assert requests.get(f'{base}/ledger', timeout=5).json() == {
+            'daily_costs': {'2024-01-01': 2.5}}
+        assert requests.get(f'{base}/deadlines', timeout=5).json()[0]['kind'] == 'shutdown'
+        assert requests.get(f'{base}/pods/a', timeout=5).json()['status'] == 'RUNNING'
+        assert requests.get(f'{base}/pods/zz', timeout=5).status_code == 404
+        assert requests.get(f'{base}/nope', timeout=5).status_code == 404
+
+        received = []
+        with requests.get(f'{base}/events', stream=True, timeout=5) as response:
+            publisher = threading.Timer(0.1, view.publish,
+                                        (snapshot({'a': 'EXITED'}), 't2'))
+            publisher.start()
+            for line in response.iter_lines(chunk_size=None):
+                if line:
+                    received.append(json.loads(line))
+                    break
+        assert received[0]['seq'] == 2 and received[0]['new_status'] == 'EXITED'
+
+        # Resuming from an earlier sequence number replays what was missed
+        with requests.get(f'{base}/events?since=0', stream=True, timeout=5) as response:
+            lines = response.iter_lines(chunk_size=None)
+            assert json.loads(next(lines))['seq'] == 1
+            assert json.loads(next(lines))['seq'] == 2
+
+        # A client resuming from before a restart gets the new run's events
+        with requests.get(f'{base}/events?since=500', stream=True, timeout=5) as response:
+            lines = response.iter_lines(chunk_size=None)
+            for status, when in (('RUNNING', 't3'), ('EXITED', 't4')):
+                threading.Timer(0.1, view.publish, (snapshot({'a': status}), when)).start()
+                # Give up after a few heartbeats rather than waiting forever
+                line = next((line for _, line in zip(range(10), lines) if line), None)
+                assert line is not None and json.loads(line)['time'] == when
+    finally:
+        start = time.monotonic()
+        server.stop()
+        assert time.monotonic() - start < 2
@@ -0,0 +1,85 @@
+import threading
+import time
+from utils.fleet import FleetSource, account_configs
+from utils.ledger import CostLedger
+from utils.records import HistoryRecord, Pod
+
+PRICING = {'gpus': {'RTX A4000': 1.0}, 'storage': {'running': 0.1, 'idle': 0.2}}
+
+class StubSource:
+    def __init__(self, pods, delay=0, error=None):
+        self.pods = pods
+        self.delay = delay
+        self.error = error
+        self.terminated = []
+        self.released = threading.Event()
+
+    def list_pods(self):
+        if self.delay:
+            self.released.wait(self.delay)
+        if self.error:
+            raise self.error
+        return [Pod(pod_id, 'RTX A4000', 'RUNNING') for pod_id in self.pods]
+
+    def terminate(self, pod_id):
+        self.terminated.append(pod_id)
+        return True
+
+    def pod_exists(self, pod_id):
+        return pod_id in self.pods
+
+    def close(self):
+        self.released.set()
+
+def test_account_configs_apply_overrides():
+    """Test each account gets the main config with its own thresholds on top."""
+    config = {'shutdown_threshold_hours': 10, 'notification_threshold_minutes': 60,
+              'accounts': [{'name': 'research', 'runpod_api_key': 'k1',
+                            'shutdown_threshold_hours': 2, 'daily_budget': 50},
+                           {'name': 'prod', 'runpod_api_key': 'k2'}]}
+    configs = account_configs(config)
+    assert configs['research']['shutdown_threshold_hours'] == 2
+    assert configs['research']['daily_budget'] == 50
+    assert configs['prod']['shutdown_threshold_hours'] == 10
+    assert account_configs({}) == {}
+
+def test_slow_or_failing_account_does_not_hold_up_the_others():
+    """Test a slow account is skipped after the timeout and a failing one keeps its last listing."""
+    slow = StubSource(['slow1'], delay=5)
+    flaky = StubSource(['flaky1'])
+    fleet = FleetSource({'fast': StubSource(['a', 'b']), 'slow': slow, 'flaky': flaky},
+                        timeout=0.3)
+
+    start = time.monotonic()
+    pods = fleet.get_pods()
+    assert time.monotonic() - start < 2
+    assert sorted((pod.account, pod.id) for pod in pods) == [
+        ('fast', 'a'), ('fast', 'b'), ('flaky', 'flaky1')]
+    assert fleet.stale == {'slow'}
+
+    flaky.error = RuntimeError('API down')
+    slow.released.set()
+    time.sleep(0.1)
+    pods = fleet.get_pods()
+    assert sorted(pod.id for pod in pods) == ['a', 'b', 'flaky1', 'slow1']
+    assert fleet.stale == {'flaky'}
+
+    assert fleet.terminate('slow1') and slow.terminated == ['slow1']
+    assert fleet.pod_exists('a') is True
+    assert fleet.terminate('unknown') is False
+    fleet.close()
+
+def test_ledger_keeps_daily_spend_per_account():
+    """Test costs of fleet pods are also totalled per account."""
+    history = {'pods': {}}
+    ledger = CostLedger(history)
+    now = time.time()
+    for pod_id, account in (('a', 'research'), ('b', 'prod')):
+        pod = Pod(pod_id, 'RTX A4000', 'RUNNING', account=account)
+        record = history['pods'][pod_id] = HistoryRecord('RTX A4000', 'RUNNING', account=account)
+        ledger.accrue(pod, record, now - 3600, PRICING)
+        ledger.accrue(pod, record, now, PRICING)
+
+    assert abs(ledger.day_total(account='research') - ledger.day_total(account='prod')) < 1e-9
+    assert abs(ledger.day_total() - 2 * ledger.day_total(account='prod')) < 1e-9
+    assert ledger.day_total(account='unknown') == 0
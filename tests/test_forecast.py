@@ -0,0 +1,46 @@
+from datetime import datetime
+from utils.forecast import (SpendForecast, format_horizon, hours_until_day_end,
+                            hours_until_month_end)
+from utils.ledger import CostLedger
+from utils.records import Pod
+
+RATES = {'cheap': 0.5, 'mid': 2.0, 'big': 8.0, 'idle': 0.0}
+
+def make_forecast():
+    pods = [Pod(pod_id, 'RTX A4000', 'RUNNING') for pod_id in RATES]
+    forecast = SpendForecast(horizons_hours=(1, 24))
+    forecast.update(pods, lambda pod: RATES[pod.id])
+    return forecast
+
+def test_projection_uses_fleet_burn_rate():
+    """Test projections scale the summed hourly rate over each horizon."""
+    forecast = make_forecast()
+    assert forecast.total_rate == 10.5
+    assert forecast.project() == {1: 10.5, 24: 252.0}
+    assert forecast.projected(spent=20, hours_left=2) == 41.0
+
+def test_shutdown_order_is_most_expensive_first():
+    """Test only as many pods as needed are picked, priciest first."""
+    forecast = make_forecast()
+    assert [pod.id for pod in forecast.shutdown_order(10, 2, lambda pod: True)] == ['big']
+    assert [pod.id for pod in forecast.shutdown_order(18, 2, lambda pod: True)] == ['big', 'mid']
+    assert [pod.id for pod in forecast.shutdown_order(18, 2, lambda pod: pod.id != 'big')] == \
+        ['mid', 'cheap']
+    # Pods that cost nothing are never stopped, even if the budget can't be met
+    assert [pod.id for pod in forecast.shutdown_order(1000, 2, lambda pod: True)] == \
+        ['big', 'mid', 'cheap']
+
+def test_period_helpers():
+    """Test hours left in the day and month, and horizon labels."""
+    now = datetime(2024, 2, 28, 18, 0).timestamp()
+    assert hours_until_day_end(now) == 6
+    assert hours_until_month_end(now) == 30
+    assert hours_until_month_end(datetime(2024, 12, 31, 12, 0).timestamp()) == 12
+    assert [format_horizon(hours) for hours in (1, 24, 168, 36)] == ['1h', '1d', '7d', '36h']
+
+def test_ledger_month_total():
+    """Test the month total adds up the days of that month only."""
+    ledger = CostLedger({'pods': {}, 'daily_costs': {'2024-01-31': 5.0, '2024-02-01': 1.5,
+                                                     '2024-02-10': 2.5}})
+    assert ledger.month_total(datetime(2024, 2, 15).date()) == 4.0
+    assert ledger.month_total(datetime(2024, 3, 1).date()) == 0
@@ -0,0 +1,103 @@
+import json
+from utils.records import HistoryRecord
+from utils.history_journal import HistoryJournal
+
+def make_record(status='RUNNING', cost=0):
+    return HistoryRecord.from_dict({
+        'gpu': 'RTX A4000',
+        'first_seen': '2024-01-01T00:00:00',
+        'start_time': '2024-01-01T00:00:00',
+        'last_seen': '2024-01-01T00:00:00',
+        'total_runtime': 0,
+        'total_cost': cost,
+        'status': status
+    })
+
+def journal_lines(journal):
+    with open(journal.journal_path) as f:
+        return f.read().splitlines()
+
+def test_load_creates_snapshot(tmp_path):
+    """Test a missing history creates an empty snapshot."""
+    journal = HistoryJournal(str(tmp_path / 'pod_history.json'))
+    history = journal.load()
+    
+    assert history == {'pods': {}}
+    assert json.loads((tmp_path / 'pod_history.json').read_text()) == {'pods': {}}
+
+def test_save_appends_only_changed_pods(tmp_path):
+    """Test each save journals only the pods that changed."""
+    journal = HistoryJournal(str(tmp_path / 'pod_history.json'))
+    history = journal.load()
+    history['pods']['a'] = make_record()
+    history['pods']['b'] = make_record()
+    assert journal.save(history) == 2
+    
+    history['pods']['b'].total_cost = 1.5
+    assert journal.save(history) == 1
+    assert journal.save(history) == 0
+    assert len(journal_lines(journal)) == 3
+    journal.close()
+    
+    reloaded = HistoryJournal(str(tmp_path / 'pod_history.json')).load()
+    assert reloaded == history
+
+def test_dirty_save_only_checks_dirty_pods(tmp_path):
+    """Test a save limited to dirty pods leaves other changes for the next full save."""
+    journal = HistoryJournal(str(tmp_path / 'pod_history.json'))
+    history = journal.load()
+    history['pods']['a'] = make_record()
+    history['pods']['b'] = make_record()
+    journal.save(history)
+    
+    history['pods']['a'].total_cost = 1.0
+    history['pods']['b'].status = 'EXITED'
+    history['daily'] = {'2024-01-01': 1.0}
+    assert journal.save(history, dirty={'b'}) == 1
+    assert journal.save(history, dirty=set()) == 0
+    assert journal.save(history) == 2  # Pod a and the daily totals
+    journal.close()
+    
+    reloaded = HistoryJournal(str(tmp_path / 'pod_history.json')).load()
+    assert reloaded == history
+
+def test_deleted_pods_and_meta_are_replayed(tmp_path):
+    """Test removals and top-level keys survive a reload."""
+    journal = HistoryJournal(str(tmp_path / 'pod_history.json'))
+    history = journal.load()
+    history['pods']['a'] = make_record()
+    journal.save(history)
+    del history['pods']['a']
+    history['daily'] = {'2024-01-01': 3.0}
+    journal.save(history)
+    journal.close()
+    
+    reloaded = HistoryJournal(str(tmp_path / 'pod_history.json')).load()
+    assert reloaded == {'pods': {}, 'daily': {'2024-01-01': 3.0}}
+
+def test_compaction_writes_snapshot_and_truncates_journal(tmp_path):
+    """Test compaction folds the journal into the snapshot."""
+    journal = HistoryJournal(str(tmp_path / 'pod_history.json'), compact_every=3)
+    history = journal.load()
+    for i in range(3):
+        history['pods'][f'pod{i}'] = make_record(cost=i)
+        journal.save(history)
+    journal.close()
+    
+    snapshot = json.loads((tmp_path / 'pod_history.json').read_text())
+    assert snapshot == {'pods': {pod_id: record.to_dict() for pod_id, record in history['pods'].items()}}
+    assert not (tmp_path / 'pod_history.journal').exists()
+    assert not (tmp_path / 'pod_history.journal.1').exists()
+
+def test_damaged_journal_tail_is_skipped(tmp_path):
+    """Test a partial last line from a crash doesn't lose earlier records."""
+    journal = HistoryJournal(str(tmp_path / 'pod_history.json'))
+    history = journal.load()
+    history['pods']['a'] = make_record()
+    journal.save(history)
+    journal.close()
+    with open(journal.journal_path, 'a') as f:
+        f.write('{"id":"b","pod":{"gpu"')
+    
+    reloaded = HistoryJournal(str(tmp_path / 'pod_history.json')).load()
+    assert list(reloaded['pods']) == ['a']
@@ -0,0 +1,60 @@
+import json
+from datetime import datetime, timedelta
+from utils.records import HistoryRecord
+from utils.history_sqlite import SqliteHistoryStore, migrate_json_history
+
+def make_record(gpu='RTX A4000', status='RUNNING', last_seen='2024-01-10T00:00:00', cost=0):
+    return HistoryRecord.from_dict({
+        'gpu': gpu,
+        'first_seen': '2024-01-01T00:00:00',
+        'start_time': '2024-01-01T00:00:00',
+        'last_seen': last_seen,
+        'total_runtime': 0,
+        'total_cost': cost,
+        'status': status
+    })
+
+def test_save_and_reload(tmp_path):
+    """Test history round-trips through SQLite, including extra keys."""
+    store = SqliteHistoryStore(str(tmp_path / 'pod_history.db'))
+    history = store.load()
+    history['pods']['a'] = make_record()
+    history['pods']['b'] = HistoryRecord.from_dict(dict(make_record().to_dict(), note='dev box'))
+    history['daily'] = {'2024-01-10': 2.5}
+    assert store.save(history) == 3
+    assert store.save(history) == 0
+    store.close()
+    
+    reloaded = SqliteHistoryStore(str(tmp_path / 'pod_history.db')).load()
+    assert reloaded == history
+
+def test_indexed_queries(tmp_path):
+    """Test exited and cost-per-GPU queries."""
+    store = SqliteHistoryStore(str(tmp_path / 'pod_history.db'))
+    history = store.load()
+    history['pods']['old'] = make_record(status='EXITED', last_seen='2024-01-01T00:00:00')
+    history['pods']['new'] = make_record(status='EXITED', last_seen='2024-01-09T12:00:00')
+    history['pods']['h100'] = make_record(gpu='H100 SXM', cost=10.0)
+    history['pods']['a4000'] = make_record(cost=1.5)
+    history['pods']['unseen'] = make_record(status='EXITED', last_seen=None)
+    store.save(history)
+    
+    now = datetime(2024, 1, 10)
+    assert sorted(store.exited_before(now - timedelta(days=1))) == ['old', 'unseen']
+    assert store.cost_by_gpu(now - timedelta(days=7)) == {'H100 SXM': 10.0, 'RTX A4000': 1.5}
+    assert sorted(store.pods_with_status('EXITED')) == ['new', 'old', 'unseen']
+    
+    plan = store._conn.execute(
+        "EXPLAIN QUERY PLAN SELECT id FROM pods WHERE status = 'EXITED' AND last_seen <= ?",
+        ('2024-01-09',)).fetchall()
+    assert 'USING INDEX' in str(plan) or 'USING COVERING INDEX' in str(plan)
+
+def test_migrate_json_history(tmp_path):
+    """Test an existing JSON history is imported once."""
+    json_path = tmp_path / 'pod_history.json'
+    json_path.write_text(json.dumps({'pods': {'a': make_record().to_dict()}}))
+    
+    store = SqliteHistoryStore(str(tmp_path / 'pod_history.db'))
+    migrate_json_history(str(json_path), store)
+    assert store.load()['pods'] == {'a': make_record()}
+    assert migrate_json_history(str(json_path), store) == 0
@@ -0,0 +1,65 @@
+from datetime import datetime
+from utils.ledger import CostLedger
+from utils.records import HistoryRecord, Pod
+
+PRICING = {'gpus': {'A40': 1.0}, 'storage': {'idle': 0.2, 'running': 0.1}}
+START = datetime(2024, 1, 1, 10, 0).timestamp()
+
+def make_ledger(**kwargs):
+    history = {'pods': {'abc': HistoryRecord('A40')}}
+    return CostLedger(history, **kwargs), history['pods']['abc']
+
+def test_accrues_per_interval_with_quantity():
+    """Test each tick charges only the time since the previous one."""
+    ledger, record = make_ledger()
+    pod = Pod('abc', 'A40', 'RUNNING', quantity=2)
+    assert ledger.accrue(pod, record, START, PRICING, runtime_hours=1) == 2.0
+    assert ledger.accrue(pod, record, START + 1800, PRICING) == 1.0
+    assert record.session['cost'] == 3.0
+    assert record.total_runtime == 1.5
+
+def test_price_change_only_affects_later_time():
+    """Test a new price table isn't applied to time already charged."""
+    ledger, record = make_ledger()
+    pod = Pod('abc', 'A40', 'RUNNING')
+    ledger.accrue(pod, record, START, PRICING, runtime_hours=1)
+    ledger.accrue(pod, record, START + 3600, {**PRICING, 'gpus': {'A40': 3.0}})
+    assert record.total_cost == 4.0
+
+def test_sessions_survive_restarts():
+    """Test stopping and restarting a pod keeps the earlier session."""
+    ledger, record = make_ledger(storage_gb=730)
+    ledger.accrue(Pod('abc', 'A40', 'RUNNING'), record, START, PRICING, runtime_hours=1)
+    ledger.accrue(Pod('abc', 'A40', 'EXITED'), record, START + 3600, PRICING)
+    assert record.session is None
+    assert record.sessions[0]['end'] == START
+    assert record.storage_cost == 0.2  # 730 GB for an hour at $0.20/GB-month
+    
+    ledger.accrue(Pod('abc', 'A40', 'RUNNING'), record, START + 7200, PRICING, runtime_hours=1.5)
+    assert record.session['start'] == START + 3600  # Overlap with the exited hour isn't charged twice
+    assert len(record.sessions) == 1
+    assert round(record.total_cost, 6) == round(1.1 + 0.2 + 1.1, 6)
+
+def test_close_sessions_for_missing_pods():
+    """Test sessions of pods that disappear are closed."""
+    ledger, record = make_ledger()
+    ledger.accrue(Pod('abc', 'A40', 'RUNNING'), record, START, PRICING, runtime_hours=1)
+    ledger.close_sessions([])
+    assert record.session is None
+    assert record.sessions[0]['cost'] == 1.0
+
+def test_daily_totals_split_at_midnight():
+    """Test an interval spanning midnight is split between both days."""
+    ledger, record = make_ledger()
+    midnight = datetime(2024, 1, 2).timestamp()
+    ledger.accrue(Pod('abc', 'A40', 'RUNNING'), record, midnight + 3600, PRICING, runtime_hours=3)
+    assert ledger.daily == {'2024-01-01': 2.0, '2024-01-02': 1.0}
+    assert ledger.day_total(datetime(2024, 1, 2).date()) == 1.0
+
+def test_ledger_state_round_trips():
+    """Test session state survives conversion to the history file layout."""
+    ledger, record = make_ledger()
+    ledger.accrue(Pod('abc', 'A40', 'RUNNING'), record, START, PRICING, runtime_hours=1)
+    ledger.close_sessions([])
+    ledger.accrue(Pod('abc', 'A40', 'RUNNING'), record, START + 7200, PRICING, runtime_hours=1)
+    assert HistoryRecord.from_dict(record.to_dict()) == record
@@ -0,0 +1,65 @@
+import gzip
+import logging
+import os
+from utils.logging_setup import (RotatingCompressedFileHandler, DumpDeduplicator,
+                                 configure_logging, stop_logging)
+
+def _record(message):
+    return logging.LogRecord('test', logging.INFO, __file__, 0, message, None, None)
+
+def test_rotation_compresses_old_logs(tmp_path):
+    """Test the log is rotated by size and age and old logs are gzipped."""
+    path = str(tmp_path / 'pod_monitor.log')
+    handler = RotatingCompressedFileHandler(path, max_bytes=100, max_age_seconds=3600,
+                                            backup_count=2)
+    for i in range(10):
+        handler.emit(_record(f'line {i} ' + 'x' * 40))
+    handler.close()
+
+    assert sorted(os.listdir(tmp_path)) == ['pod_monitor.log', 'pod_monitor.log.1.gz',
+                                            'pod_monitor.log.2.gz']
+    with gzip.open(path + '.1.gz', 'rt') as f:
+        assert 'line' in f.read()
+
+    handler = RotatingCompressedFileHandler(path, max_bytes=0, max_age_seconds=3600)
+    handler._opened_at -= 7200
+    assert handler.shouldRollover(_record('late'))
+    handler.close()
+
+def test_repeated_dumps_are_collapsed():
+    """Test identical output is logged in full once, then as a hash and count."""
+    logger = logging.getLogger('test_dumps')
+    logger.setLevel(logging.DEBUG)
+    messages = []
+    handler = logging.Handler()
+    handler.emit = lambda record: messages.append(record.getMessage())
+    logger.addHandler(handler)
+
+    dumps = DumpDeduplicator()
+    dumps.log('stdout', 'ID   NAME   \nabc  pod    \n', logger=logger)
+    dumps.log('stdout', 'ID   NAME\nabc  pod\n', logger=logger)  # Same apart from padding
+    dumps.log('stdout', 'ID   NAME   \nabc  pod    \n', logger=logger)
+    dumps.log('stdout', 'ID   NAME\n', logger=logger)
+    logger.removeHandler(handler)
+
+    assert messages[0].endswith(':\nID   NAME\nabc  pod')
+    assert 'unchanged' in messages[1] and '(repeated 1x)' in messages[1]
+    assert '(repeated 2x)' in messages[2]
+    assert messages[3].endswith(':\nID   NAME')
+
+def test_queued_records_reach_the_file(tmp_path):
+    """Test records logged from the caller are written by the listener thread."""
+    root = logging.getLogger()
+    saved_handlers, saved_level = list(root.handlers), root.level
+    try:
+        configure_logging(str(tmp_path), level='warning')
+        logging.info("not written")
+        logging.warning("written")
+        stop_logging()
+    finally:
+        root.handlers[:] = saved_handlers
+        root.setLevel(saved_level)
+
+    content = (tmp_path / 'pod_monitor.log').read_text()
+    assert 'WARNING - written' in content
+    assert 'not written' not in content
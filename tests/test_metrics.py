@@ -0,0 +1,48 @@
+import requests
+from utils.metrics import Registry, MetricsServer, CONTENT_TYPE
+
+def test_render_openmetrics():
+    """Test counters, gauges and histograms render in the OpenMetrics format."""
+    registry = Registry(prefix='test_')
+    kills = registry.counter('terminations', 'Kills', ['result'])
+    depth = registry.gauge('queue_depth', 'Queue depth')
+    latency = registry.histogram('call_seconds', 'Latency', buckets=(0.1, 1))
+    
+    kills.labels('success').inc()
+    kills.labels('success').inc(2)
+    depth.set_function(lambda: 4)
+    for value in (0.05, 0.5, 3):
+        latency.observe(value)
+    
+    text = registry.render()
+    assert '# TYPE test_terminations counter' in text
+    assert 'test_terminations_total{result="success"} 3' in text
+    assert 'test_queue_depth 4' in text
+    assert 'test_call_seconds_bucket{le="0.1"} 1' in text
+    assert 'test_call_seconds_bucket{le="1"} 2' in text
+    assert 'test_call_seconds_bucket{le="+Inf"} 3' in text
+    assert 'test_call_seconds_count 3' in text
+    assert 'test_call_seconds_sum 3.55' in text
+    assert text.endswith('# EOF\n')
+
+def test_label_escaping_and_clear():
+    """Test label values are escaped and per-tick gauges can be reset."""
+    registry = Registry()
+    pods = registry.gauge('pods', 'Pods', ['status', 'gpu'])
+    pods.labels('RUNNING', 'RTX "A4000"').inc()
+    assert 'pods{status="RUNNING",gpu="RTX \\"A4000\\""} 1' in registry.render()
+    pods.clear()
+    assert 'pods{' not in registry.render()
+
+def test_metrics_server():
+    """Test the endpoint serves the registry."""
+    registry = Registry()
+    registry.gauge('up', 'Up').set(1)
+    server = MetricsServer(registry, port=0).start()
+    try:
+        response = requests.get(f'http://127.0.0.1:{server.port}/metrics', timeout=5)
+        assert response.headers['Content-Type'] == CONTENT_TYPE
+        assert 'up 1' in response.text
+        assert requests.get(f'http://127.0.0.1:{server.port}/', timeout=5).status_code == 404
+    finally:
+        server.stop()
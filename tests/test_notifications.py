@@ -0,0 +1,76 @@
+import threading
+import time
+from utils.notifications import NotificationDispatcher, summarize
+
+class RecordingBackend:
+    def __init__(self, name='recording', delay=0):
+        self.name = name
+        self.delay = delay
+        self.sent = []
+        self.event = threading.Event()
+
+    def send(self, title, message):
+        time.sleep(self.delay)
+        self.sent.append((title, message))
+        self.event.set()
+
+def test_notify_never_waits_on_delivery():
+    """Test a slow backend doesn't block the caller."""
+    backend = RecordingBackend(delay=0.5)
+    dispatcher = NotificationDispatcher([backend], rate_limit_seconds=0)
+    start = time.monotonic()
+    dispatcher.notify("Pod Terminated", "Pod abc was terminated")
+    dispatcher.flush()
+    assert time.monotonic() - start < 0.1
+    
+    assert backend.event.wait(2)
+    assert backend.sent == [("Pod Terminated", "Pod abc was terminated")]
+    dispatcher.stop()
+
+def test_alerts_in_one_tick_are_coalesced():
+    """Test alerts flushed together arrive as a single summary."""
+    backend = RecordingBackend()
+    dispatcher = NotificationDispatcher([backend], rate_limit_seconds=0)
+    for i in range(5):
+        dispatcher.notify("Long-running Pod Alert", f"Pod pod{i} has been running for 2.0 hours\nCost so far: $1.00")
+    dispatcher.flush()
+    dispatcher.stop()
+    
+    assert len(backend.sent) == 1
+    title, message = backend.sent[0]
+    assert title == "RunPod Monitor: 5 alerts"
+    assert message.splitlines()[0] == ("Long-running Pod Alert: Pod pod0 has been running "
+                                       "for 2.0 hours Cost so far: $1.00")
+
+def test_rate_limit_holds_and_merges_per_channel():
+    """Test a rate-limited channel sends held alerts together later."""
+    limited = RecordingBackend('limited')
+    dispatcher = NotificationDispatcher([limited], rate_limit_seconds=0.3)
+    dispatcher.notify("A", "first")
+    dispatcher.flush()
+    assert limited.event.wait(1)
+    limited.event.clear()
+    
+    dispatcher.notify("B", "second")
+    dispatcher.flush()
+    dispatcher.notify("C", "third")
+    dispatcher.flush()
+    time.sleep(0.1)
+    assert len(limited.sent) == 1
+    
+    assert limited.event.wait(1)
+    assert limited.sent[1] == summarize([("B", "second"), ("C", "third")])
+    dispatcher.stop()
+
+def test_backend_errors_are_contained():
+    """Test one failing backend doesn't stop the others."""
+    class BrokenBackend:
+        name = 'broken'
+        def send(self, title, message):
+            raise RuntimeError("down")
+    
+    backend = RecordingBackend()
+    dispatcher = NotificationDispatcher([BrokenBackend(), backend], rate_limit_seconds=0)
+    dispatcher.notify("A", "message")
+    dispatcher.stop()
+    assert backend.sent == [("A", "message")]
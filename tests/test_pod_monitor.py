@@ -1,5 +1,38 @@
+import os
+import sys
+import time
 import pytest
-from pod_monitor import parse_pod_output
+from pod_monitor import (parse_pod_output, parse_runtime, parse_pod_uptime, fetch_pod_runtimes,
+                         get_pod_status, RunpodctlSource)
+from utils.records import Pod
+from utils.notifications import NotificationDispatcher
+from utils.termination import TerminationExecutor
+import pod_monitor
+
+FAKE_RUNPODCTL = '''#!{python}
+import sys, time
+if len(sys.argv) == 3:
+    print("ID              NAME                 GPU                  IMAGE NAME           STATUS")
+    print("abc123          Good Pod             1 RTX A4000          runpod/pytorch       RUNNING")
+    print("broken row")
+    print("def456          Other Pod            2 A40                runpod/pytorch       EXITED")
+    sys.exit(0)
+pod_id = sys.argv[3]
+if pod_id == 'slowpod':
+    time.sleep(5)
+time.sleep(0.3)
+print("ID              NAME        UPTIME      STATUS")
+print(pod_id.ljust(16) + "Test Pod    1d 2h       RUNNING")
+'''
+
+@pytest.fixture
+def fake_runpodctl(tmp_path, monkeypatch):
+    """Put a fake runpodctl executable first on PATH."""
+    script = tmp_path / 'runpodctl'
+    script.write_text(FAKE_RUNPODCTL.format(python=sys.executable))
+    script.chmod(0o755)
+    monkeypatch.setenv('PATH', str(tmp_path) + os.pathsep + os.environ['PATH'])
+    return script
 
 def test_parse_pod_output_current():
     """Test parsing current version of runpodctl output."""
@@ -9,6 +42,7 @@ wtvbiigewacjps  RunPod Pytorch 2.4.0 1 RTX A4000
     pods = parse_pod_output(sample_output)
     assert len(pods) == 1
     assert pods[0]['id'] == 'wtvbiigewacjps'
+    assert pods[0]['name'] == 'RunPod Pytorch 2.4.0'
     assert pods[0]['gpu'] == 'RTX A4000'
     assert pods[0]['status'] == 'RUNNING'
     assert pods[0]['quantity'] == 1
@@ -38,6 +72,73 @@ def test_parse_pod_output_empty():
     pods = parse_pod_output(sample_output)
     assert len(pods) == 0
 
+def test_parse_runtime():
+    """Test runtime strings are converted to hours."""
+    assert parse_runtime('2h') == 2
+    assert parse_runtime('5d') == 120
+    assert parse_runtime('30m') == 0.5
+    assert parse_runtime('1d 2h 30m') == 26.5
+    assert parse_runtime(None) == 0
+    assert parse_runtime('garbage') == 0
+
+def test_parse_pod_uptime():
+    """Test extracting the UPTIME column."""
+    output = """ID              NAME        UPTIME      STATUS
+wtvbiigewacjps  Test Pod    3h 5m       RUNNING"""
+    assert parse_pod_uptime(output) == '3h 5m'
+    assert parse_pod_uptime("ID    NAME    STATUS\nabc   x       RUNNING") is None
+
+@pytest.mark.skipif(os.name == 'nt', reason="fake runpodctl is a POSIX script")
+def test_fetch_pod_runtimes_concurrent(fake_runpodctl):
+    """Test uptimes are fetched in parallel."""
+    pods = [Pod(f'pod{i}', 'RTX A4000', 'RUNNING') for i in range(6)]
+    start = time.monotonic()
+    fetch_pod_runtimes(pods, max_workers=6, timeout=5)
+    elapsed = time.monotonic() - start
+    
+    assert all(pod.runtime == '1d 2h' for pod in pods)
+    assert elapsed < 6 * 0.3
+
+@pytest.mark.skipif(os.name == 'nt', reason="fake runpodctl is a POSIX script")
+def test_fetch_pod_runtimes_timeout(fake_runpodctl):
+    """Test a hanging runpodctl call leaves runtime unknown."""
+    pods = [Pod('slowpod', 'RTX A4000', 'RUNNING'), Pod('fastpod', 'RTX A4000', 'RUNNING')]
+    fetch_pod_runtimes(pods, timeout=1)
+    
+    assert pods[0].runtime is None
+    assert pods[1].runtime == '1d 2h'
+
+@pytest.mark.skipif(os.name == 'nt', reason="fake runpodctl is a POSIX script")
+def test_get_pod_status_streams_and_skips_bad_rows(fake_runpodctl):
+    """Test pods are parsed from the runpodctl pipe, skipping malformed rows."""
+    pods = get_pod_status()
+    assert [(pod.id, pod.status) for pod in pods] == [('abc123', 'RUNNING'), ('def456', 'EXITED')]
+
+@pytest.mark.skipif(os.name == 'nt', reason="fake runpodctl is a POSIX script")
+def test_unchanged_listing_skips_uptime_fetches(fake_runpodctl, monkeypatch):
+    """Test uptime is only fetched for running pods from new or changed rows."""
+    fetched = []
+    monkeypatch.setattr(pod_monitor, 'fetch_pod_runtime',
+                        lambda pod_id, timeout: fetched.append(pod_id) or '3h')
+    source = RunpodctlSource()
+    first = source.get_pods()
+    assert fetched == ['abc123'] and parse_runtime(first[0].runtime) == pytest.approx(3)
+    
+    second = source.get_pods()
+    assert fetched == ['abc123']
+    assert second[0] is first[0] and source.rows.unchanged
+    assert parse_runtime(second[0].runtime) == pytest.approx(3, abs=0.01)
+    
+    # A failed listing in between doesn't lose the start times of cached rows
+    source._started['abc123'] -= 3600  # An hour passes
+    real_get_pod_status = pod_monitor.get_pod_status
+    monkeypatch.setattr(pod_monitor, 'get_pod_status', lambda *args: None)
+    assert source.get_pods() is None
+    monkeypatch.setattr(pod_monitor, 'get_pod_status', real_get_pod_status)
+    third = source.get_pods()
+    assert fetched == ['abc123']
+    assert parse_runtime(third[0].runtime) == pytest.approx(4, abs=0.01)
+
 # Remove this test
 # def test_parse_pod_output_legacy():
 #     """Test parsing older versions of runpodctl output"""
@@ -49,7 +150,123 @@ def test_parse_pod_output_empty():
 #     assert len(pods) == 1
 #     assert pods[0]['gpu'] == 'A4000'
 
-def test_termination_notification():
+def test_termination_notification(monkeypatch):
     """Test notification is sent when pod is terminated."""
-    # Mock notification and termination
-    # Verify notification content 
\ No newline at end of file
+    sent = []
+    
+    class RecordingBackend:
+        name = 'recording'
+        def send(self, title, message):
+            sent.append((title, message))
+    
+    dispatcher = NotificationDispatcher([RecordingBackend()], rate_limit_seconds=0)
+    monkeypatch.setattr(pod_monitor, '_notifier', dispatcher)
+    terminator = TerminationExecutor(lambda pod_id: True)
+    terminator.submit('abc123', {'runtime_hours': 3.2, 'cost': 0.54})
+    terminator.shutdown()
+    
+    pod_monitor.report_terminations(terminator)
+    dispatcher.stop()
+    assert sent == [("Pod Terminated", "Pod abc123 was terminated after 3.2 hours\nTotal cost: $0.54")]
+
+def test_reminders_use_records_not_saved_yet(monkeypatch):
+    """Test pods changed since the last save are judged by their record, not the store's row."""
+    from utils.records import HistoryRecord
+    from utils.timers import TimerIndex
+    
+    class Store:
+        def exited_before(self, cutoff):
+            return ['restarted']  # Its row is from before it ran again and exited
+    
+    sent = []
+    monkeypatch.setattr(pod_monitor, 'notify', lambda title, message: sent.append(message))
+    now = time.time()
+    history = {'pods': {
+        'restarted': HistoryRecord('A40', status='EXITED', last_seen=now - 60),
+        'exited': HistoryRecord('A40', status='EXITED', last_seen=now - 2 * 86400),
+    }}
+    timers = TimerIndex()
+    pods = [Pod('restarted', 'A40', 'EXITED'), Pod('exited', 'A40', 'EXITED')]
+    pod_monitor.check_long_term_exited(pods, history, timers, Store(),
+                                       dirty={'restarted', 'exited'})
+    assert [message.split()[1] for message in sent] == ['exited']
+    assert ('reminder', 'restarted') not in timers
+
+def test_last_pod_disappearing_closes_its_session(tmp_path, monkeypatch):
+    """Test an empty listing closes sessions, drops timers and checkpoints, unlike a failed one."""
+    from utils.runpod_pricing import PricingProvider, StaticPriceSource
+    
+    class ListSource:
+        pods = [Pod('abc123', 'RTX A4000', 'RUNNING', '30m')]
+        def get_pods(self):
+            return self.pods
+        def terminate(self, pod_id):
+            return True
+        def pod_exists(self, pod_id):
+            return True
+    
+    monkeypatch.chdir(tmp_path)
+    (tmp_path / 'data').mkdir()
+    monkeypatch.setattr(pod_monitor, '_history_store', None)
+    config = {'check_interval_seconds': 60, 'notification_threshold_minutes': 60,
+              'notification_cooldown_minutes': 60, 'shutdown_threshold_hours': 10,
+              'history_checkpoint_minutes': 0}
+    provider = PricingProvider(StaticPriceSource(), str(tmp_path / 'data' / 'pricing.json'))
+    source = ListSource()
+    state = pod_monitor.create_monitor(config, provider, source, pod_monitor.STATE_PATH)
+    try:
+        pod_monitor.run_tick(state)
+        source.pods = None  # Listing failed: nothing is closed
+        pod_monitor.run_tick(state)
+        assert state.history['pods']['abc123'].session is not None
+        assert ('shutdown', 'abc123') in state.timers
+        
+        source.pods = []
+        pod_monitor.run_tick(state)
+    finally:
+        state.terminator.shutdown()
+        pod_monitor.get_history_store().close()
+    record = state.history['pods']['abc123']
+    assert record.session is None and len(record.sessions) == 1
+    assert len(state.timers) == 0
+    assert os.path.exists(pod_monitor.STATE_PATH)
+    monkeypatch.setattr(pod_monitor, '_history_store', None)
+    assert pod_monitor.load_history()['pods']['abc123'].session is None
+    pod_monitor.get_history_store().close()
+
+def test_stale_account_uptime_keeps_the_start_time(tmp_path, monkeypatch):
+    """Test a pod reused from a slow account's earlier poll keeps its start time and deadline."""
+    from utils.runpod_pricing import PricingProvider, StaticPriceSource
+    
+    class FleetStub:
+        pods = [Pod('abc123', 'RTX A4000', 'RUNNING', '30m', account='slow')]
+        stale = set()
+        def get_pods(self):
+            return self.pods
+        def terminate(self, pod_id):
+            return True
+        def pod_exists(self, pod_id):
+            return True
+    
+    monkeypatch.chdir(tmp_path)
+    (tmp_path / 'data').mkdir()
+    monkeypatch.setattr(pod_monitor, '_history_store', None)
+    config = {'check_interval_seconds': 60, 'notification_threshold_minutes': 60,
+              'notification_cooldown_minutes': 60, 'shutdown_threshold_hours': 10}
+    provider = PricingProvider(StaticPriceSource(), str(tmp_path / 'data' / 'pricing.json'))
+    source = FleetStub()
+    state = pod_monitor.create_monitor(config, provider, source)
+    try:
+        pod_monitor.run_tick(state)
+        # An hour later the account still hasn't answered, so its uptime still says 30m
+        record = state.history['pods']['abc123']
+        record.start_time -= 3600
+        started = record.start_time
+        state.timers.schedule('shutdown', 'abc123', started + 10 * 3600)
+        source.stale = {'slow'}
+        pod_monitor.run_tick(state)
+    finally:
+        state.terminator.shutdown()
+        pod_monitor.get_history_store().close()
+    assert state.history['pods']['abc123'].start_time == started
+    assert state.timers.due_time('shutdown', 'abc123') == pytest.approx(started + 10 * 3600)
@@ -0,0 +1,73 @@
+import json
+from utils.pod_parser import RowCache, compile_layout, parse_pod_lines, parse_pod_json
+from benchmarks.fleet import generate_pod_output
+
+HEADER = "ID              NAME                 GPU                  IMAGE NAME           STATUS"
+
+def test_layout_is_cached_per_header():
+    """Test the same header compiles to the same layout object."""
+    assert compile_layout(HEADER) is compile_layout(HEADER)
+
+def test_malformed_rows_are_skipped_individually():
+    """Test one bad row doesn't drop the rest of the listing."""
+    lines = [
+        HEADER,
+        "abc123          Good Pod             1 RTX A4000          runpod/pytorch       RUNNING",
+        "garbage",
+        "def456          Other Pod            2 A40                runpod/pytorch       EXITED",
+    ]
+    pods = list(parse_pod_lines(lines))
+    assert [pod['id'] for pod in pods] == ['abc123', 'def456']
+    assert pods[0].name == 'Good Pod'
+    assert pods[1]['gpu'] == 'A40'
+    assert pods[1]['quantity'] == 2
+
+def test_row_cache_reuses_unchanged_rows():
+    """Test only rows that changed since the previous listing are parsed."""
+    rows = [
+        HEADER,
+        "abc123          Good Pod             1 RTX A4000          runpod/pytorch       RUNNING",
+        "def456          Other Pod            2 A40                runpod/pytorch       EXITED",
+    ]
+    cache = RowCache()
+    first = list(parse_pod_lines(rows, cache))
+    cache.finish()
+    assert len(cache.parsed) == 2 and not cache.unchanged
+    
+    first[0].runtime = '2h'
+    second = list(parse_pod_lines(rows, cache))
+    cache.finish()
+    assert second[0] is first[0]
+    assert cache.parsed == [] and cache.unchanged
+    
+    rows[2] = rows[2].replace('EXITED', 'RUNNING')
+    third = list(parse_pod_lines(rows, cache))
+    cache.finish()
+    assert third[0] is first[0]
+    assert [pod.id for pod in cache.parsed] == ['def456'] and third[1].status == 'RUNNING'
+
+def test_missing_header_column():
+    """Test an unrecognised header yields no pods."""
+    assert list(parse_pod_lines(["ID    STATUS", "abc   RUNNING"])) == []
+
+def test_parse_large_listing():
+    """Test a padded 1k-row listing parses completely from a line stream."""
+    output = generate_pod_output(1000)
+    pods = list(parse_pod_lines(iter(output.splitlines(keepends=True))))
+    assert len(pods) == 1000
+    assert all(pod['status'] in ('RUNNING', 'EXITED', 'CREATED') for pod in pods)
+
+def test_parse_pod_json():
+    """Test structured output from runpodctl and the API."""
+    text = json.dumps([
+        {'id': 'abc123', 'gpu': '2 RTX A4000', 'status': 'RUNNING'},
+        {'id': 'def456', 'desiredStatus': 'RUNNING', 'gpuCount': 4,
+         'machine': {'gpuDisplayName': 'H100 SXM'}, 'runtime': {'uptimeInSeconds': 5400},
+         'volumeInGb': 100, 'containerDiskInGb': 20},
+        {'name': 'no id'}
+    ])
+    pods = parse_pod_json(text)
+    assert len(pods) == 2
+    assert (pods[0]['gpu'], pods[0]['quantity']) == ('RTX A4000', 2)
+    assert (pods[1]['gpu'], pods[1]['quantity'], pods[1]['runtime']) == ('H100 SXM', 4, '90m')
+    assert (pods[0].storage_gb, pods[1].storage_gb) == (None, 120)
@@ -0,0 +1,95 @@
+import json
+import pytest
+import pod_monitor
+from utils.policies import PolicyEngine, load_policies
+from utils.records import Pod
+from utils.runpod_pricing import PricingProvider, StaticPriceSource
+
+CONFIG = {'check_interval_seconds': 60, 'notification_threshold_minutes': 60,
+          'notification_cooldown_minutes': 30, 'shutdown_threshold_hours': 10}
+
+RULES = [
+    {'name': 'h100', 'gpu': 'H100*', 'shutdown_after_hours': 1},
+    {'name': 'dev boxes', 'gpu': 'RTX A4000', 'pod_name': 'dev-*', 'shutdown_after_hours': 8,
+     'notify_after_minutes': None},
+    {'name': 'pricey', 'min_hourly_rate': 5, 'notify_after_minutes': 15,
+     'shutdown_after_cost': 20},
+    {'name': 'prod', 'account': 'prod', 'shutdown_after_hours': None},
+]
+
+class StubSource:
+    def __init__(self, pods):
+        self.pods = pods
+
+    def get_pods(self):
+        return self.pods
+
+    def terminate(self, pod_id):
+        return True
+
+    def pod_exists(self, pod_id):
+        return True
+
+def test_first_matching_rule_sets_each_threshold():
+    """Test rules apply per setting in order, and unmatched settings fall back to the config."""
+    accounts = {'prod': dict(CONFIG, notification_cooldown_minutes=5)}
+    engine = PolicyEngine(RULES, CONFIG, accounts)
+    rates = {'H100 SXM': 4.0, 'RTX A4000': 0.5, 'B200': 8.0}
+    pods = [Pod('a', 'H100 SXM', 'RUNNING', name='train'),
+            Pod('b', 'RTX A4000', 'RUNNING', name='dev-alice'),
+            Pod('c', 'RTX A4000', 'RUNNING', name='batch'),
+            Pod('d', 'B200', 'RUNNING'),
+            Pod('e', 'h100 pcie', 'RUNNING', account='prod')]
+    h100, dev, other, b200, prod = engine.evaluate(pods, lambda pod: rates.get(pod.gpu, 4.0))
+
+    assert h100 == (3600, 1800, 3600, 'h100')
+    assert dev == (None, 1800, 8 * 3600, 'dev boxes')
+    assert other == (3600, 1800, 36000, None)
+    # $20 at $8/hour is 2.5 hours, sooner than the configured 10
+    assert b200 == (900, 1800, 2.5 * 3600, 'pricey')
+    assert prod == (3600, 300, 3600, 'h100')
+
+def test_candidates_are_compiled_once_per_gpu():
+    """Test matches are cached per GPU and pod name, and rates are only asked for when needed."""
+    engine = PolicyEngine(RULES[:2], CONFIG)
+    asked = []
+    pods = [Pod(str(i), 'RTX A4000', 'RUNNING', name=f'dev-{i}' if i % 2 else 'job')
+            for i in range(100)]
+    policies = engine.evaluate(pods, lambda pod: asked.append(pod) or 1.0)
+    assert len(engine._candidates) == 1 and len(engine._merged) == 2
+    assert len(engine._name_masks) == 51  # 'job' is shared
+    assert sum(policy.rule == 'dev boxes' for policy in policies) == 50
+    assert asked == []
+
+def test_load_policies(tmp_path):
+    """Test a missing file means no rules, and bad rules are rejected."""
+    path = tmp_path / 'policies.json'
+    assert len(load_policies(str(path), CONFIG)) == 0
+    path.write_text(json.dumps({'rules': RULES}))
+    assert len(load_policies(str(path), CONFIG)) == 4
+    for rule in ({'gpu': 'A40'}, {'gpu': 'A40', 'shutdown_hours': 1},
+                 {'notify_cooldown_minutes': None}, {'shutdown_after_hours': '2'},
+                 {'status': 'EXITED', 'shutdown_after_hours': 1}):
+        path.write_text(json.dumps({'rules': [rule]}))
+        with pytest.raises(ValueError):
+            load_policies(str(path), CONFIG)
+
+def test_run_tick_schedules_policy_deadlines(tmp_path, monkeypatch):
+    """Test a status check sets shutdown timers from the pod's policy."""
+    monkeypatch.chdir(tmp_path)
+    (tmp_path / 'data').mkdir()
+    monkeypatch.setattr(pod_monitor, '_history_store', None)
+    provider = PricingProvider(StaticPriceSource(), str(tmp_path / 'data' / 'pricing.json'))
+    pods = [Pod('a', 'H100 SXM', 'RUNNING', '30m', name='train'),
+            Pod('b', 'RTX A4000', 'RUNNING', '30m', name='dev-bob')]
+    state = pod_monitor.create_monitor(CONFIG, provider, StubSource(pods),
+                                       policies=PolicyEngine(RULES[:2], CONFIG))
+    try:
+        pod_monitor.run_tick(state)
+    finally:
+        state.terminator.shutdown()
+        pod_monitor.get_history_store().close()
+    started = state.timers.due_time('shutdown', 'a') - 3600
+    assert state.timers.due_time('shutdown', 'b') == pytest.approx(started + 8 * 3600, abs=5)
+    assert state.timers.due_time('notify', 'a') == pytest.approx(started + 3600, abs=5)
+    assert ('notify', 'b') not in state.timers
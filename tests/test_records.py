@@ -0,0 +1,45 @@
+import pytest
+from utils.records import HistoryRecord, Pod, PodStatus, parse_status
+
+def test_history_record_round_trip():
+    """Test conversion to and from the pod_history.json layout."""
+    data = {
+        'gpu': 'RTX A4000',
+        'first_seen': '2024-01-01T10:00:00',
+        'start_time': '2024-01-01T10:30:00.250000',
+        'last_seen': '2024-01-01T12:00:00',
+        'total_runtime': 1.5,
+        'total_cost': 0.25,
+        'status': 'RUNNING',
+        'note': 'dev box'
+    }
+    record = HistoryRecord.from_dict(data)
+    assert record.start_time - record.first_seen == 1800.25
+    assert record.status is PodStatus.RUNNING
+    assert record.extra == {'note': 'dev box'}
+    assert record.to_dict() == data
+
+def test_history_record_omits_missing_fields():
+    """Test partial records, like new exited pods, keep their shape."""
+    data = {'gpu': 'A40', 'first_seen': '2024-01-01T10:00:00', 'total_runtime': 0, 'total_cost': 0}
+    assert HistoryRecord.from_dict(data).to_dict() == data
+
+def test_status_enum_and_interning():
+    """Test statuses compare as strings and GPU names are shared."""
+    assert parse_status('EXITED') is PodStatus.EXITED
+    assert parse_status('EXITED') == 'EXITED'
+    assert parse_status('MIGRATING') == 'MIGRATING'
+    
+    first = Pod('a', ''.join(['RTX ', 'A4000']), 'RUNNING')
+    second = Pod('b', ''.join(['RTX ', 'A4', '000']), 'RUNNING')
+    assert first.gpu is second.gpu
+
+def test_pod_mapping_access():
+    """Test pods can still be read like dicts."""
+    pod = Pod('abc', 'A40', 'RUNNING', quantity=2)
+    assert pod['quantity'] == 2
+    assert pod.get('missing', 'default') == 'default'
+    with pytest.raises(KeyError):
+        pod['missing']
+    with pytest.raises(AttributeError):
+        pod.extra_field = 1
@@ -0,0 +1,65 @@
+from benchmarks.fake_api import FakeRunpodApi, api_pod
+from utils.runpod_api import RunpodApiSource
+
+class StubFallback:
+    def get_pods(self):
+        return [{'id': 'fromcli', 'gpu': 'A40', 'status': 'RUNNING', 'runtime': None, 'quantity': 1}]
+
+    def terminate(self, pod_id):
+        return True
+
+def test_get_pods():
+    """Test pods and uptimes come back from one request."""
+    pods = [api_pod('abc123', count=2, uptime_seconds=7200), api_pod('def456', status='EXITED')]
+    with FakeRunpodApi(pods) as api:
+        source = RunpodApiSource('key', url=api.url)
+        result = source.get_pods()
+        source.close()
+    
+    assert [(p['id'], p['gpu'], p['quantity'], p['status']) for p in result] == [
+        ('abc123', 'RTX A4000', 2, 'RUNNING'), ('def456', 'RTX A4000', 1, 'EXITED')]
+    assert result[0]['runtime'] == '120m'
+    assert api.requests == 1
+
+def test_session_reuses_connection():
+    """Test repeated polls reuse one keep-alive connection."""
+    with FakeRunpodApi([api_pod('abc123')]) as api:
+        source = RunpodApiSource('key', url=api.url)
+        for _ in range(5):
+            source.get_pods()
+        source.close()
+    
+    assert api.requests == 5
+    assert api.connections == 1
+
+def test_terminate_many_is_batched():
+    """Test several terminations go out in one mutation."""
+    with FakeRunpodApi() as api:
+        source = RunpodApiSource('key', url=api.url)
+        result = source.terminate_many(['a', 'b', 'c'])
+        source.close()
+    
+    assert result == {'a': True, 'b': True, 'c': True}
+    assert api.terminated == ['a', 'b', 'c']
+    assert api.requests == 1
+
+def test_errors_use_fallback():
+    """Test API errors fall back to the runpodctl source."""
+    with FakeRunpodApi(fail=True) as api:
+        source = RunpodApiSource('key', url=api.url, fallback=StubFallback())
+        assert [p['id'] for p in source.get_pods()] == ['fromcli']
+        assert source.terminate('abc') is True
+        
+        source.fallback = None
+        assert source.get_pods() is None
+        assert source.terminate('abc') is False
+        source.close()
+
+def test_pod_exists():
+    """Test the confirmation query sees terminated pods disappear."""
+    with FakeRunpodApi([api_pod('abc123')]) as api:
+        source = RunpodApiSource('key', url=api.url)
+        assert source.pod_exists('abc123') is True
+        source.terminate('abc123')
+        assert source.pod_exists('abc123') is False
+        source.close()
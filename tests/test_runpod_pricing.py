@@ -1,6 +1,14 @@
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, HTTPServer
 import pytest
 from unittest.mock import patch
-from utils.runpod_pricing import fetch_runpod_pricing
+from utils.ledger import CostLedger
+from utils.metrics import REGISTRY
+from utils.records import Pod
+from utils.runpod_pricing import (fetch_runpod_pricing, PricingProvider, HttpPriceSource,
+                                  StaticPriceSource, default_pricing, price_catalog,
+                                  validate_pricing)
 
 def test_pricing_structure():
     """Test the structure of returned pricing data."""
@@ -39,4 +47,121 @@ def test_pricing_failure_handling():
         # Should return default values on error
         assert pricing['storage']['idle'] == 0.20
         assert pricing['storage']['running'] == 0.10
-        assert isinstance(pricing['gpus'], dict) 
\ No newline at end of file
+        assert isinstance(pricing['gpus'], dict)
+
+
+class PriceServer:
+    """Local stand-in price source that honours If-None-Match."""
+    
+    def __init__(self, pricing):
+        self.pricing = pricing
+        self.etag = '"v1"'
+        self.hits = []
+        server = self
+        
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.headers.get('If-None-Match') == server.etag:
+                    server.hits.append(304)
+                    self.send_response(304)
+                    self.end_headers()
+                    return
+                server.hits.append(200)
+                body = json.dumps(server.pricing).encode()
+                self.send_response(200)
+                self.send_header('ETag', server.etag)
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+            
+            def log_message(self, *args):
+                pass
+        
+        self.httpd = HTTPServer(('127.0.0.1', 0), Handler)
+        self.url = f'http://127.0.0.1:{self.httpd.server_address[1]}/pricing.json'
+        threading.Thread(target=self.httpd.serve_forever, daemon=True).start()
+    
+    def close(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+def test_provider_refreshes_with_conditional_requests(tmp_path):
+    """Test refreshes swap in new tables and reuse the ETag."""
+    server = PriceServer({'gpus': {'RTX A4000': 0.25}, 'storage': {'idle': 0.2, 'running': 0.1}})
+    try:
+        provider = PricingProvider(HttpPriceSource(server.url), str(tmp_path / 'pricing_cache.json'))
+        before = provider.pricing
+        assert provider.refresh()
+        assert provider.pricing['gpus'] == {'RTX A4000': 0.25}
+        assert before['gpus']['RTX A4000'] == 0.17  # Old table is untouched
+        
+        assert not provider.refresh()
+        assert server.hits == [200, 304]
+        
+        server.pricing = {'gpus': {'RTX A4000': 0.30}}
+        server.etag = '"v2"'
+        assert provider.refresh()
+        assert provider.pricing['gpus']['RTX A4000'] == 0.30
+    finally:
+        server.close()
+
+def test_provider_serves_snapshot_on_startup(tmp_path):
+    """Test a fresh snapshot is served immediately without refetching."""
+    cache_path = str(tmp_path / 'pricing_cache.json')
+    server = PriceServer({'gpus': {'A40': 0.5}})
+    try:
+        PricingProvider(HttpPriceSource(server.url), cache_path).refresh()
+        
+        provider = PricingProvider(HttpPriceSource(server.url), cache_path, ttl_seconds=3600).start()
+        assert provider.pricing['gpus'] == {'A40': 0.5}
+        provider.stop()
+        assert server.hits == [200]
+    finally:
+        server.close()
+
+def test_provider_keeps_table_on_bad_refresh(tmp_path):
+    """Test an unreachable or invalid source keeps the current table."""
+    class BrokenSource:
+        def fetch(self, validators=None):
+            return {'gpus': {}}, {}
+    
+    provider = PricingProvider(BrokenSource(), str(tmp_path / 'pricing_cache.json'))
+    assert not provider.refresh()
+    assert provider.pricing['gpus']['RTX A4000'] == 0.17
+
+def test_catalog_resolves_reported_gpu_names(monkeypatch, tmp_path):
+    """Test API and runpodctl spellings find their price, once per name, and misses are reported."""
+    pricing = default_pricing()
+    catalog = price_catalog(pricing)
+    assert price_catalog(pricing) is catalog
+    assert catalog.rate('NVIDIA A100-SXM4-80GB') == 1.89
+    assert catalog.rate('NVIDIA GeForce RTX 4090') == 0.34
+    assert catalog.resolve('NVIDIA H100 80GB HBM3') == 'H100 SXM'
+    assert catalog.resolve('rtx a4000') == 'RTX A4000'
+    
+    monkeypatch.setattr('utils.runpod_pricing.normalize_gpu_name', lambda name: 1 / 0)
+    assert catalog.rate('NVIDIA A100-SXM4-80GB') == 1.89  # Memoized, not normalized again
+    monkeypatch.undo()
+    assert catalog.rate('Mystery GPU') == 0
+    assert catalog.unresolved() == ['Mystery GPU']
+    price_catalog({'gpus': {'A40': 0.4}})  # Another table doesn't hide this one's misses
+    assert 'unpriced_gpu_types{gpu="Mystery GPU"} 1' in REGISTRY.render()
+    provider = PricingProvider(StaticPriceSource(), str(tmp_path / 'pricing_cache.json'))
+    assert provider.refresh()  # Swapping in a new table starts the report afresh
+    assert 'Mystery GPU' not in REGISTRY.render()
+
+def test_tiers_and_aliases_from_the_pricing_table():
+    """Test tier prices apply per account and fall back to the main prices."""
+    pricing = validate_pricing({'gpus': {'A40': 0.4, 'L4': 0.4},
+                                'tiers': {'secure': {'A40': 0.6}, 'spot': {'A40': 0.2}},
+                                'aliases': {'Lovelace 4': 'L4'}})
+    catalog = price_catalog(pricing)
+    assert (catalog.rate('A40', 'secure'), catalog.rate('A40', 'spot')) == (0.6, 0.2)
+    assert catalog.rate('L4', 'secure') == 0.4 and catalog.rate('lovelace-4') == 0.4
+    
+    ledger = CostLedger({'pods': {}}, tier='secure', account_tiers={'batch': 'spot'})
+    assert ledger.hourly_rate(Pod('a', 'A40', 'RUNNING'), pricing) == 0.6
+    assert ledger.hourly_rate(Pod('b', 'A40', 'RUNNING', account='batch'), pricing) == 0.2
+    
+    with pytest.raises(ValueError):
+        validate_pricing({'gpus': {'A40': 0.4}, 'tiers': {'spot': {'A40': -1}}})
@@ -0,0 +1,62 @@
+from utils.scheduler import TickScheduler
+
+class FakeClock:
+    def __init__(self, now=1000.0):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.now += seconds
+
+def make_scheduler(clock, max_interval=300, min_interval=10):
+    return TickScheduler(max_interval, min_interval=min_interval, slack_seconds=1,
+                         clock=clock, sleep=clock.sleep)
+
+def test_ticks_stay_on_grid_regardless_of_tick_duration():
+    """Test slow ticks don't push later ticks back."""
+    clock = FakeClock()
+    scheduler = make_scheduler(clock)
+    starts = []
+    for _ in range(3):
+        scheduler.start_tick()
+        starts.append(clock.now)
+        clock.now += 42  # Time spent in the tick
+        scheduler.sleep()
+    assert starts == [1000, 1300, 1600]
+
+def test_deadline_pulls_wakeup_forward():
+    """Test a pending threshold wakes the loop just after it's crossed."""
+    clock = FakeClock()
+    scheduler = make_scheduler(clock)
+    scheduler.start_tick()
+    scheduler.add_deadline(120)
+    scheduler.add_deadline(None)
+    scheduler.add_deadline(200)
+    assert scheduler.next_wakeup() == 1000 + 120 + 1
+    
+    clock.sleep(scheduler.seconds_until_next())
+    scheduler.start_tick()
+    # Back on the original grid after the early tick
+    assert scheduler.next_wakeup() == 1300
+
+def test_floor_limits_polling_rate():
+    """Test an overdue deadline doesn't cause a busy loop."""
+    clock = FakeClock()
+    scheduler = make_scheduler(clock)
+    scheduler.start_tick()
+    scheduler.add_deadline(0)
+    assert scheduler.seconds_until_next() == 10
+
+def test_lag_and_elapsed():
+    """Test the scheduler reports tick duration and how late a tick started."""
+    clock = FakeClock()
+    scheduler = make_scheduler(clock)
+    scheduler.start_tick()
+    clock.now += 5
+    assert scheduler.elapsed() == 5
+    scheduler.sleep()
+    clock.now += 2  # Woke up late
+    scheduler.start_tick()
+    assert scheduler.lag == 2
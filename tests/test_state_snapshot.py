@@ -0,0 +1,102 @@
+import pickle
+import time
+import zlib
+import pod_monitor
+from utils.records import HistoryRecord
+from utils.runpod_pricing import PricingProvider, StaticPriceSource
+from utils.state_snapshot import (decode_history, encode_history, fingerprint, load_state,
+                                  save_state)
+
+CONFIG = {'check_interval_seconds': 60, 'notification_threshold_minutes': 60,
+          'notification_cooldown_minutes': 60, 'shutdown_threshold_hours': 10}
+
+class StubSource:
+    def terminate(self, pod_id):
+        return True
+
+    def pod_exists(self, pod_id):
+        return True
+
+def make_history():
+    now = time.time()
+    return {'pods': {'a': HistoryRecord('RTX A4000', 'RUNNING', first_seen=now - 60,
+                                        session={'start': now - 60, 'cost': 0.5}),
+                     'b': HistoryRecord('A40', 'EXITED', last_seen=now - 7200, account='prod',
+                                        extra={'note': 'x'})},
+            'daily_costs': {'2024-01-01': 1.5}}
+
+def test_history_round_trip(tmp_path):
+    """Test history survives encoding and a save/load through the binary file."""
+    path = str(tmp_path / 'state.bin')
+    history = make_history()
+    save_state(path, {'history': encode_history(history), 'timers': [('notify', 'a', 1.0)]})
+    state = load_state(path)
+    assert decode_history(state['history']) == history
+    assert state['timers'] == [('notify', 'a', 1.0)]
+
+def test_damaged_or_foreign_snapshots_are_ignored(tmp_path):
+    """Test truncated, corrupted and code-carrying snapshots load as None."""
+    path = str(tmp_path / 'state.bin')
+    assert load_state(path) is None
+    save_state(path, {'timers': list(range(100))})
+    data = (tmp_path / 'state.bin').read_bytes()
+    (tmp_path / 'state.bin').write_bytes(data[:-5])
+    assert load_state(path) is None
+    (tmp_path / 'state.bin').write_bytes(data[:-1] + bytes([data[-1] ^ 1]))
+    assert load_state(path) is None
+
+    # Valid header and checksum, but the payload would build an object
+    payload = pickle.dumps(HistoryRecord('A40'))
+    header = data[:6] + zlib.crc32(payload).to_bytes(4, 'little') + \
+        len(payload).to_bytes(8, 'little')
+    (tmp_path / 'state.bin').write_bytes(header + payload)
+    assert load_state(path) is None
+
+def test_warm_restart_restores_timers_and_history(tmp_path, monkeypatch):
+    """Test a restart keeps cooldowns and reuses history only while its files are unchanged."""
+    monkeypatch.chdir(tmp_path)
+    (tmp_path / 'data').mkdir()
+    provider = PricingProvider(StaticPriceSource(), str(tmp_path / 'data' / 'pricing.json'))
+    monkeypatch.setattr(pod_monitor, '_history_store', None)
+
+    state = pod_monitor.create_monitor(CONFIG, provider, StubSource(), pod_monitor.STATE_PATH)
+    assert not state.warm
+    state.history['pods'].update(make_history()['pods'])
+    state.timers.schedule('notify', 'a', time.time() + 1800)
+    state.budget_alerts['prod'] = '2024-01-01'
+    pod_monitor.save_history(state.history)
+    pod_monitor.get_history_store().close()
+    pod_monitor.save_monitor_state(state)
+    state.terminator.shutdown()
+
+    def restart():
+        monkeypatch.setattr(pod_monitor, '_history_store', None)
+        load_history = []
+        monkeypatch.setattr(pod_monitor, 'load_history',
+                            lambda: load_history.append(1) or pod_monitor.get_history_store().load())
+        restarted = pod_monitor.create_monitor(CONFIG, provider, StubSource(),
+                                               pod_monitor.STATE_PATH)
+        restarted.terminator.shutdown()
+        pod_monitor.get_history_store().close()
+        return restarted, bool(load_history)
+
+    restarted, loaded = restart()
+    assert restarted.warm and not loaded
+    assert restarted.history['pods'] == state.history['pods']
+    assert restarted.timers.due_time('notify', 'a') == state.timers.due_time('notify', 'a')
+    assert restarted.budget_alerts == {'prod': '2024-01-01'}
+
+    # Once history is written after the snapshot, it comes from the store again
+    with open(pod_monitor.history_files()[1], 'a') as f:
+        f.write('\n')
+    restarted, loaded = restart()
+    assert restarted.warm and loaded
+    assert sorted(restarted.history['pods']) == ['a', 'b']
+
+def test_fingerprint_tracks_missing_files(tmp_path):
+    """Test a file appearing changes the fingerprint."""
+    path = tmp_path / 'f'
+    before = fingerprint([str(path)])
+    assert before == [None]
+    path.write_text('x')
+    assert fingerprint([str(path)]) != before
@@ -0,0 +1,147 @@
+import threading
+import time
+from utils.termination import TerminationExecutor
+
+def wait_for_results(executor, count, timeout=5):
+    results = []
+    deadline = time.monotonic() + timeout
+    while len(results) < count and time.monotonic() < deadline:
+        results += executor.drain_results()
+        time.sleep(0.01)
+    return results
+
+def test_kills_run_concurrently():
+    """Test several kills run in parallel without blocking submit."""
+    def slow_terminate(pod_id):
+        time.sleep(0.3)
+        return True
+    
+    executor = TerminationExecutor(slow_terminate, max_workers=4)
+    start = time.monotonic()
+    for i in range(4):
+        assert executor.submit(f'pod{i}', {'cost': i})
+    assert time.monotonic() - start < 0.1
+    
+    results = wait_for_results(executor, 4)
+    assert time.monotonic() - start < 0.3 * 4
+    assert sorted(r.pod_id for r in results) == ['pod0', 'pod1', 'pod2', 'pod3']
+    assert all(r.success and r.attempts == 1 for r in results)
+    executor.shutdown()
+
+def test_duplicate_submissions_are_ignored():
+    """Test a pod can't be killed twice."""
+    release = threading.Event()
+    calls = []
+    
+    def terminate(pod_id):
+        calls.append(pod_id)
+        release.wait()
+        return True
+    
+    executor = TerminationExecutor(terminate)
+    assert executor.submit('abc')
+    assert not executor.submit('abc')
+    assert executor.is_pending('abc')
+    release.set()
+    wait_for_results(executor, 1)
+    assert not executor.submit('abc')
+    executor.shutdown()
+    assert calls == ['abc']
+
+def test_retries_with_backoff_until_confirmed():
+    """Test failed calls and unconfirmed kills are retried."""
+    attempts = []
+    listed = [True]
+    
+    def terminate(pod_id):
+        attempts.append(time.monotonic())
+        if len(attempts) == 1:
+            raise Exception("network error")
+        if len(attempts) == 3:
+            listed[0] = False
+        return True
+    
+    executor = TerminationExecutor(terminate, pod_exists=lambda pod_id: listed[0],
+                                   backoff_seconds=0.05, confirm_attempts=1)
+    executor.submit('abc')
+    result, = wait_for_results(executor, 1)
+    assert result.success
+    assert result.attempts == 3
+    assert attempts[2] - attempts[1] >= attempts[1] - attempts[0]
+    executor.shutdown()
+
+def test_gives_up_after_max_attempts():
+    """Test a pod that can't be killed is reported and can be resubmitted."""
+    executor = TerminationExecutor(lambda pod_id: False, max_attempts=2, backoff_seconds=0.01)
+    executor.submit('abc')
+    result, = wait_for_results(executor, 1)
+    assert not result.success
+    assert result.attempts == 2
+    assert result.error == 'terminate call failed'
+    assert executor.submit('abc')
+    executor.shutdown()
+
+def test_kills_submitted_together_are_batched():
+    """Test kills held until flush go out in one batched call, then retry per pod."""
+    batches = []
+    singles = []
+
+    def terminate_many(pod_ids):
+        batches.append(list(pod_ids))
+        return {pod_id: pod_id != 'b' for pod_id in pod_ids}
+
+    def terminate(pod_id):
+        singles.append(pod_id)
+        return True
+
+    executor = TerminationExecutor(terminate, terminate_many=terminate_many,
+                                   backoff_seconds=0.01)
+    for pod_id in 'abc':
+        assert executor.submit(pod_id)
+    assert not executor.submit('a')
+    assert wait_for_results(executor, 1, timeout=0.1) == []
+    executor.flush()
+    results = wait_for_results(executor, 3)
+    assert batches == [['a', 'b', 'c']]
+    assert singles == ['b']
+    assert {r.pod_id: r.attempts for r in results} == {'a': 1, 'b': 2, 'c': 1}
+    assert all(r.success for r in results)
+    executor.shutdown()
+
+def test_batched_kills_are_recorded_on_shutdown():
+    """Test kills batched by shutdown's flush report their outcome."""
+    batches = []
+
+    def terminate_many(pod_ids):
+        batches.append(list(pod_ids))
+        return {pod_id: True for pod_id in pod_ids}
+
+    executor = TerminationExecutor(lambda pod_id: False, terminate_many=terminate_many)
+    executor.submit('a')
+    executor.submit('b')
+    executor.shutdown()
+    results = executor.drain_results()
+    assert batches == [['a', 'b']]
+    assert sorted((r.pod_id, r.success, r.attempts) for r in results) == \
+        [('a', True, 1), ('b', True, 1)]
+
+def test_shutdown_cuts_confirmation_short_and_listing_prunes():
+    """Test shutdown doesn't wait out confirmation polls, and gone pods are forgotten."""
+    called = threading.Event()
+
+    def pod_exists(pod_id):
+        called.set()
+        return True
+
+    executor = TerminationExecutor(lambda pod_id: True, pod_exists=pod_exists,
+                                   confirm_attempts=3, confirm_interval_seconds=30)
+    executor.submit('abc')
+    called.wait(5)
+    start = time.monotonic()
+    executor.shutdown()
+    assert time.monotonic() - start < 2
+    result, = executor.drain_results()
+    assert result.success and result.attempts == 1
+    assert not executor.submit('abc')
+    executor.retain({'other'})
+    assert executor._terminated == set()
@@ -0,0 +1,63 @@
+from utils.timers import TimerIndex
+
+def test_pop_due_in_order():
+    """Test only due timers are popped, earliest first."""
+    timers = TimerIndex()
+    timers.schedule('notify', 'a', 30)
+    timers.schedule('shutdown', 'a', 10)
+    timers.schedule('reminder', 'b', 100)
+    
+    assert timers.next_due() == 10
+    assert timers.pop_due(50) == [('shutdown', 'a', 10), ('notify', 'a', 30)]
+    assert timers.pop_due(50) == []
+    assert len(timers) == 1
+    assert timers.next_due() == 100
+
+def test_reschedule_replaces_timer():
+    """Test rescheduling keeps one timer per pod and kind."""
+    timers = TimerIndex()
+    timers.schedule('shutdown', 'a', 100)
+    assert not timers.schedule('shutdown', 'a', 110, tolerance=30)
+    assert timers.schedule('shutdown', 'a', 50)
+    
+    assert timers.due_time('shutdown', 'a') == 50
+    assert timers.pop_due(200) == [('shutdown', 'a', 50)]
+
+def test_pop_due_by_kind():
+    """Test due timers of other kinds stay scheduled."""
+    timers = TimerIndex()
+    timers.schedule('notify', 'a', 10)
+    timers.schedule('reminder', 'b', 20)
+    
+    assert timers.pop_due(50, ('reminder',)) == [('reminder', 'b', 20)]
+    assert ('notify', 'a') in timers
+    assert timers.pop_due(50) == [('notify', 'a', 10)]
+
+def test_retain_removes_disappeared_pods():
+    """Test timers for pods that are gone are dropped from the index."""
+    timers = TimerIndex()
+    for pod_id in ('a', 'b', 'c'):
+        timers.schedule('notify', pod_id, 10)
+        timers.schedule('reminder', pod_id, 10)
+    
+    assert timers.retain(('notify',), {'a'}) == 2
+    assert sorted(timers.items()) == [('notify', 'a', 10), ('reminder', 'a', 10),
+                                      ('reminder', 'b', 10), ('reminder', 'c', 10)]
+
+def test_dead_entries_are_compacted():
+    """Test frequent rescheduling doesn't grow the heap without bound."""
+    timers = TimerIndex()
+    for i in range(1000):
+        timers.schedule('shutdown', 'a', i)
+    assert len(timers) == 1
+    assert len(timers._heap) < 100
+
+def test_load_matches_schedule():
+    """Test bulk-loaded timers behave like individually scheduled ones."""
+    timers = TimerIndex()
+    timers.schedule('notify', 'a', 5)
+    timers.load([('reminder', 'b', 20), ('notify', 'a', 30), ('shutdown', 'c', 10)])
+    assert len(timers) == 3
+    assert timers.due_time('notify', 'a') == 30
+    assert timers.pop_due(25) == [('shutdown', 'c', 10), ('reminder', 'b', 20)]
+    assert timers.next_due() == 30
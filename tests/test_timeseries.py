@@ -0,0 +1,65 @@
+from utils.timeseries import TimeSeriesStore
+
+def test_ring_keeps_newest_samples():
+    """Test the raw ring overwrites the oldest samples when full."""
+    store = TimeSeriesStore(raw_capacity=5)
+    for ts in range(10):
+        store.add('burn_rate', ts, ts * 2)
+    assert store.range('burn_rate', resolution='raw') == [(t, t * 2) for t in range(5, 10)]
+    assert store.range('burn_rate', 7, 8) == [(7, 14), (8, 16)]
+    assert store.latest('burn_rate') == (9, 18)
+
+def test_rollups_and_aggregates():
+    """Test samples are downsampled into minute buckets."""
+    store = TimeSeriesStore(raw_capacity=3)
+    for ts, value in [(0, 1), (30, 3), (60, 10), (90, 20), (120, 5)]:
+        store.add('pods.running', ts, value)
+    assert store.range('pods.running', resolution='1m') == [(0, 2), (60, 15), (120, 5)]
+    assert store.range('pods.running', resolution='1m', field='max') == [(0, 3), (60, 20), (120, 5)]
+    # Raw samples only reach back to 60s, so older ranges are served from rollups
+    assert store.aggregate('pods.running', start=0, fn='max') == 20
+    assert store.aggregate('pods.running', start=0, fn='count') == 5
+    assert store.aggregate('pods.running', start=60, fn='mean') == 35 / 3
+    assert store.aggregate('missing') is None
+
+def test_memory_limit_drops_stale_series():
+    """Test the least recently updated series are dropped first."""
+    store = TimeSeriesStore(max_bytes=20000, raw_capacity=100, rollup_capacities={'1m': 10})
+    for ts in range(20):
+        store.add('burn_rate', ts * 60, 1)
+        store.add(f'cost.pod.{ts}', ts * 60, 1)
+    assert store.nbytes <= 20000
+    assert 'burn_rate' in store
+    assert 'cost.pod.19' in store
+    assert 'cost.pod.0' not in store
+
+def test_save_and_load(tmp_path):
+    """Test series survive a round trip through the binary file."""
+    path = str(tmp_path / 'timeseries.bin')
+    store = TimeSeriesStore(raw_capacity=4)
+    for ts in range(0, 600, 50):
+        store.add('cost.gpu.A40', ts, ts / 10)
+    store.save(path)
+    
+    loaded = TimeSeriesStore(raw_capacity=4)
+    loaded.load(path)
+    for resolution in ('raw', '1m', '1h', '1d'):
+        assert loaded.range('cost.gpu.A40', resolution=resolution) == \
+            store.range('cost.gpu.A40', resolution=resolution)
+    assert loaded.nbytes == store.nbytes
+    loaded.add('cost.gpu.A40', 600, 60)
+    assert loaded.latest('cost.gpu.A40') == (600, 60)
+
+def test_memory_limit_keeps_series_of_listed_pods():
+    """Test series still being sampled are kept over the limit, and gone ones are dropped."""
+    store = TimeSeriesStore(max_bytes=20000, raw_capacity=100, rollup_capacities={'1m': 10})
+    for ts in range(0, 600, 60):
+        for i in range(10):
+            store.add(f'cost.pod.{i}', ts, i)
+    assert len(store) == 10 and store.nbytes > 20000
+    assert store.range('cost.pod.0', resolution='raw')[0] == (0, 0)  # Never rebuilt
+    for ts in range(600, 780, 60):
+        for i in range(5):
+            store.add(f'cost.pod.{i}', ts, i)
+    assert all(f'cost.pod.{i}' in store for i in range(5))
+    assert 'cost.pod.5' not in store and store.nbytes <= 20000
@@ -0,0 +1,45 @@
+import json
+import threading
+from utils.tracing import Tracer, TickProfiler
+
+def test_disabled_tracer_records_nothing():
+    """Test spans are no-ops while tracing is off."""
+    tracer = Tracer()
+    with tracer.span('parse'):
+        pass
+    assert tracer.stage_totals() == {}
+
+def test_spans_export_as_chrome_trace(tmp_path):
+    """Test spans from several threads end up in the trace with thread names."""
+    tracer = Tracer(enabled=True)
+    with tracer.span('tick'):
+        with tracer.span('parse', pods=3):
+            pass
+    worker = threading.Thread(target=lambda: tracer.span('notify').__enter__().__exit__(),
+                              name='notifications')
+    worker.start()
+    worker.join()
+    
+    path = tmp_path / 'trace.json'
+    tracer.export(str(path))
+    events = json.loads(path.read_text())['traceEvents']
+    spans = {event['name']: event for event in events if event['ph'] == 'X'}
+    assert set(spans) == {'tick', 'parse', 'notify'}
+    assert spans['parse']['args'] == {'pods': 3}
+    assert spans['tick']['dur'] >= spans['parse']['dur']
+    assert {'name': 'notifications'} in [event['args'] for event in events if event['ph'] == 'M']
+    assert tracer.stage_totals()['parse'][0] == 1
+
+def test_profiler_writes_report_after_n_ticks(tmp_path):
+    """Test profiling stops and reports after the requested number of ticks."""
+    tracer = Tracer()
+    profiler = TickProfiler(2, str(tmp_path), tracer)
+    for _ in range(3):
+        with profiler.tick(), tracer.span('tick'):
+            sum(range(1000))
+    assert not profiler.active
+    assert not tracer.enabled
+    summary = (tmp_path / 'profile_summary.txt').read_text()
+    assert 'Profiled 2 ticks' in summary
+    assert 'tick ' in summary
+    assert (tmp_path / 'profile.pstats').exists()
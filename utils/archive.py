@@ -0,0 +1,98 @@
+import gzip
+import json
+import logging
+import os
+import re
+from collections import OrderedDict
+from datetime import datetime
+
+from utils.records import HistoryRecord
+
+_SEGMENT = re.compile(r'^pods-(\d{4}-\d{2})\.jsonl\.gz$')
+
+
+class HistoryArchive:
+    """Pods evicted from the working history, in compressed monthly segments.
+
+    A pod goes into the segment for the month it was last seen,
+    `pods-YYYY-MM.jsonl.gz`, as one JSON line. Archiving appends a new
+    gzip member to the segment, so segments are never rewritten. Nothing
+    is read until a query needs it; then only the segments involved are
+    loaded, and the last `cache_segments` of them are kept in memory.
+    """
+
+    def __init__(self, directory, cache_segments=2):
+        self.directory = directory
+        self.cache_segments = cache_segments
+        self._cache = OrderedDict()
+
+    def archive(self, records):
+        """Append {pod_id: HistoryRecord} to the segments of their months."""
+        by_month = {}
+        for pod_id, record in records.items():
+            by_month.setdefault(segment_month(record), []).append((pod_id, record))
+        os.makedirs(self.directory, exist_ok=True)
+        for month, entries in by_month.items():
+            lines = ''.join(json.dumps({'id': pod_id, 'pod': record.to_dict()},
+                                       separators=(',', ':')) + '\n'
+                            for pod_id, record in entries)
+            with open(self._path(month), 'ab') as f:
+                f.write(gzip.compress(lines.encode('utf-8')))
+                f.flush()
+                os.fsync(f.fileno())
+            self._cache.pop(month, None)
+        return len(records)
+
+    def months(self):
+        """Return the months that have a segment, oldest first."""
+        try:
+            names = os.listdir(self.directory)
+        except FileNotFoundError:
+            return []
+        return sorted(match.group(1) for match in map(_SEGMENT.match, names) if match)
+
+    def segment(self, month):
+        """Return {pod_id: HistoryRecord} for the pods archived under `month`."""
+        pods = self._cache.get(month)
+        if pods is not None:
+            self._cache.move_to_end(month)
+            return pods
+        pods = {}
+        try:
+            with gzip.open(self._path(month), 'rt') as f:
+                for line in f:
+                    entry = json.loads(line)
+                    pods[entry['id']] = HistoryRecord.from_dict(entry['pod'])
+        except FileNotFoundError:
+            pass
+        except (OSError, EOFError, ValueError) as e:
+            # A crash mid-append can leave a damaged last member; keep what was read
+            logging.warning(f"History archive segment {month} is damaged: {e}")
+        self._cache[month] = pods
+        while len(self._cache) > self.cache_segments:
+            self._cache.popitem(last=False)
+        return pods
+
+    def find(self, pod_id):
+        """Return the archived record of a pod, searching the newest segments first."""
+        for month in reversed(self.months()):
+            record = self.segment(month).get(pod_id)
+            if record is not None:
+                return record
+        return None
+
+    def _path(self, month):
+        return os.path.join(self.directory, f'pods-{month}.jsonl.gz')
+
+
+def segment_month(record):
+    """Return the 'YYYY-MM' segment a record is archived under."""
+    ts = record.last_seen or record.first_seen or 0
+    return datetime.fromtimestamp(ts).strftime('%Y-%m')
+
+
+def expired_pods(history, listed_ids, cutoff):
+    """Return {pod_id: record} for pods not listed any more and last seen before `cutoff`."""
+    return {pod_id: record for pod_id, record in history['pods'].items()
+            if pod_id not in listed_ids and record.session is None
+            and (record.last_seen or record.first_seen or 0) < cutoff}
@@ -0,0 +1,181 @@
+import json
+import logging
+import threading
+from collections import deque
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+SECTIONS = ('status', 'pods', 'deadlines', 'ledger')
+
+
+class MonitorView:
+    """The latest snapshot of monitor state, shared with the control server.
+
+    The main loop publishes plain data once per check; request threads only
+    read published snapshots, so they never see a check half done and never
+    touch the disk. Each section is encoded to JSON at most once per
+    snapshot. Publishing also compares pod statuses with the previous
+    snapshot and appends an event per change for subscribers.
+    """
+
+    def __init__(self, max_events=1000):
+        self._snapshot = {section: None for section in SECTIONS}
+        self._encoded = {}
+        self._statuses = {}
+        self._events = deque(maxlen=max_events)
+        self._seq = 0
+        self._closed = False
+        self._lock = threading.Lock()
+        self._changed = threading.Condition(self._lock)
+
+    def publish(self, snapshot, now):
+        """Replace the snapshot. `snapshot['pods']` maps pod id to a dict with a 'status'."""
+        statuses = {pod_id: pod['status'] for pod_id, pod in snapshot['pods'].items()}
+        events = []
+        for pod_id, status in statuses.items():
+            old = self._statuses.get(pod_id)
+            if old != status:
+                events.append(self._event(now, snapshot['pods'][pod_id], old, status))
+        for pod_id in self._statuses.keys() - statuses.keys():
+            previous = self._snapshot['pods'][pod_id]
+            events.append(self._event(now, previous, self._statuses[pod_id], None))
+        with self._lock:
+            self._snapshot = snapshot
+            self._encoded = {}
+            self._statuses = statuses
+            for event in events:
+                self._seq += 1
+                event['seq'] = self._seq
+                self._events.append(event)
+            self._changed.notify_all()
+
+    @staticmethod
+    def _event(now, pod, old, new):
+        return {'time': now, 'pod_id': pod['id'], 'account': pod.get('account'),
+                'gpu': pod.get('gpu'), 'old_status': old, 'new_status': new}
+
+    def encoded(self, section):
+        """Return a section as JSON bytes."""
+        with self._lock:
+            body = self._encoded.get(section)
+            if body is None:
+                data = self._snapshot[section]
+                if section == 'pods' and data is not None:
+                    data = list(data.values())
+                body = self._encoded[section] = json.dumps(data).encode('utf-8')
+            return body
+
+    def pod(self, pod_id):
+        """Return one pod as JSON bytes, or None if it isn't in the last listing."""
+        with self._lock:
+            pod = (self._snapshot['pods'] or {}).get(pod_id)
+        return json.dumps(pod).encode('utf-8') if pod is not None else None
+
+    def events_after(self, seq, timeout=None):
+        """Return events newer than `seq`, waiting up to `timeout` seconds for one."""
+        with self._changed:
+            # A client ahead of us saw events from before the monitor restarted;
+            # treat it as up to date, so the events it gets carry on from ours
+            seq = min(seq, self._seq)
+            if seq >= self._seq and not self._closed:
+                self._changed.wait(timeout)
+            return [event for event in self._events if event['seq'] > seq]
+
+    @property
+    def last_seq(self):
+        return self._seq
+
+    @property
+    def closed(self):
+        return self._closed
+
+    def close(self):
+        """Wake up subscribers so their streams end."""
+        with self._changed:
+            self._closed = True
+            self._changed.notify_all()
+
+
+class ControlServer:
+    """Serves a MonitorView as JSON over HTTP on localhost, from background threads.
+
+    GET /status, /pods, /pods/<id>, /deadlines and /ledger return the last
+    snapshot. GET /events streams status changes as JSON lines; pass
+    `?since=<seq>` to resume after the last event seen, otherwise only new
+    events are sent.
+    """
+
+    def __init__(self, view, host='127.0.0.1', port=9109, heartbeat_seconds=15):
+        view_ref = view
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'  # Lets /events use chunked encoding
+            disable_nagle_algorithm = True  # Headers and body are separate writes
+
+            def do_GET(self):
+                url = urlsplit(self.path)
+                parts = [part for part in url.path.split('/') if part]
+                if len(parts) == 1 and parts[0] in SECTIONS:
+                    self._send_json(view_ref.encoded(parts[0]))
+                elif len(parts) == 2 and parts[0] == 'pods':
+                    body = view_ref.pod(parts[1])
+                    if body is None:
+                        self.send_error(404, f"Pod {parts[1]} is not in the last listing")
+                    else:
+                        self._send_json(body)
+                elif parts == ['events']:
+                    since = parse_qs(url.query).get('since')
+                    self._stream_events(int(since[0]) if since else view_ref.last_seq)
+                else:
+                    self.send_error(404)
+
+            def _send_json(self, body):
+                self.send_response(200)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def _stream_events(self, since):
+                self.send_response(200)
+                self.send_header('Content-Type', 'application/x-ndjson')
+                self.send_header('Transfer-Encoding', 'chunked')
+                self.end_headers()
+                try:
+                    while not view_ref.closed:
+                        events = view_ref.events_after(since, heartbeat_seconds)
+                        if events:
+                            since = events[-1]['seq']
+                        # An empty line doubles as a heartbeat that detects closed clients
+                        body = ''.join(json.dumps(event) + '\n' for event in events) or '\n'
+                        self._write_chunk(body.encode('utf-8'))
+                    self._write_chunk(b'')
+                except (BrokenPipeError, ConnectionResetError):
+                    pass
+                self.close_connection = True
+
+            def _write_chunk(self, data):
+                self.wfile.write(b'%x\r\n%s\r\n' % (len(data), data))
+                self.wfile.flush()
+
+            def log_message(self, format, *args):
+                logging.debug(f"Control request: {format % args}")
+
+        self.view = view
+        self.server = ThreadingHTTPServer((host, port), Handler)
+        self.server.daemon_threads = True
+        self._thread = threading.Thread(target=self.server.serve_forever, name='control',
+                                        daemon=True)
+
+    @property
+    def port(self):
+        return self.server.server_address[1]
+
+    def start(self):
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.view.close()
+        self.server.shutdown()
+        self.server.server_close()
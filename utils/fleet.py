@@ -0,0 +1,133 @@
+import logging
+from concurrent.futures import ThreadPoolExecutor, wait
+
+from utils.metrics import REGISTRY
+
+# Settings an account entry can override; everything else comes from the main config
+ACCOUNT_SETTINGS = ('notification_threshold_minutes', 'notification_cooldown_minutes',
+                    'shutdown_threshold_hours', 'daily_budget', 'pricing_tier')
+
+ACCOUNT_POLLS = REGISTRY.counter('account_polls', 'Fleet account listings by outcome',
+                                 ['account', 'result'])
+
+
+def account_configs(config):
+    """Return {account name: config} with each account's overrides applied.
+
+    Accounts are listed in config['accounts'] as dicts with a `name`, their
+    `runpod_api_key` and optionally any of ACCOUNT_SETTINGS. Budgets are
+    not inherited: the fleet-wide ones apply to all accounts together."""
+    configs = {}
+    for account in config.get('accounts') or []:
+        merged = {key: value for key, value in config.items()
+                  if key not in ('daily_budget', 'monthly_budget')}
+        merged.update({key: account[key] for key in ACCOUNT_SETTINGS if key in account})
+        configs[account['name']] = merged
+    return configs
+
+
+class FleetSource:
+    """Pod source that merges the listings of several RunPod accounts.
+
+    Every account is polled in parallel on a worker pool and its pods are
+    tagged with the account name. Each `get_pods` waits at most `timeout`
+    seconds: an account that is slower than that, or whose poll fails,
+    contributes its last good listing instead, and a slow poll is left to
+    finish in the background rather than being started again. Terminations
+    and existence checks go to the account that listed the pod.
+    """
+
+    def __init__(self, sources, max_workers=None, timeout=10):
+        self.sources = sources
+        self.timeout = timeout
+        self._executor = ThreadPoolExecutor(max_workers=max_workers or max(1, len(sources)),
+                                            thread_name_prefix='fleet')
+        self._pending = {}
+        self._listings = {}
+        self._owners = {}
+        self.stale = set()  # Accounts whose pods in the last listing are from an earlier poll
+
+    def get_pods(self):
+        """Return the pods of every account, as of the latest poll that finished."""
+        for name, source in self.sources.items():
+            if name not in self._pending:
+                self._pending[name] = self._executor.submit(_list_pods, source)
+        wait(list(self._pending.values()), timeout=self.timeout)
+
+        self.stale = set()
+        for name in self.sources:
+            future = self._pending[name]
+            if not future.done():
+                logging.warning(f"Account {name} did not answer within {self.timeout}s; "
+                                f"using its previous listing")
+                ACCOUNT_POLLS.labels(name, 'slow').inc()
+                self.stale.add(name)
+                continue
+            del self._pending[name]
+            try:
+                pods = future.result()
+            except Exception as e:
+                logging.error(f"Error getting pods for account {name}: {e}")
+                ACCOUNT_POLLS.labels(name, 'failed').inc()
+                self.stale.add(name)
+                continue
+            for pod in pods:
+                pod.account = name
+            self._listings[name] = pods
+            ACCOUNT_POLLS.labels(name, 'ok').inc()
+
+        if not self._listings:
+            return None  # No account has answered yet
+        pods = [pod for listing in self._listings.values() for pod in listing]
+        self._owners = {pod.id: pod.account for pod in pods}
+        return pods
+
+    def terminate(self, pod_id):
+        """Terminate a pod through the account that owns it."""
+        source = self._source_for(pod_id)
+        if source is None:
+            logging.error(f"Can't terminate pod {pod_id}: no account lists it")
+            return False
+        return source.terminate(pod_id)
+
+    def terminate_many(self, pod_ids):
+        """Terminate pods with one call per owning account. Returns {pod_id: success}."""
+        by_source = {}
+        results = {}
+        for pod_id in pod_ids:
+            source = self._source_for(pod_id)
+            if source is None:
+                logging.error(f"Can't terminate pod {pod_id}: no account lists it")
+                results[pod_id] = False
+            else:
+                by_source.setdefault(id(source), (source, []))[1].append(pod_id)
+        for source, ids in by_source.values():
+            if hasattr(source, 'terminate_many'):
+                results.update(source.terminate_many(ids))
+            else:
+                results.update({pod_id: source.terminate(pod_id) for pod_id in ids})
+        return results
+
+    def pod_exists(self, pod_id):
+        """Return whether the owning account still lists the pod, or None if unknown."""
+        source = self._source_for(pod_id)
+        return source.pod_exists(pod_id) if source is not None else None
+
+    def close(self):
+        self._executor.shutdown(wait=False, cancel_futures=True)
+        for source in self.sources.values():
+            source.close()
+
+    def _source_for(self, pod_id):
+        return self.sources.get(self._owners.get(pod_id))
+
+
+def _list_pods(source):
+    # Sources that can raise let a failed poll be told apart from an empty account
+    list_pods = getattr(source, 'list_pods', None)
+    if list_pods is not None:
+        return list_pods()
+    pods = source.get_pods()
+    if pods is None:
+        raise RuntimeError("listing failed")
+    return pods
@@ -0,0 +1,73 @@
+import math
+from array import array
+from datetime import datetime, timedelta
+
+DEFAULT_HORIZONS_HOURS = (24, 24 * 7, 24 * 30)
+
+
+class SpendForecast:
+    """Projects spend from the current hourly rate of every listed pod.
+
+    `update` puts the rate of each pod into one flat array('d'), so the
+    fleet's burn rate is a single sum and projections over any number of
+    horizons come from it directly. For budget shutdowns the array is
+    ranked to pick the most expensive pods first.
+    """
+
+    def __init__(self, horizons_hours=DEFAULT_HORIZONS_HOURS):
+        self.horizons_hours = tuple(horizons_hours)
+        self.pods = []
+        self.rates = array('d')
+        self.total_rate = 0.0
+
+    def update(self, pods, rate):
+        """Record `rate(pod)` ($/hour) for every pod in this listing."""
+        self.pods = pods
+        self.rates = array('d', map(rate, pods))
+        self.total_rate = math.fsum(self.rates)
+
+    def project(self, spent=0.0):
+        """Return {horizon hours: projected spend} at the current rates."""
+        return {hours: spent + self.total_rate * hours for hours in self.horizons_hours}
+
+    def projected(self, spent, hours_left):
+        """Return the spend projected by the end of a period with `hours_left` to go."""
+        return spent + self.total_rate * hours_left
+
+    def shutdown_order(self, excess, hours_left, eligible):
+        """Return pods to stop, most expensive first, to save `excess` dollars.
+
+        Only pods for which `eligible(pod)` is true are picked. If stopping
+        all of them isn't enough, all of them are returned."""
+        chosen = []
+        saved = 0.0
+        rates = self.rates
+        for i in sorted(range(len(rates)), key=rates.__getitem__, reverse=True):
+            if saved >= excess or rates[i] <= 0:
+                break
+            pod = self.pods[i]
+            if eligible(pod):
+                chosen.append(pod)
+                saved += rates[i] * hours_left
+        return chosen
+
+
+def hours_until_day_end(now):
+    """Hours from `now` (epoch seconds) to the next local midnight."""
+    current = datetime.fromtimestamp(now)
+    midnight = datetime.combine(current.date() + timedelta(days=1), datetime.min.time())
+    return (midnight.timestamp() - now) / 3600
+
+
+def hours_until_month_end(now):
+    """Hours from `now` (epoch seconds) to the start of the next local month."""
+    current = datetime.fromtimestamp(now)
+    year, month = (current.year + 1, 1) if current.month == 12 else (current.year, current.month + 1)
+    return (datetime(year, month, 1).timestamp() - now) / 3600
+
+
+def format_horizon(hours):
+    """Render a horizon like '24h' as '1d' when it is a whole number of days."""
+    if hours >= 24 and hours % 24 == 0:
+        return f"{hours // 24:g}d"
+    return f"{hours:g}h"
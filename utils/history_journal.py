@@ -0,0 +1,210 @@
+import json
+import logging
+import os
+import threading
+import time
+
+from utils.records import HistoryRecord
+
+
+class HistoryJournal:
+    """Pod history stored as a JSON snapshot plus an append-only journal.
+
+    Each save appends one compact line per pod that changed since the last
+    save. Once the journal grows past `compact_every` records (or
+    `snapshot_interval_seconds` have passed) it is rotated and a fresh
+    snapshot is written in a background thread using an atomic rename.
+    Loading replays the rotated and current journals on top of the snapshot.
+    """
+
+    def __init__(self, snapshot_path, compact_every=500, snapshot_interval_seconds=3600):
+        self.snapshot_path = snapshot_path
+        self.journal_path = os.path.splitext(snapshot_path)[0] + '.journal'
+        self.rotated_path = self.journal_path + '.1'
+        self.compact_every = compact_every
+        self.snapshot_interval_seconds = snapshot_interval_seconds
+        self._persisted = {}
+        self._meta = {}
+        self._journal = None
+        self._records = 0
+        self._last_snapshot = time.monotonic()
+        self._compactor = None
+
+    def load(self):
+        """Load the snapshot and replay any journal records on top of it."""
+        history = {'pods': {}}
+        snapshot_found = True
+        try:
+            with open(self.snapshot_path, 'r') as f:
+                history = json.load(f)
+            history['pods'] = {pod_id: HistoryRecord.from_dict(record)
+                               for pod_id, record in history.get('pods', {}).items()}
+        except FileNotFoundError:
+            snapshot_found = False
+        except json.JSONDecodeError:  # Handle corrupted file
+            print("Warning: History file corrupted, rebuilding from journal")
+            logging.error(f"History snapshot {self.snapshot_path} is corrupted")
+
+        self._replay(self.rotated_path, history)
+        self._records = self._replay(self.journal_path, history)
+        self.adopt(history)
+
+        if not snapshot_found and not self._records:
+            self._write_snapshot(self._copy(history))  # Create the file
+        return history
+
+    def adopt(self, history):
+        """Take `history` as what the files hold, without reading them.
+
+        Used when history was restored from elsewhere (a state snapshot taken
+        when the files were last written), so that saves only append changes."""
+        self._persisted = {pod_id: record.copy() for pod_id, record in history['pods'].items()}
+        self._meta = json.loads(json.dumps({key: value for key, value in history.items()
+                                            if key != 'pods'}))
+        return history
+
+    @staticmethod
+    def files(snapshot_path):
+        """Return the files a store with this snapshot path keeps history in."""
+        journal_path = os.path.splitext(snapshot_path)[0] + '.journal'
+        return [snapshot_path, journal_path, journal_path + '.1']
+
+    def save(self, history, dirty=None):
+        """Append a record for every pod that changed since the last save.
+
+        If `dirty` is given, only those pod ids are compared and the other
+        history keys are left for the next full save."""
+        entries = []
+        pods = history['pods']
+        if dirty is None:
+            changed = pods.items()
+            removed = self._persisted.keys() - pods.keys()
+        else:
+            changed = [(pod_id, pods[pod_id]) for pod_id in dirty if pod_id in pods]
+            removed = [pod_id for pod_id in dirty
+                       if pod_id not in pods and pod_id in self._persisted]
+        for pod_id, record in changed:
+            if self._persisted.get(pod_id) != record:
+                entries.append({'id': pod_id, 'pod': record})  # Converted to a dict in _append
+        for pod_id in removed:
+            entries.append({'id': pod_id, 'deleted': True})
+        if dirty is None:
+            for key, value in history.items():
+                if key != 'pods' and self._meta.get(key) != value:
+                    entries.append({'meta': key, 'value': value})
+
+        if entries:
+            self._append(entries)
+            for entry in entries:
+                if 'meta' in entry:
+                    self._meta[entry['meta']] = json.loads(json.dumps(entry['value']))
+                elif entry.get('deleted'):
+                    del self._persisted[entry['id']]
+                else:
+                    self._persisted[entry['id']] = entry['pod'].copy()
+
+        due = time.monotonic() - self._last_snapshot >= self.snapshot_interval_seconds
+        if self._records >= self.compact_every or (due and self._records):
+            self.compact(history)
+        return len(entries)
+
+    def compact(self, history, wait=False):
+        """Rotate the journal and write a new snapshot in the background."""
+        if self._compactor is not None and self._compactor.is_alive():
+            return False
+
+        self._close_journal()
+        if os.path.exists(self.journal_path):
+            if os.path.exists(self.rotated_path):
+                # A previous compaction did not finish; keep its records
+                with open(self.journal_path, 'r') as src, open(self.rotated_path, 'a') as dst:
+                    dst.write(src.read())
+                os.remove(self.journal_path)
+            else:
+                os.replace(self.journal_path, self.rotated_path)
+
+        self._records = 0
+        self._last_snapshot = time.monotonic()
+        self._compactor = threading.Thread(target=self._compact_worker,
+                                           args=(self._copy(history),), daemon=True)
+        self._compactor.start()
+        if wait:
+            self._compactor.join()
+        return True
+
+    def close(self):
+        """Wait for any running compaction and close the journal."""
+        if self._compactor is not None:
+            self._compactor.join()
+        self._close_journal()
+
+    def _compact_worker(self, snapshot):
+        try:
+            self._write_snapshot(snapshot)
+            if os.path.exists(self.rotated_path):
+                os.remove(self.rotated_path)
+        except Exception as e:
+            logging.error(f"Error compacting history journal: {e}")
+
+    def _write_snapshot(self, snapshot):
+        snapshot['pods'] = {pod_id: record.to_dict() for pod_id, record in snapshot['pods'].items()}
+        tmp_path = self.snapshot_path + '.tmp'
+        with open(tmp_path, 'w') as f:
+            json.dump(snapshot, f, indent=4)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self.snapshot_path)
+        if os.name != 'nt':
+            dir_fd = os.open(os.path.dirname(self.snapshot_path) or '.', os.O_RDONLY)
+            try:
+                os.fsync(dir_fd)
+            finally:
+                os.close(dir_fd)
+
+    def _append(self, entries):
+        if self._journal is None:
+            self._journal = open(self.journal_path, 'a')
+        lines = []
+        for entry in entries:
+            if 'pod' in entry:
+                entry = {'id': entry['id'], 'pod': entry['pod'].to_dict()}
+            lines.append(json.dumps(entry, separators=(',', ':')) + '\n')
+        self._journal.write(''.join(lines))
+        self._journal.flush()
+        os.fsync(self._journal.fileno())
+        self._records += len(entries)
+
+    def _close_journal(self):
+        if self._journal is not None:
+            self._journal.close()
+            self._journal = None
+
+    def _replay(self, path, history):
+        """Apply journal records from `path` to history. Returns records applied."""
+        applied = 0
+        try:
+            with open(path, 'r') as f:
+                for line_number, line in enumerate(f, 1):
+                    try:
+                        entry = json.loads(line)
+                    except json.JSONDecodeError:
+                        # A crash mid-append leaves a partial last line
+                        logging.warning(f"Skipping damaged journal line {line_number} in {path}")
+                        continue
+                    if 'meta' in entry:
+                        history[entry['meta']] = entry['value']
+                    elif entry.get('deleted'):
+                        history['pods'].pop(entry['id'], None)
+                    else:
+                        history['pods'][entry['id']] = HistoryRecord.from_dict(entry['pod'])
+                    applied += 1
+        except FileNotFoundError:
+            pass
+        return applied
+
+    @staticmethod
+    def _copy(history):
+        snapshot = json.loads(json.dumps({key: value for key, value in history.items()
+                                          if key != 'pods'}))
+        snapshot['pods'] = {pod_id: record.copy() for pod_id, record in history['pods'].items()}
+        return snapshot
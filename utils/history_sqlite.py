@@ -0,0 +1,165 @@
+import json
+import logging
+import os
+import sqlite3
+
+from utils.history_journal import HistoryJournal
+from utils.records import HistoryRecord
+
+# Columns stored natively; any other keys in a pod record go into `extra`
+POD_COLUMNS = ('gpu', 'status', 'first_seen', 'start_time', 'last_seen',
+               'total_runtime', 'total_cost')
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS pods (
+    id TEXT PRIMARY KEY,
+    gpu TEXT,
+    status TEXT,
+    first_seen TEXT,
+    start_time TEXT,
+    last_seen TEXT,
+    total_runtime REAL,
+    total_cost REAL,
+    extra TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_pods_status ON pods (status);
+CREATE INDEX IF NOT EXISTS idx_pods_gpu ON pods (gpu);
+CREATE INDEX IF NOT EXISTS idx_pods_last_seen ON pods (last_seen);
+CREATE INDEX IF NOT EXISTS idx_pods_status_last_seen ON pods (status, last_seen);
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value TEXT
+);
+"""
+
+
+class SqliteHistoryStore:
+    """Pod history stored in SQLite, with the same load/save surface as HistoryJournal.
+
+    Each save writes the pods that changed since the previous save in a
+    single transaction. Indexed queries are available for reporting.
+    """
+
+    def __init__(self, db_path):
+        self.db_path = db_path
+        self._conn = sqlite3.connect(db_path, check_same_thread=False)
+        self._conn.execute('PRAGMA journal_mode=WAL')
+        self._conn.execute('PRAGMA synchronous=NORMAL')
+        self._conn.executescript(SCHEMA)
+        self._persisted = {}
+        self._meta = {}
+
+    def load(self):
+        """Load the full history as HistoryRecords."""
+        history = {'pods': {}}
+        for row in self._conn.execute(f"SELECT id, {', '.join(POD_COLUMNS)}, extra FROM pods"):
+            record = {column: value for column, value in zip(POD_COLUMNS, row[1:-1])
+                      if value is not None}
+            if row[-1]:
+                record.update(json.loads(row[-1]))
+            history['pods'][row[0]] = HistoryRecord.from_dict(record)
+        for key, value in self._conn.execute("SELECT key, value FROM meta"):
+            history[key] = json.loads(value)
+        return self.adopt(history)
+
+    def adopt(self, history):
+        """Take `history` as what the database holds, without reading it."""
+        self._persisted = {pod_id: record.copy() for pod_id, record in history['pods'].items()}
+        self._meta = {key: json.dumps(value) for key, value in history.items() if key != 'pods'}
+        return history
+
+    @staticmethod
+    def files(db_path):
+        """Return the files a store with this path keeps history in."""
+        return [db_path, db_path + '-wal']
+
+    def save(self, history, dirty=None):
+        """Write every changed pod in one transaction. Returns the number of changes.
+
+        If `dirty` is given, only those pod ids are compared and the meta
+        table is left for the next full save."""
+        pods = history['pods']
+        if dirty is None:
+            candidates = pods.items()
+            removed = list(self._persisted.keys() - pods.keys())
+            meta = {key: json.dumps(value) for key, value in history.items() if key != 'pods'}
+        else:
+            candidates = [(pod_id, pods[pod_id]) for pod_id in dirty if pod_id in pods]
+            removed = [pod_id for pod_id in dirty
+                       if pod_id not in pods and pod_id in self._persisted]
+            meta = {}
+        changed = [(pod_id, record) for pod_id, record in candidates
+                   if self._persisted.get(pod_id) != record]
+        meta_changed = [(key, value) for key, value in meta.items() if self._meta.get(key) != value]
+
+        if not (changed or removed or meta_changed):
+            return 0
+
+        with self._conn:
+            self._conn.executemany(
+                f"INSERT OR REPLACE INTO pods (id, {', '.join(POD_COLUMNS)}, extra) "
+                f"VALUES ({', '.join('?' * (len(POD_COLUMNS) + 2))})",
+                [self._row(pod_id, record) for pod_id, record in changed])
+            self._conn.executemany("DELETE FROM pods WHERE id = ?",
+                                   [(pod_id,) for pod_id in removed])
+            self._conn.executemany("INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)",
+                                   meta_changed)
+
+        for pod_id, record in changed:
+            self._persisted[pod_id] = record.copy()
+        for pod_id in removed:
+            del self._persisted[pod_id]
+        self._meta.update(meta_changed)
+        return len(changed) + len(removed) + len(meta_changed)
+
+    def close(self):
+        """Close the database connection."""
+        self._conn.close()
+
+    def exited_before(self, cutoff):
+        """Return ids of EXITED pods last seen at or before `cutoff` (datetime).
+        
+        Pods without a last-seen time go by when they were first seen."""
+        rows = self._conn.execute(
+            "SELECT id FROM pods WHERE status = 'EXITED' AND (last_seen <= ? OR "
+            "(last_seen IS NULL AND first_seen <= ?))",
+            (cutoff.isoformat(), cutoff.isoformat()))
+        return [row[0] for row in rows]
+
+    def cost_by_gpu(self, since):
+        """Return total cost per GPU type for pods seen since `since` (datetime)."""
+        rows = self._conn.execute(
+            "SELECT gpu, SUM(total_cost) FROM pods WHERE last_seen >= ? GROUP BY gpu",
+            (since.isoformat(),))
+        return {gpu: cost or 0 for gpu, cost in rows}
+
+    def pods_with_status(self, status):
+        """Return ids of pods whose last recorded status is `status`."""
+        return [row[0] for row in self._conn.execute("SELECT id FROM pods WHERE status = ?",
+                                                     (status,))]
+
+    def is_empty(self):
+        """Return True if no pods have been stored yet."""
+        return self._conn.execute("SELECT 1 FROM pods LIMIT 1").fetchone() is None
+
+    @staticmethod
+    def _row(pod_id, record):
+        record = record.to_dict()
+        extra = {key: value for key, value in record.items() if key not in POD_COLUMNS}
+        return ((pod_id,) + tuple(record.get(column) for column in POD_COLUMNS)
+                + (json.dumps(extra) if extra else None,))
+
+
+def migrate_json_history(json_path, store):
+    """Import an existing JSON history (snapshot and journal) into an empty SQLite store."""
+    if not store.is_empty() or not os.path.exists(json_path):
+        return 0
+
+    journal = HistoryJournal(json_path)
+    history = journal.load()
+    journal.close()
+
+    store.load()
+    count = store.save(history)
+    logging.info(f"Migrated {len(history['pods'])} pods from {json_path} to {store.db_path}")
+    return count
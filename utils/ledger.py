@@ -0,0 +1,154 @@
+from datetime import date, datetime, timedelta
+
+from utils.records import PodStatus
+from utils.runpod_pricing import price_catalog
+
+HOURS_PER_MONTH = 730  # Storage is priced per GB-month
+
+
+class CostLedger:
+    """Accrues pod costs a tick at a time.
+
+    Each `accrue` call charges only the time since the pod's previous
+    accrual, at the prices current on this tick, so a price change affects
+    the time after it is seen and nothing before. Running time is grouped
+    into sessions: one opens when a pod is seen running and is closed into
+    `record.sessions` when it isn't any more. Exited pods accrue storage at
+    the idle GB-month rate. Spend per local day is kept in
+    history['daily_costs'] (and per fleet account in
+    history['account_daily_costs']), and the lifetime spend per GPU type in
+    `gpu_totals`, including pods moved to the archive. GPUs are priced in
+    `tier`, or the tier of the pod's fleet account in `account_tiers`.
+    """
+
+    def __init__(self, history, storage_gb=0, max_days=366, tier=None, account_tiers=None):
+        self.history = history
+        self.storage_gb = storage_gb
+        self.tier = tier
+        self.account_tiers = account_tiers or {}
+        self.max_days = max_days
+        self.daily = history.setdefault('daily_costs', {})
+        self.gpu_totals = dict(history.get('archived_gpu_totals', {}))
+        for record in history.get('pods', {}).values():
+            self.gpu_totals[record.gpu] = self.gpu_totals.get(record.gpu, 0) + record.total_cost
+        self._open = {pod_id for pod_id, record in history.get('pods', {}).items()
+                      if record.session}
+        self._day_key = None
+        self._day_start = self._day_end = 0
+
+    def hourly_rate(self, pod, pricing):
+        """Return what the pod costs per hour in its current state."""
+        storage_gb = pod.storage_gb if pod.storage_gb is not None else self.storage_gb
+        if pod.status == PodStatus.RUNNING:
+            tier = self.account_tiers.get(pod.account, self.tier)
+            return (price_catalog(pricing).rate(pod.gpu, tier) * pod.quantity
+                    + storage_gb * pricing['storage']['running'] / HOURS_PER_MONTH)
+        if pod.status == PodStatus.EXITED:
+            return storage_gb * pricing['storage']['idle'] / HOURS_PER_MONTH
+        return 0
+
+    def accrue(self, pod, record, now, pricing, runtime_hours=None):
+        """Charge the pod for the time since its last accrual. Returns the amount.
+
+        `runtime_hours` is the uptime reported for a running pod; when a new
+        session opens it is used to charge the time the pod ran before the
+        monitor saw it."""
+        since = record.last_accrued
+        record.last_accrued = now
+        running = pod.status == PodStatus.RUNNING
+
+        if record.session and not running:
+            self._close(pod.id, record, since)
+
+        if running and not record.session:
+            if since is None:
+                # Totals in older history files only covered the current session,
+                # which is about to be charged again from its start
+                if record.total_cost:
+                    self.gpu_totals[record.gpu] = (self.gpu_totals.get(record.gpu, 0)
+                                                   - record.total_cost)
+                record.total_runtime = record.total_cost = 0
+            start = now - runtime_hours * 3600 if runtime_hours else now
+            since = max(start, since or start)
+            record.session = {'start': since, 'gpu': pod.gpu, 'quantity': pod.quantity,
+                              'hours': 0, 'cost': 0}
+            self._open.add(pod.id)
+
+        if since is None or now <= since:
+            return 0
+
+        hours = (now - since) / 3600
+        cost = self.hourly_rate(pod, pricing) * hours
+        if running:
+            record.session['hours'] += hours
+            record.session['cost'] += cost
+            record.total_runtime += hours
+        else:
+            record.storage_cost += cost
+        record.total_cost += cost
+        if cost:
+            self.gpu_totals[pod.gpu] = self.gpu_totals.get(pod.gpu, 0) + cost
+            self._add_daily(self.daily, since, now, cost)
+            if pod.account is not None:
+                accounts = self.history.setdefault('account_daily_costs', {})
+                self._add_daily(accounts.setdefault(pod.account, {}), since, now, cost)
+        return cost
+
+    def close_sessions(self, running_ids):
+        """Close open sessions of pods that are no longer running or listed.
+
+        Returns the ids of the pods whose session was closed."""
+        closed = []
+        for pod_id in self._open - set(running_ids):
+            record = self.history['pods'].get(pod_id)
+            if record is not None and record.session:
+                self._close(pod_id, record, record.last_accrued)
+                closed.append(pod_id)
+            self._open.discard(pod_id)
+        return closed
+
+    def day_total(self, day=None, account=None):
+        """Return the spend recorded for a date (default today), optionally for one account."""
+        days = self.daily
+        if account is not None:
+            days = self.history.get('account_daily_costs', {}).get(account, {})
+        return days.get((day or date.today()).isoformat(), 0)
+
+    def month_total(self, day=None, account=None):
+        """Return the spend recorded in the month of a date (default this month)."""
+        days = self.daily
+        if account is not None:
+            days = self.history.get('account_daily_costs', {}).get(account, {})
+        prefix = (day or date.today()).isoformat()[:8]  # 'YYYY-MM-'
+        return sum(cost for key, cost in days.items() if key.startswith(prefix))
+
+    def _close(self, pod_id, record, end):
+        session = record.session
+        session['end'] = end if end is not None else session['start']
+        record.sessions = (record.sessions or []) + [session]
+        record.session = None
+        self._open.discard(pod_id)
+
+    def _add_daily(self, days, start, end, cost):
+        if self._day_start <= start and end <= self._day_end:
+            days[self._day_key] = days.get(self._day_key, 0) + cost
+            return
+        # Spread the cost over each local day the interval touches
+        total = end - start
+        while start < end:
+            self._set_day(start)
+            part_end = min(end, self._day_end)
+            days[self._day_key] = days.get(self._day_key, 0) + cost * (part_end - start) / total
+            start = part_end
+        self._prune(days)
+
+    def _set_day(self, ts):
+        day = datetime.fromtimestamp(ts).date()
+        self._day_key = day.isoformat()
+        self._day_start = datetime.combine(day, datetime.min.time()).timestamp()
+        self._day_end = datetime.combine(day + timedelta(days=1), datetime.min.time()).timestamp()
+
+    def _prune(self, days):
+        if len(days) > self.max_days:
+            for key in sorted(days)[:len(days) - self.max_days]:
+                del days[key]
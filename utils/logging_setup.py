@@ -0,0 +1,130 @@
+import atexit
+import gzip
+import hashlib
+import logging
+import logging.handlers
+import os
+import queue
+import shutil
+import threading
+import time
+
+LOG_FORMAT = '%(asctime)s - %(levelname)s - %(message)s'
+
+
+class RotatingCompressedFileHandler(logging.handlers.RotatingFileHandler):
+    """Rotates when the file exceeds `max_bytes` or is older than `max_age_seconds`.
+
+    Rotated files are gzip-compressed (pod_monitor.log.1.gz, ...) and at
+    most `backup_count` are kept.
+    """
+
+    def __init__(self, filename, max_bytes=10 * 1024 * 1024, max_age_seconds=24 * 3600,
+                 backup_count=14):
+        super().__init__(filename, maxBytes=max_bytes, backupCount=backup_count,
+                         encoding='utf-8', delay=True)
+        self.max_age_seconds = max_age_seconds
+        self.namer = lambda name: name + '.gz'
+        self.rotator = _compress
+        self._opened_at = self._file_start_time()
+
+    def _file_start_time(self):
+        try:
+            return os.path.getmtime(self.baseFilename) if os.path.getsize(self.baseFilename) else time.time()
+        except OSError:
+            return time.time()
+
+    def shouldRollover(self, record):
+        if self.max_age_seconds and time.time() - self._opened_at >= self.max_age_seconds \
+                and os.path.exists(self.baseFilename) and os.path.getsize(self.baseFilename):
+            return True
+        return bool(super().shouldRollover(record))
+
+    def doRollover(self):
+        super().doRollover()
+        self._opened_at = time.time()
+
+
+def _compress(source, dest):
+    with open(source, 'rb') as src, gzip.open(dest, 'wb') as dst:
+        shutil.copyfileobj(src, dst)
+    os.remove(source)
+
+
+class DumpDeduplicator:
+    """Logs large outputs (e.g. runpodctl stdout) once, then only a hash and repeat count.
+
+    Each output is identified by a label; an output identical to the last
+    one for that label is logged as a single short line.
+    """
+
+    def __init__(self):
+        self._last = {}
+        self._lock = threading.Lock()
+
+    def log(self, label, text, level=logging.DEBUG, logger=None):
+        logger = logger or logging.getLogger()
+        if not logger.isEnabledFor(level):
+            return
+        text = '\n'.join(line.rstrip() for line in text.splitlines())  # Drop column padding
+        digest = hashlib.sha1(text.encode('utf-8')).hexdigest()[:12]
+        with self._lock:
+            last_digest, repeats = self._last.get(label, (None, 0))
+            repeats = repeats + 1 if digest == last_digest else 0
+            self._last[label] = (digest, repeats)
+        if repeats:
+            logger.log(level, f"{label}: unchanged [{digest}] (repeated {repeats}x)")
+        else:
+            logger.log(level, f"{label} [{digest}]:\n{text}" if text else f"{label}: <empty>")
+
+
+_dumps = DumpDeduplicator()
+
+
+def log_dump(label, text, level=logging.DEBUG):
+    """Log subprocess output, collapsing repeats of the same output."""
+    _dumps.log(label, text, level)
+
+
+_listener = None
+
+
+def configure_logging(log_dir='logs', level='INFO', max_bytes=10 * 1024 * 1024,
+                      max_age_seconds=24 * 3600, backup_count=14):
+    """Send log records through a queue to a background thread that writes the file.
+
+    The calling thread formats each record's message (QueueHandler.prepare
+    merges its arguments and any traceback) and enqueues it; the line
+    format, file writes, rotation and compression happen on the listener
+    thread."""
+    global _listener
+    stop_logging()
+    os.makedirs(log_dir, exist_ok=True)
+
+    file_handler = RotatingCompressedFileHandler(os.path.join(log_dir, 'pod_monitor.log'),
+                                                 max_bytes, max_age_seconds, backup_count)
+    file_handler.setFormatter(logging.Formatter(LOG_FORMAT))
+
+    log_queue = queue.SimpleQueue()
+    root = logging.getLogger()
+    for handler in list(root.handlers):
+        root.removeHandler(handler)
+    root.addHandler(logging.handlers.QueueHandler(log_queue))
+    root.setLevel(level.upper() if isinstance(level, str) else level)
+
+    _listener = logging.handlers.QueueListener(log_queue, file_handler)
+    _listener.start()
+    return _listener
+
+
+def stop_logging():
+    """Flush queued records and stop the writer thread."""
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        for handler in _listener.handlers:
+            handler.close()
+        _listener = None
+
+
+atexit.register(stop_logging)
@@ -0,0 +1,183 @@
+import logging
+import os
+import queue
+import shutil
+import subprocess
+import threading
+import time
+
+import requests
+
+from utils.tracing import get_tracer
+
+
+class ToastBackend:
+    """Windows toast notifications through win10toast."""
+    name = 'toast'
+
+    def __init__(self, duration=10):
+        from win10toast import ToastNotifier  # Windows-only dependency
+        self.duration = duration
+        self.toaster = ToastNotifier()
+
+    def send(self, title, message):
+        self.toaster.show_toast(title, message, duration=self.duration)
+
+
+class NotifySendBackend:
+    """Linux desktop notifications through notify-send."""
+    name = 'notify-send'
+
+    def __init__(self, timeout=10):
+        if shutil.which('notify-send') is None:
+            raise RuntimeError("notify-send not found")
+        self.timeout = timeout
+
+    def send(self, title, message):
+        subprocess.run(['notify-send', '--app-name=RunPod Monitor', title, message],
+                       capture_output=True, timeout=self.timeout, check=True)
+
+
+class WebhookBackend:
+    """Posts {"title": ..., "text": ...} as JSON to a webhook URL."""
+    name = 'webhook'
+
+    def __init__(self, url, timeout=10):
+        self.url = url
+        self.timeout = timeout
+        self.session = requests.Session()
+
+    def send(self, title, message):
+        response = self.session.post(self.url, json={'title': title, 'text': message},
+                                     timeout=self.timeout)
+        response.raise_for_status()
+
+
+class LogBackend:
+    """Writes notifications to the monitor log."""
+    name = 'log'
+
+    def send(self, title, message):
+        logging.info(f"Notification: {title}: {message}")
+
+
+class NotificationDispatcher:
+    """Delivers notifications from a background thread.
+
+    `notify` only records the alert. `flush` hands everything recorded
+    since the last flush to the worker as one batch, which goes out as a
+    single summary when it holds more than one alert. Each backend sends at
+    most once per `rate_limit_seconds`; batches that arrive sooner are
+    merged and sent when the limit allows.
+    """
+
+    def __init__(self, backends, rate_limit_seconds=30, clock=time.monotonic):
+        self.backends = list(backends)
+        self.rate_limit_seconds = rate_limit_seconds
+        self.clock = clock
+        self._batch = []
+        self._batch_lock = threading.Lock()
+        self._queue = queue.Queue()
+        self._held = {backend.name: [] for backend in self.backends}
+        self._last_sent = {}
+        self._thread = threading.Thread(target=self._run, name='notifications', daemon=True)
+        self._thread.start()
+
+    def notify(self, title, message):
+        """Record an alert for the current batch. Never blocks on delivery."""
+        with self._batch_lock:
+            self._batch.append((title, message))
+
+    def flush(self):
+        """Queue the alerts recorded since the last flush for delivery."""
+        with self._batch_lock:
+            batch, self._batch = self._batch, []
+        if batch:
+            self._queue.put(batch)
+
+    def queue_depth(self):
+        """Return how many batches are waiting for the worker."""
+        return self._queue.qsize()
+
+    def stop(self, timeout=15):
+        """Flush, deliver what can be delivered within `timeout`, and stop the worker."""
+        self.flush()
+        self._queue.put(None)
+        self._thread.join(timeout)
+
+    def _run(self):
+        stopping = False
+        while True:
+            wait = self._next_release()
+            try:
+                batch = self._queue.get(timeout=wait) if not stopping else self._queue.get_nowait()
+            except queue.Empty:
+                batch = []
+                if stopping:
+                    self._release(force=True)
+                    return
+            if batch is None:
+                stopping = True
+                continue
+            for held in self._held.values():
+                held.extend(batch)
+            self._release()
+
+    def _next_release(self):
+        """Seconds until a held batch may be sent, or None if nothing is held."""
+        waits = [self._last_sent.get(name, float('-inf')) + self.rate_limit_seconds - self.clock()
+                 for name, held in self._held.items() if held]
+        return max(min(waits), 0) if waits else None
+
+    def _release(self, force=False):
+        now = self.clock()
+        for backend in self.backends:
+            held = self._held[backend.name]
+            if not held:
+                continue
+            last = self._last_sent.get(backend.name)
+            if not force and last is not None and now - last < self.rate_limit_seconds:
+                continue
+            title, message = summarize(held)
+            self._held[backend.name] = []
+            self._last_sent[backend.name] = now
+            try:
+                with get_tracer().span('notify', backend=backend.name, alerts=len(held)):
+                    backend.send(title, message)
+            except Exception as e:
+                logging.error(f"Error sending notification via {backend.name}: {e}")
+
+
+def summarize(alerts):
+    """Merge several (title, message) alerts into one."""
+    if len(alerts) == 1:
+        return alerts[0]
+    lines = [f"{title}: {' '.join(message.split())}" for title, message in alerts]
+    return f"RunPod Monitor: {len(alerts)} alerts", '\n'.join(lines)
+
+
+def create_backends(names, webhook_url=None):
+    """Create the named backends, skipping any that aren't available here."""
+    backends = []
+    for name in names:
+        try:
+            if name == 'toast':
+                backends.append(ToastBackend())
+            elif name == 'notify-send':
+                backends.append(NotifySendBackend())
+            elif name == 'webhook':
+                if not webhook_url:
+                    raise RuntimeError("notification_webhook_url is not set")
+                backends.append(WebhookBackend(webhook_url))
+            elif name == 'log':
+                backends.append(LogBackend())
+            else:
+                raise RuntimeError("unknown backend")
+        except Exception as e:
+            logging.warning(f"Notification backend '{name}' unavailable: {e}")
+    return backends
+
+
+def default_backend_names():
+    """Return the desktop backend for this platform plus the log sink."""
+    return ['toast' if os.name == 'nt' else 'notify-send', 'log']
@@ -0,0 +1,175 @@
+import json
+import logging
+from collections import namedtuple
+from functools import lru_cache
+
+from utils.records import Pod
+
+# Header fields located the same way parse_pod_output always has: by name
+COLUMN_NAMES = ('ID', 'NAME', 'GPU', 'IMAGE NAME', 'STATUS')
+
+PodLayout = namedtuple('PodLayout', ['id', 'name', 'gpu', 'status'])
+
+
+@lru_cache(maxsize=32)
+def compile_layout(header):
+    """Compile a runpodctl header line into column slices.
+
+    Cached per header signature, so repeated polls with the same header
+    reuse the same layout."""
+    header = header.rstrip('\r\n')
+    positions = {}
+    for name in COLUMN_NAMES:
+        pos = header.find(name)
+        if pos == -1:
+            raise ValueError(f"runpodctl header is missing the {name} column")
+        positions[name] = pos
+
+    return PodLayout(
+        id=slice(positions['ID'], positions['NAME']),
+        name=slice(positions['NAME'], positions['GPU']),
+        gpu=slice(positions['GPU'], positions['IMAGE NAME']),
+        status=slice(positions['STATUS'], None)
+    )
+
+
+def split_gpu(gpu_info):
+    """Split GPU info like '2 RTX A4000' into ('RTX A4000', 2)."""
+    gpu_parts = gpu_info.split()
+    if len(gpu_parts) >= 2 and gpu_parts[0].isdigit():
+        return ' '.join(gpu_parts[1:]), int(gpu_parts[0])
+    return ' '.join(gpu_parts), 1
+
+
+def parse_row(line, layout):
+    """Parse one data row with a compiled layout. Returns None for a malformed row."""
+    pod_id = line[layout.id].strip()
+    status = line[layout.status].strip()
+    if not pod_id or not status or ' ' in pod_id:
+        return None
+
+    gpu, quantity = split_gpu(line[layout.gpu])
+    name = line[layout.name].strip() or None
+    # runtime is filled in by fetch_pod_runtimes
+    return Pod(pod_id, gpu, status, None, quantity, name=name)
+
+
+class RowCache:
+    """Remembers the pods parsed from the previous listing, keyed by raw row.
+
+    In a steady state `runpodctl get pod` prints the same rows on every
+    poll, so a row that is byte-for-byte identical to one in the previous
+    listing reuses that pod instead of being parsed again. Pods parsed
+    from new or changed rows in the last listing are kept in `parsed`, and
+    `unchanged` says whether the whole listing matched the previous one.
+    """
+
+    def __init__(self):
+        self._header = None
+        self._rows = {}
+        self._next = {}
+        self.parsed = []
+        self.unchanged = False
+
+    def start(self, header):
+        """Begin a listing. A different header invalidates every cached row."""
+        if header != self._header:
+            self._header = header
+            self._rows = {}
+        self._next = {}
+        self.parsed = []
+
+    def get(self, line):
+        pod = self._rows.get(line)
+        if pod is not None:
+            self._next[line] = pod
+        return pod
+
+    def add(self, line, pod):
+        self._next[line] = pod
+        self.parsed.append(pod)
+
+    def finish(self):
+        """End a listing; only its rows are kept for the next one."""
+        self.unchanged = not self.parsed and len(self._next) == len(self._rows)
+        self._rows = self._next
+        self._next = {}
+
+
+def parse_pod_lines(lines, cache=None):
+    """Parse runpodctl table output from any iterable of lines, yielding pods.
+
+    Lines can come straight from a subprocess pipe. Malformed rows are
+    skipped one at a time instead of discarding the whole listing. With a
+    RowCache, rows unchanged since the previous listing aren't parsed again;
+    call `cache.finish()` once the listing has been consumed."""
+    layout = None
+    for line_number, line in enumerate(lines, 1):
+        if not line or line.isspace():
+            continue
+        if layout is None:
+            try:
+                layout = compile_layout(line)
+            except ValueError as e:
+                logging.error(f"Error parsing pod output: {e}")
+                return
+            if cache is not None:
+                cache.start(line)
+            continue
+
+        if cache is not None:
+            pod = cache.get(line)
+            if pod is not None:
+                yield pod
+                continue
+
+        try:
+            pod = parse_row(line, layout)
+        except Exception as e:
+            pod = None
+            logging.debug(f"Row {line_number} raised {e}")
+        if pod is None:
+            logging.warning(f"Skipping malformed runpodctl row {line_number}: {line.strip()[:80]}")
+            continue
+        if cache is not None:
+            cache.add(line, pod)
+        yield pod
+
+
+def parse_pod_record(record):
+    """Convert one structured pod record (runpodctl JSON or API) into a Pod."""
+    machine = record.get('machine') or {}
+    gpu_info = record.get('gpu') or machine.get('gpuDisplayName') or ''
+    gpu, quantity = split_gpu(str(gpu_info))
+    if 'gpuCount' in record:
+        quantity = int(record['gpuCount'] or 1)
+
+    runtime = record.get('runtime')
+    if isinstance(runtime, dict):
+        # The API reports uptime in seconds; keep the runtime string format
+        uptime_seconds = runtime.get('uptimeInSeconds')
+        runtime = f"{uptime_seconds / 60:.0f}m" if uptime_seconds is not None else None
+    elif not isinstance(runtime, str):
+        runtime = None
+
+    storage_gb = None
+    if record.get('volumeInGb') is not None or record.get('containerDiskInGb') is not None:
+        storage_gb = (record.get('volumeInGb') or 0) + (record.get('containerDiskInGb') or 0)
+
+    return Pod(record['id'], gpu, record.get('desiredStatus') or record.get('status') or '',
+               runtime, quantity, storage_gb, name=record.get('name'))
+
+
+def parse_pod_json(text):
+    """Parse structured JSON pod output into Pods, skipping bad records."""
+    data = json.loads(text)
+    if isinstance(data, dict):
+        data = data.get('pods') or data.get('myself', {}).get('pods') or []
+
+    pods = []
+    for record in data:
+        try:
+            pods.append(parse_pod_record(record))
+        except (KeyError, TypeError, ValueError) as e:
+            logging.warning(f"Skipping malformed pod record: {e}")
+    return pods
@@ -0,0 +1,243 @@
+import fnmatch
+import json
+import re
+from collections import namedtuple
+
+from utils.records import PodStatus, parse_status
+
+# What a rule can set, and the config key each falls back to
+SETTINGS = {
+    'notify_after_minutes': 'notification_threshold_minutes',
+    'notify_cooldown_minutes': 'notification_cooldown_minutes',
+    'shutdown_after_hours': 'shutdown_threshold_hours',
+    'shutdown_after_cost': None,
+}
+MATCH_KEYS = ('name', 'gpu', 'pod_name', 'status', 'account', 'min_hourly_rate',
+              'max_hourly_rate')
+NULLABLE = ('notify_after_minutes', 'shutdown_after_hours', 'shutdown_after_cost')
+
+# Seconds after the pod started; None means never. `rule` names the rule
+# that set the shutdown deadline (None when it comes from the config).
+Policy = namedtuple('Policy', ['notify_after', 'cooldown', 'shutdown_after', 'rule'])
+
+
+def _compile_globs(patterns):
+    """Compile a glob or list of globs into one case-insensitive regex."""
+    if patterns is None:
+        return None
+    if isinstance(patterns, str):
+        patterns = [patterns]
+    return re.compile('|'.join(fnmatch.translate(pattern) for pattern in patterns),
+                      re.IGNORECASE)
+
+
+class Rule:
+    """One compiled policy rule.
+
+    GPU, status and account are checked once per distinct combination;
+    only the pod name and the hourly rate are checked per pod.
+    """
+    __slots__ = ('index', 'bit', 'name', 'gpu', 'status', 'account', 'pod_name', 'min_rate',
+                 'max_rate', 'settings', 'dynamic')
+
+    def __init__(self, index, spec):
+        if not isinstance(spec, dict):
+            raise ValueError(f"Policy rule {index + 1} is not an object")
+        self.index = index
+        self.bit = 1 << index
+        self.name = spec.get('name') or f'rule {index + 1}'
+        unknown = set(spec) - set(MATCH_KEYS) - set(SETTINGS)
+        if unknown:
+            raise ValueError(f"Policy rule {self.name!r} has unknown keys: "
+                             f"{', '.join(sorted(unknown))}")
+        self.settings = {key: spec[key] for key in SETTINGS if key in spec}
+        if not self.settings:
+            raise ValueError(f"Policy rule {self.name!r} doesn't set anything")
+        for key, value in self.settings.items():
+            if value is None and key in NULLABLE:
+                continue
+            if not isinstance(value, (int, float)) or value < 0:
+                raise ValueError(f"Policy rule {self.name!r}: {key} must be a number")
+
+        self.gpu = _compile_globs(spec.get('gpu'))
+        self.pod_name = _compile_globs(spec.get('pod_name'))
+        self.status = parse_status(spec.get('status', PodStatus.RUNNING.value))
+        # Thresholds are only worked out for running pods
+        if self.status != PodStatus.RUNNING:
+            raise ValueError(f"Policy rule {self.name!r}: status must be "
+                             f"{PodStatus.RUNNING.value}, not {spec['status']!r}")
+        account = spec.get('account')
+        self.account = {account} if isinstance(account, str) else \
+            set(account) if account is not None else None
+        self.min_rate = spec.get('min_hourly_rate')
+        self.max_rate = spec.get('max_hourly_rate')
+        self.dynamic = (self.pod_name is not None or self.min_rate is not None
+                        or self.max_rate is not None)
+
+    @property
+    def uses_rate(self):
+        return self.min_rate is not None or self.max_rate is not None
+
+    def matches_key(self, status, gpu, account):
+        """Check the parts of the rule shared by every pod with this status, GPU and account."""
+        return (status == self.status
+                and (self.gpu is None or self.gpu.match(gpu) is not None)
+                and (self.account is None or account in self.account))
+
+    def matches_name(self, name):
+        if self.pod_name is None:
+            return True
+        return name is not None and self.pod_name.match(name) is not None
+
+    def matches_rate(self, rate):
+        if self.min_rate is not None and (rate is None or rate < self.min_rate):
+            return False
+        if self.max_rate is not None and (rate is None or rate > self.max_rate):
+            return False
+        return True
+
+
+class PolicyEngine:
+    """Per-pod notification and shutdown thresholds from declarative rules.
+
+    Rules are checked in file order and each setting comes from the first
+    matching rule that sets it; anything no rule sets falls back to the
+    pod's account config, then the global config. With no rules every pod
+    gets the configured thresholds, as before policies existed.
+
+    Rules are compiled once. The candidates for each (status, GPU, account)
+    combination, which of them match each pod name and hourly rate (as a
+    bitmask of rules), and the merged result for each set of matching rules
+    are worked out the first time they are seen and reused afterwards, so
+    the per-pod cost stays flat as rules are added.
+    """
+
+    def __init__(self, rules, config, accounts=None):
+        self.rules = [Rule(index, spec) for index, spec in enumerate(rules)]
+        self.config = config
+        self.accounts = accounts or {}
+        self._candidates = {}  # (status, gpu, account) -> _Candidates
+        self._name_masks = {}  # (status, gpu, account, name) -> bits of rules the name passes
+        self._rate_masks = {}  # (status, gpu, account, rate) -> bits of rules the rate passes
+        self._merged = {}  # (status, gpu, account, matched bits) -> (Policy, cost, cost rule)
+
+    def __len__(self):
+        return len(self.rules)
+
+    def evaluate(self, pods, rate=None):
+        """Return the Policy of each pod, in order.
+
+        `rate(pod)` gives a pod's hourly rate. It is only called for pods
+        that a rate-based rule or a cost limit applies to."""
+        candidates = self._candidates
+        name_masks = self._name_masks
+        rate_masks = self._rate_masks
+        merged_cache = self._merged
+        # Names and rates of pods that are gone would otherwise pile up
+        if len(name_masks) > 2 * len(pods) + 1024:
+            name_masks.clear()
+        if len(rate_masks) > 2 * len(pods) + 1024:
+            rate_masks.clear()
+        policies = []
+        for pod in pods:
+            key = (pod.status, pod.gpu, pod.account)
+            entry = candidates.get(key)
+            if entry is None:
+                entry = candidates[key] = _Candidates(self.rules, key)
+            pod_rate = None
+            matched = 0
+            if entry.by_name:
+                name_key = key + (pod.name,)
+                matched = name_masks.get(name_key)
+                if matched is None:
+                    matched = name_masks[name_key] = entry.name_mask(pod.name)
+            if entry.by_rate:
+                pod_rate = rate(pod) if rate is not None else None
+                rate_key = key + (pod_rate,)
+                rate_mask = rate_masks.get(rate_key)
+                if rate_mask is None:
+                    rate_mask = rate_masks[rate_key] = entry.rate_mask(pod_rate)
+                matched = rate_mask if not entry.by_name else matched & rate_mask
+
+            merged = merged_cache.get(key + (matched,))
+            if merged is None:
+                merged = merged_cache[key + (matched,)] = self._merge(entry.rules, matched,
+                                                                      pod.account)
+            policy, cost_limit, cost_rule = merged
+            if cost_limit is not None:
+                if pod_rate is None and rate is not None:
+                    pod_rate = rate(pod)
+                policy = self._apply_cost_limit(policy, cost_limit, cost_rule, pod_rate)
+            policies.append(policy)
+        return policies
+
+    def _merge(self, rules, matched, account):
+        settings = {}
+        sources = {}
+        for rule in rules:
+            if rule.dynamic and not matched & rule.bit:
+                continue
+            for key, value in rule.settings.items():
+                if key not in settings:
+                    settings[key] = value
+                    sources[key] = rule.name
+        config = self.accounts.get(account, self.config)
+        for key, config_key in SETTINGS.items():
+            if key not in settings:
+                settings[key] = config[config_key] if config_key else None
+
+        def seconds(value, scale):
+            return value * scale if value is not None else None
+
+        policy = Policy(seconds(settings['notify_after_minutes'], 60),
+                        settings['notify_cooldown_minutes'] * 60,
+                        seconds(settings['shutdown_after_hours'], 3600),
+                        sources.get('shutdown_after_hours'))
+        return policy, settings['shutdown_after_cost'], sources.get('shutdown_after_cost')
+
+    @staticmethod
+    def _apply_cost_limit(policy, cost_limit, cost_rule, rate):
+        # A cost limit becomes a runtime limit at the pod's current rate
+        if not rate:
+            return policy
+        seconds = cost_limit / rate * 3600
+        if policy.shutdown_after is None or seconds < policy.shutdown_after:
+            return policy._replace(shutdown_after=seconds, rule=cost_rule)
+        return policy
+
+
+class _Candidates:
+    """The rules that can apply to pods with one status, GPU and account."""
+
+    def __init__(self, rules, key):
+        self.rules = [rule for rule in rules if rule.matches_key(*key)]
+        dynamic = [rule for rule in self.rules if rule.dynamic]
+        self.by_name = [rule for rule in dynamic if rule.pod_name is not None]
+        self.by_rate = [rule for rule in dynamic if rule.uses_rate]
+        # Rules without a name (or rate) condition pass that check for every pod
+        self._name_base = sum(rule.bit for rule in dynamic if rule.pod_name is None)
+        self._rate_base = sum(rule.bit for rule in dynamic if not rule.uses_rate)
+
+    def name_mask(self, name):
+        return self._name_base | sum(rule.bit for rule in self.by_name
+                                     if rule.matches_name(name))
+
+    def rate_mask(self, rate):
+        return self._rate_base | sum(rule.bit for rule in self.by_rate
+                                     if rule.matches_rate(rate))
+
+
+def load_policies(path, config, accounts=None):
+    """Build a PolicyEngine from the rules file at `path`.
+
+    The file holds {"rules": [...]}; a missing file means no rules. A file
+    that can't be parsed, or a bad rule, raises ValueError."""
+    try:
+        with open(path, 'r') as f:
+            data = json.load(f)
+    except FileNotFoundError:
+        return PolicyEngine([], config, accounts)
+    rules = data.get('rules', []) if isinstance(data, dict) else data
+    if not isinstance(rules, list):
+        raise ValueError(f"{path}: 'rules' must be a list")
+    return PolicyEngine(rules, config, accounts)
@@ -0,0 +1,201 @@
+import sys
+from datetime import datetime
+from enum import Enum
+
+
+class PodStatus(str, Enum):
+    """Pod states reported by runpodctl and the API.
+
+    Members compare equal to their plain string values, so
+    `pod.status == 'RUNNING'` keeps working.
+    """
+    RUNNING = 'RUNNING'
+    EXITED = 'EXITED'
+    CREATED = 'CREATED'
+    RESTARTING = 'RESTARTING'
+    TERMINATED = 'TERMINATED'
+    DEAD = 'DEAD'
+
+    def __str__(self):
+        return self.value
+
+
+_STATUSES = {status.value: status for status in PodStatus}
+
+
+def parse_status(status):
+    """Return the PodStatus for a status string, or the interned string if unknown."""
+    if status is None or isinstance(status, PodStatus):
+        return status
+    return _STATUSES.get(status) or sys.intern(status)
+
+
+def to_epoch(value):
+    """Convert an ISO timestamp string to epoch seconds (None stays None)."""
+    if value is None or isinstance(value, (int, float)):
+        return value
+    return datetime.fromisoformat(value).timestamp()
+
+
+def to_iso(value):
+    """Convert epoch seconds to the ISO format used in pod_history.json."""
+    if value is None:
+        return None
+    return datetime.fromtimestamp(value).isoformat()
+
+
+class Pod:
+    """One pod from a runpodctl or API listing.
+
+    Fields can also be read like a dict (`pod['gpu']`) for code written
+    against the older dict pods.
+    """
+    __slots__ = ('id', 'gpu', 'status', 'runtime', 'quantity', 'storage_gb', 'account', 'name')
+
+    def __init__(self, id, gpu, status, runtime=None, quantity=1, storage_gb=None, account=None,
+                 name=None):
+        self.id = id
+        self.gpu = sys.intern(gpu)
+        self.status = parse_status(status)
+        self.runtime = runtime
+        self.quantity = quantity
+        self.storage_gb = storage_gb
+        self.account = account  # Set by the fleet source in multi-account mode
+        self.name = name
+
+    def __getitem__(self, key):
+        try:
+            return getattr(self, key)
+        except AttributeError:
+            raise KeyError(key) from None
+
+    def get(self, key, default=None):
+        return getattr(self, key, default)
+
+    def __eq__(self, other):
+        if not isinstance(other, Pod):
+            return NotImplemented
+        return all(getattr(self, name) == getattr(other, name) for name in self.__slots__)
+
+    __hash__ = None
+
+    def __repr__(self):
+        return (f"Pod(id={self.id!r}, gpu={self.gpu!r}, status={str(self.status)!r}, "
+                f"runtime={self.runtime!r}, quantity={self.quantity!r}, "
+                f"storage_gb={self.storage_gb!r}, account={self.account!r}, name={self.name!r})")
+
+
+class HistoryRecord:
+    """History for one pod, as kept in history['pods'].
+
+    Timestamps are epoch seconds. `to_dict`/`from_dict` convert to and from
+    the pod_history.json layout with ISO strings; keys this class doesn't
+    know about are carried through in `extra`.
+
+    `total_runtime` and `total_cost` cover every session the pod has had.
+    The cost ledger keeps the open running session in `session` and closed
+    ones in `sessions`, as dicts with 'start'/'end' timestamps, 'gpu',
+    'quantity', 'hours' and 'cost'. `account` is the fleet account the pod
+    belongs to (None outside fleet mode).
+    """
+    __slots__ = ('gpu', 'status', 'first_seen', 'start_time', 'last_seen',
+                 'total_runtime', 'total_cost', 'storage_cost', 'last_accrued',
+                 'session', 'sessions', 'account', 'extra')
+
+    TIMESTAMPS = ('first_seen', 'start_time', 'last_seen', 'last_accrued')
+    SESSION_TIMESTAMPS = ('start', 'end')
+
+    def __init__(self, gpu, status=None, first_seen=None, start_time=None, last_seen=None,
+                 total_runtime=0, total_cost=0, storage_cost=0, last_accrued=None,
+                 session=None, sessions=None, account=None, extra=None):
+        self.gpu = sys.intern(gpu) if gpu is not None else None
+        self.status = parse_status(status)
+        self.first_seen = first_seen
+        self.start_time = start_time
+        self.last_seen = last_seen
+        self.total_runtime = total_runtime
+        self.total_cost = total_cost
+        self.storage_cost = storage_cost
+        self.last_accrued = last_accrued
+        self.session = session
+        self.sessions = sessions
+        self.account = account
+        self.extra = extra
+
+    @classmethod
+    def from_dict(cls, data):
+        """Build a record from the pod_history.json layout."""
+        extra = {key: value for key, value in data.items() if key not in cls.__slots__}
+        session = data.get('session')
+        sessions = data.get('sessions')
+        return cls(
+            gpu=data.get('gpu'),
+            status=data.get('status'),
+            first_seen=to_epoch(data.get('first_seen')),
+            start_time=to_epoch(data.get('start_time')),
+            last_seen=to_epoch(data.get('last_seen')),
+            total_runtime=data.get('total_runtime', 0),
+            total_cost=data.get('total_cost', 0),
+            storage_cost=data.get('storage_cost', 0),
+            last_accrued=to_epoch(data.get('last_accrued')),
+            session=cls._convert_session(session, to_epoch) if session else None,
+            sessions=[cls._convert_session(s, to_epoch) for s in sessions] if sessions else None,
+            account=data.get('account'),
+            extra=extra or None
+        )
+
+    def to_dict(self):
+        """Convert to the pod_history.json layout, omitting unset fields."""
+        data = {'gpu': self.gpu}
+        for name in self.TIMESTAMPS:
+            value = getattr(self, name)
+            if value is not None:
+                data[name] = to_iso(value)
+        data['total_runtime'] = self.total_runtime
+        data['total_cost'] = self.total_cost
+        if self.storage_cost:
+            data['storage_cost'] = self.storage_cost
+        if self.session:
+            data['session'] = self._convert_session(self.session, to_iso)
+        if self.sessions:
+            data['sessions'] = [self._convert_session(s, to_iso) for s in self.sessions]
+        if self.status is not None:
+            data['status'] = str(self.status)
+        if self.account is not None:
+            data['account'] = self.account
+        if self.extra:
+            data.update(self.extra)
+        return data
+
+    @classmethod
+    def _convert_session(cls, session, convert):
+        converted = dict(session)
+        for name in cls.SESSION_TIMESTAMPS:
+            if name in converted:
+                converted[name] = convert(converted[name])
+        return converted
+
+    def to_tuple(self):
+        """Return the fields in __slots__ (and constructor) order, as plain data."""
+        return (self.gpu, str(self.status) if self.status is not None else None,
+                self.first_seen, self.start_time, self.last_seen, self.total_runtime,
+                self.total_cost, self.storage_cost, self.last_accrued, self.session,
+                self.sessions, self.account, self.extra)
+
+    def copy(self):
+        return HistoryRecord(self.gpu, self.status, self.first_seen, self.start_time,
+                             self.last_seen, self.total_runtime, self.total_cost,
+                             self.storage_cost, self.last_accrued,
+                             dict(self.session) if self.session else None,
+                             list(self.sessions) if self.sessions else None,
+                             self.account, dict(self.extra) if self.extra else None)
+
+    def __eq__(self, other):
+        if not isinstance(other, HistoryRecord):
+            return NotImplemented
+        return all(getattr(self, name) == getattr(other, name) for name in self.__slots__)
+
+    __hash__ = None
+
+    def __repr__(self):
+        return f"HistoryRecord({self.to_dict()!r})"
@@ -0,0 +1,141 @@
+import logging
+import os
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from utils.metrics import REGISTRY
+from utils.pod_parser import parse_pod_record
+
+RUNPOD_GRAPHQL_URL = 'https://api.runpod.io/graphql'
+
+PODS_QUERY = """
+query Pods {
+  myself {
+    pods {
+      id
+      name
+      desiredStatus
+      gpuCount
+      volumeInGb
+      containerDiskInGb
+      machine { gpuDisplayName }
+      runtime { uptimeInSeconds }
+    }
+  }
+}
+"""
+
+POD_QUERY = """
+query Pod($podId: String!) {
+  pod(input: {podId: $podId}) {
+    id
+    desiredStatus
+  }
+}
+"""
+
+
+API_SECONDS = REGISTRY.histogram('runpod_api_request_seconds',
+                                 'Time spent in RunPod API requests')
+
+
+class RunpodApiError(Exception):
+    """Raised when the RunPod API returns an error."""
+
+
+class RunpodApiSource:
+    """Pod source that talks to the RunPod GraphQL API over a pooled keep-alive session.
+
+    Pod status and uptime come back in one request per tick, and several
+    terminations are batched into a single mutation. If a request fails and a
+    `fallback` source is given, that source is used for the call instead.
+    """
+
+    def __init__(self, api_key, url=RUNPOD_GRAPHQL_URL, timeout=10, pool_size=4, fallback=None):
+        self.url = url
+        self.timeout = timeout
+        self.fallback = fallback
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size)
+        self.session.mount('https://', adapter)
+        self.session.mount('http://', adapter)
+        self.session.headers.update({
+            'Authorization': f'Bearer {api_key}',
+            'Content-Type': 'application/json',
+        })
+
+    def _post(self, query, variables=None):
+        with API_SECONDS.time():
+            response = self.session.post(self.url, json={'query': query, 'variables': variables or {}},
+                                         timeout=self.timeout)
+        response.raise_for_status()
+        payload = response.json()
+        if payload.get('errors'):
+            raise RunpodApiError('; '.join(error.get('message', str(error))
+                                           for error in payload['errors']))
+        return payload.get('data') or {}
+
+    def get_pods(self):
+        """Return all pods, including their uptime, or None if they couldn't be listed."""
+        try:
+            return self.list_pods()
+        except Exception as e:
+            logging.error(f"Error getting pod status from RunPod API: {e}")
+            if self.fallback is not None:
+                return self.fallback.get_pods()
+            return None
+
+    def list_pods(self):
+        """Like get_pods, but raises instead of falling back when the request fails."""
+        data = self._post(PODS_QUERY)
+        pods = []
+        for record in (data.get('myself') or {}).get('pods') or []:
+            try:
+                pods.append(parse_pod_record(record))
+            except (KeyError, TypeError, ValueError) as e:
+                logging.warning(f"Skipping malformed pod record from RunPod API: {e}")
+        return pods
+
+    def terminate_many(self, pod_ids):
+        """Terminate several pods in one batched mutation. Returns {pod_id: success}."""
+        if not pod_ids:
+            return {}
+
+        params = ', '.join(f'$p{i}: String!' for i in range(len(pod_ids)))
+        fields = '\n'.join(f'  t{i}: podTerminate(input: {{podId: $p{i}}})'
+                           for i in range(len(pod_ids)))
+        variables = {f'p{i}': pod_id for i, pod_id in enumerate(pod_ids)}
+        try:
+            self._post(f"mutation Terminate({params}) {{\n{fields}\n}}", variables)
+        except Exception as e:
+            logging.error(f"Error terminating pods {', '.join(pod_ids)} via RunPod API: {e}")
+            if self.fallback is not None:
+                return {pod_id: self.fallback.terminate(pod_id) for pod_id in pod_ids}
+            return {pod_id: False for pod_id in pod_ids}
+
+        for pod_id in pod_ids:
+            logging.info(f"Successfully terminated pod {pod_id}")
+        return {pod_id: True for pod_id in pod_ids}
+
+    def pod_exists(self, pod_id):
+        """Return whether the pod still exists, or None if the API can't tell."""
+        try:
+            pod = self._post(POD_QUERY, {'podId': pod_id}).get('pod')
+        except Exception as e:
+            logging.warning(f"Could not check pod {pod_id} via RunPod API: {e}")
+            return None
+        return pod is not None and pod.get('desiredStatus') != 'TERMINATED'
+
+    def terminate(self, pod_id):
+        """Terminate a single pod."""
+        return self.terminate_many([pod_id])[pod_id]
+
+    def close(self):
+        """Close pooled connections."""
+        self.session.close()
+
+
+def get_api_key(config):
+    """Return the RunPod API key from config or the RUNPOD_API_KEY environment variable."""
+    return config.get('runpod_api_key') or os.environ.get('RUNPOD_API_KEY')
@@ -1,60 +1,174 @@
-import requests
-from bs4 import BeautifulSoup
+import json
 import logging
+import os
+import re
+import threading
 import time
+
+import requests
 from colorama import init, Fore, Style
 
+from utils.metrics import REGISTRY
+
 # Initialize colorama
 init(autoreset=True)
 
-def fetch_runpod_pricing():
-    """Fetch current RunPod pricing from their website."""
+# GPU prices from pricing page
+DEFAULT_GPU_PRICES = {
+    'H100 NVL': 2.59,
+    'H200 SXM': 3.99,
+    'MI300X': 2.49,
+    'H100 PCIe': 1.99,
+    'H100 SXM': 2.69,
+    'A100 PCIe': 1.19,
+    'A100 SXM': 1.89,
+    'A40': 0.44,
+    'L40': 0.99,
+    'L40S': 0.79,
+    'RTX A6000': 0.44,
+    'RTX 6000 Ada': 0.74,
+    'RTX A5000': 0.22,
+    'RTX 4090': 0.34,
+    'RTX 3090': 0.22,
+    'RTX 3090 Ti': 0.27,
+    'A30': 0.22,
+    'L4': 0.43,
+    'RTX A4500': 0.19,
+    'RTX 4000 Ada': 0.20,
+    'RTX A4000': 0.17,
+    'Tesla V100': 0.19,
+    'RTX 2000 Ada': 0.28,
+    'RTX 3080': 0.17,
+}
+
+DEFAULT_STORAGE_PRICES = {
+    'idle': 0.20,
+    'running': 0.10
+}
+
+# Names runpodctl and the API use that don't normalize to a name in the table
+DEFAULT_GPU_ALIASES = {
+    'NVIDIA H100 80GB HBM3': 'H100 SXM',
+    'NVIDIA H200': 'H200 SXM',
+    'Tesla V100-SXM2-16GB': 'Tesla V100',
+    'A4000': 'RTX A4000',
+    'A4500': 'RTX A4500',
+    'A5000': 'RTX A5000',
+    'A6000': 'RTX A6000',
+}
+
+# Words that don't tell GPU models apart, and spellings of the same form factor
+_NOISE_WORDS = {'nvidia', 'geforce', 'amd', 'instinct', 'tesla', 'generation', 'oam'}
+_NOISE_PATTERN = re.compile(r'^(\d+gb|hbm\d*e?)$')
+_FORM_FACTORS = {'sxm2': 'sxm', 'sxm3': 'sxm', 'sxm4': 'sxm', 'sxm5': 'sxm'}
+
+UNPRICED_GPUS = REGISTRY.gauge('unpriced_gpu_types',
+                               'GPU names with no price in the pricing table (billed at $0)',
+                               ['gpu'])
+
+def normalize_gpu_name(name):
+    """Reduce a GPU name to a comparable key, e.g. 'NVIDIA A100-SXM4-80GB' -> 'a100 sxm'."""
+    tokens = re.split(r'[^a-z0-9]+', name.lower())
+    return ' '.join(_FORM_FACTORS.get(token, token) for token in tokens
+                    if token and token not in _NOISE_WORDS and not _NOISE_PATTERN.match(token))
+
+class PricingCatalog:
+    """Resolves the GPU names pods report to prices in a pricing table.
+    
+    Names are matched exactly, then by normalized name (case, vendor
+    words, memory size and punctuation ignored) against the table and its
+    aliases, using an index built once per table. Each distinct name is
+    resolved once and remembered, as is each (name, tier) rate. A tier
+    ('secure', 'spot', a regional table...) is a table in
+    pricing['tiers']; GPUs it doesn't list fall back to the main 'gpus'
+    prices. Names that can't be resolved are logged once and reported in
+    the unpriced_gpu_types metric.
+    """
+    
+    def __init__(self, pricing):
+        self.gpus = pricing['gpus']
+        self.tiers = pricing.get('tiers') or {}
+        self._index = {}
+        for table in [self.gpus, *self.tiers.values()]:
+            for name in table:
+                self._index.setdefault(normalize_gpu_name(name), name)
+        aliases = dict(DEFAULT_GPU_ALIASES, **(pricing.get('aliases') or {}))
+        for alias, name in aliases.items():
+            target = self._index.get(normalize_gpu_name(name))
+            if target is not None:  # Aliases of GPUs this table doesn't price are ignored
+                self._index.setdefault(normalize_gpu_name(alias), target)
+        self._resolved = {}
+        self._rates = {}
+    
+    def resolve(self, gpu):
+        """Return the table name for a reported GPU name, or None if it has no price."""
+        try:
+            return self._resolved[gpu]
+        except KeyError:
+            pass
+        if gpu in self.gpus:
+            name = gpu
+        else:
+            name = self._index.get(normalize_gpu_name(gpu))
+            if name is None:
+                logging.warning(f"No price for GPU {gpu!r}; its time is billed at $0")
+                UNPRICED_GPUS.labels(gpu).set(1)
+        self._resolved[gpu] = name
+        return name
+    
+    def rate(self, gpu, tier=None):
+        """Return the hourly price of one `gpu` in `tier` (None for the main prices)."""
+        rates = self._rates.get(tier)
+        if rates is None:
+            rates = self._rates[tier] = {}
+        rate = rates.get(gpu)
+        if rate is None:  # First time this name is priced in this tier
+            name = self.resolve(gpu)
+            tier_prices = self.tiers.get(tier) if tier is not None else None
+            if tier_prices and name in tier_prices:
+                rate = tier_prices[name]
+            else:
+                rate = self.gpus.get(name, 0)
+            rates[gpu] = rate
+        return rate
+    
+    def unresolved(self):
+        """Return the GPU names seen so far that have no price."""
+        return sorted(gpu for gpu, name in self._resolved.items() if name is None)
+
+class PriceTable(dict):
+    """A validated pricing table; `price_catalog` attaches its PricingCatalog on first use."""
+
+def price_catalog(pricing):
+    """Return the catalog of a pricing table; plain dicts get a new one every call.
+    
+    The pricing provider only hands out PriceTables, so a running monitor
+    builds one catalog per table."""
     try:
-        print(f"{Fore.CYAN}Downloading RunPod pricing information...{Style.RESET_ALL}")
-        time.sleep(0.5)
-        
-        # GPU prices from pricing page
-        gpu_prices = {
-            'H100 NVL': 2.59,
-            'H200 SXM': 3.99,
-            'MI300X': 2.49,
-            'H100 PCIe': 1.99,
-            'H100 SXM': 2.69,
-            'A100 PCIe': 1.19,
-            'A100 SXM': 1.89,
-            'A40': 0.44,
-            'L40': 0.99,
-            'L40S': 0.79,
-            'RTX A6000': 0.44,
-            'RTX 6000 Ada': 0.74,
-            'RTX A5000': 0.22,
-            'RTX 4090': 0.34,
-            'RTX 3090': 0.22,
-            'RTX 3090 Ti': 0.27,
-            'A30': 0.22,
-            'L4': 0.43,
-            'RTX A4500': 0.19,
-            'RTX 4000 Ada': 0.20,
-            'RTX A4000': 0.17,
-            'Tesla V100': 0.19,
-            'RTX 2000 Ada': 0.28,
-            'RTX 3080': 0.17,
-        }
-        
-        pricing = {
-            'gpus': gpu_prices,
-            'storage': {
-                'idle': 0.20,
-                'running': 0.10
-            }
-        }
-        
-        print(f"\n{Fore.GREEN}Pricing information downloaded successfully!{Style.RESET_ALL}")
-        time.sleep(0.5)
+        return pricing._catalog
+    except AttributeError:
+        catalog = PricingCatalog(pricing)
+        if isinstance(pricing, PriceTable):
+            pricing._catalog = catalog
+        return catalog
+
+def default_pricing():
+    """Return a copy of the built-in pricing table."""
+    return PriceTable(gpus=dict(DEFAULT_GPU_PRICES), storage=dict(DEFAULT_STORAGE_PRICES))
+
+def fetch_runpod_pricing(provider=None):
+    """Print the pricing table in use and return it.
+    
+    Shows the provider's current table if one is given, otherwise the
+    built-in estimates. Nothing is downloaded here; the provider keeps its
+    table up to date in the background."""
+    try:
+        pricing = provider.pricing if provider is not None else default_pricing()
+        source = "current pricing table" if provider is not None else "built-in price estimates"
+        print(f"{Fore.CYAN}Using the {source}.{Style.RESET_ALL}")
         
         print(f"\n{Fore.YELLOW}Current GPU Pricing (Community Cloud):{Style.RESET_ALL}")
         print(f"{Fore.YELLOW}====================================={Style.RESET_ALL}")
-        time.sleep(0.3)
         
         # Show prices in a compact format
         sorted_gpus = sorted(pricing['gpus'].items())
@@ -67,20 +181,16 @@ def fetch_runpod_pricing():
                 print(f"  {Fore.WHITE}{left:<35} | {right}{Style.RESET_ALL}")
             else:
                 print(f"  {Fore.WHITE}{left}{Style.RESET_ALL}")
-            time.sleep(0.1)
         
-        time.sleep(0.3)
         print(f"\n{Fore.YELLOW}Storage Pricing:{Style.RESET_ALL}")
         print(f"{Fore.YELLOW}================{Style.RESET_ALL}")
-        time.sleep(0.2)
         print(f"  Running pods: {Fore.GREEN}${pricing['storage']['running']:.2f}/GB/Month{Style.RESET_ALL}")
-        time.sleep(0.1)
         print(f"  Idle pods: {Fore.GREEN}${pricing['storage']['idle']:.2f}/GB/Month{Style.RESET_ALL}")
+        if pricing.get('tiers'):
+            print(f"\n{Fore.YELLOW}Price tiers:{Style.RESET_ALL} {', '.join(sorted(pricing['tiers']))}")
         
-        time.sleep(0.5)
         print(f"\n{Fore.RED}IMPORTANT:{Style.RESET_ALL} These are estimated community cloud prices.")
         print("Actual prices may vary based on:")
-        time.sleep(0.2)
         for factor in [
             "Secure cloud vs Community cloud",
             "Datacenter location",
@@ -88,14 +198,191 @@ def fetch_runpod_pricing():
             "Special promotions or discounts"
         ]:
             print(f"  {Fore.CYAN}- {factor}{Style.RESET_ALL}")
-            time.sleep(0.1)
         
-        time.sleep(0.3)
         print(f"\nPlease verify current prices at: {Fore.BLUE}https://www.runpod.io/gpu-instance/pricing{Style.RESET_ALL}")
         
         return pricing
     except Exception as e:
-        logging.error(f"Error fetching pricing: {e}")
-        print(f"\n{Fore.RED}Warning: Could not download current pricing.{Style.RESET_ALL}")
-        print(f"{Fore.YELLOW}Using cached price estimates (may be outdated).{Style.RESET_ALL}")
-        return {'gpus': {}, 'storage': {'idle': 0.20, 'running': 0.10}} 
\ No newline at end of file
+        logging.error(f"Error showing pricing: {e}")
+        print(f"\n{Fore.RED}Warning: Could not show the pricing table.{Style.RESET_ALL}")
+        print(f"{Fore.YELLOW}Falling back to storage price estimates only.{Style.RESET_ALL}")
+        return {'gpus': {}, 'storage': {'idle': 0.20, 'running': 0.10}}
+
+
+def validate_pricing(pricing):
+    """Raise ValueError unless `pricing` looks like a usable pricing table."""
+    if not isinstance(pricing, dict) or not isinstance(pricing.get('gpus'), dict):
+        raise ValueError("pricing must contain a 'gpus' table")
+    if not pricing['gpus']:
+        raise ValueError("pricing has no GPU prices")
+    tiers = pricing.get('tiers') or {}
+    if not isinstance(tiers, dict) or not all(isinstance(table, dict) for table in tiers.values()):
+        raise ValueError("pricing 'tiers' must map tier names to GPU price tables")
+    for table in [pricing['gpus'], *tiers.values()]:
+        for gpu, price in table.items():
+            if not isinstance(price, (int, float)) or price < 0:
+                raise ValueError(f"invalid price for {gpu}: {price!r}")
+    aliases = pricing.get('aliases') or {}
+    if not isinstance(aliases, dict) or not all(isinstance(name, str) for name in aliases.values()):
+        raise ValueError("pricing 'aliases' must map GPU names to names in the table")
+    storage = pricing.get('storage') or {}
+    table = PriceTable(
+        gpus={gpu: float(price) for gpu, price in pricing['gpus'].items()},
+        storage={
+            'idle': float(storage.get('idle', DEFAULT_STORAGE_PRICES['idle'])),
+            'running': float(storage.get('running', DEFAULT_STORAGE_PRICES['running']))
+        }
+    )
+    if tiers:
+        table['tiers'] = {tier: {gpu: float(price) for gpu, price in prices.items()}
+                          for tier, prices in tiers.items()}
+    if aliases:
+        table['aliases'] = dict(aliases)
+    return table
+
+class StaticPriceSource:
+    """Price source that always returns the built-in table."""
+    
+    def fetch(self, validators=None):
+        """Return (pricing, validators); pricing is None if unchanged."""
+        if validators and validators.get('etag') == 'builtin':
+            return None, validators
+        return default_pricing(), {'etag': 'builtin'}
+
+class HttpPriceSource:
+    """Price source that downloads a JSON pricing table with conditional requests.
+    
+    The URL must serve {"gpus": {...}, "storage": {...}}. ETag and
+    Last-Modified from the previous response are sent back, so an unchanged
+    table costs a 304 instead of a full download."""
+    
+    def __init__(self, url, timeout=10):
+        self.url = url
+        self.timeout = timeout
+        self.session = requests.Session()
+    
+    def fetch(self, validators=None):
+        """Return (pricing, validators); pricing is None if unchanged."""
+        validators = validators or {}
+        headers = {}
+        if validators.get('etag'):
+            headers['If-None-Match'] = validators['etag']
+        if validators.get('last_modified'):
+            headers['If-Modified-Since'] = validators['last_modified']
+        
+        response = self.session.get(self.url, headers=headers, timeout=self.timeout)
+        if response.status_code == 304:
+            return None, validators
+        response.raise_for_status()
+        return response.json(), {
+            'etag': response.headers.get('ETag'),
+            'last_modified': response.headers.get('Last-Modified')
+        }
+
+class PricingProvider:
+    """Serves the current pricing table and keeps it fresh in the background.
+    
+    On start the last on-disk snapshot (or the built-in table) is served
+    immediately. If the snapshot is older than `ttl_seconds`, a refresh runs
+    in a background thread, and refreshes repeat every `ttl_seconds`. A new
+    table replaces the old one in a single reference swap, so readers of
+    `pricing` always see a complete table."""
+    
+    def __init__(self, source, cache_path, ttl_seconds=24 * 3600):
+        self.source = source
+        self.cache_path = cache_path
+        self.ttl_seconds = ttl_seconds
+        self._pricing = default_pricing()
+        self._validators = {}
+        self._fetched_at = 0
+        self._stop = threading.Event()
+        self._refresh_lock = threading.Lock()
+        self._thread = None
+    
+    @property
+    def pricing(self):
+        """The current pricing table. Treat it as read-only."""
+        return self._pricing
+    
+    @property
+    def age_seconds(self):
+        """Seconds since the current table was fetched."""
+        return time.time() - self._fetched_at
+    
+    def load_snapshot(self):
+        """Load the on-disk snapshot. Returns False if there is none or it is unusable."""
+        try:
+            with open(self.cache_path, 'r') as f:
+                snapshot = json.load(f)
+            self._use(validate_pricing(snapshot['pricing']))
+            self._validators = snapshot.get('validators') or {}
+            self._fetched_at = snapshot.get('fetched_at', 0)
+            return True
+        except FileNotFoundError:
+            return False
+        except (ValueError, KeyError, TypeError) as e:
+            logging.warning(f"Ignoring unusable pricing snapshot {self.cache_path}: {e}")
+            return False
+    
+    def start(self):
+        """Serve the snapshot now and start refreshing in the background."""
+        self.load_snapshot()
+        self._thread = threading.Thread(target=self._run, name='pricing-refresh', daemon=True)
+        self._thread.start()
+        return self
+    
+    def stop(self):
+        """Stop background refreshes."""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+    
+    def refresh(self):
+        """Fetch from the source now. Returns True if a new table was swapped in."""
+        with self._refresh_lock:
+            try:
+                pricing, validators = self.source.fetch(self._validators)
+                if pricing is not None:
+                    pricing = validate_pricing(pricing)
+            except Exception as e:
+                logging.error(f"Error refreshing pricing: {e}")
+                return False
+            
+            self._validators = validators or {}
+            self._fetched_at = time.time()
+            if pricing is not None:
+                self._use(pricing)
+                logging.info(f"Pricing table refreshed ({len(pricing['gpus'])} GPU types)")
+            self._save_snapshot()
+            return pricing is not None
+    
+    def _use(self, pricing):
+        self._pricing = pricing
+        UNPRICED_GPUS.clear()  # The new table's catalog reports its own misses
+    
+    def _run(self):
+        delay = max(self.ttl_seconds - self.age_seconds, 0)
+        while not self._stop.wait(delay):
+            self.refresh()
+            delay = self.ttl_seconds
+    
+    def _save_snapshot(self):
+        snapshot = {
+            'fetched_at': self._fetched_at,
+            'validators': self._validators,
+            'pricing': self._pricing
+        }
+        tmp_path = self.cache_path + '.tmp'
+        try:
+            with open(tmp_path, 'w') as f:
+                json.dump(snapshot, f, indent=4)
+            os.replace(tmp_path, self.cache_path)
+        except OSError as e:
+            logging.error(f"Error saving pricing snapshot: {e}")
+
+def create_pricing_provider(config, cache_path):
+    """Create and start a pricing provider from config['pricing_url'] and TTL settings."""
+    url = config.get('pricing_url')
+    source = HttpPriceSource(url) if url else StaticPriceSource()
+    ttl_seconds = config.get('pricing_ttl_hours', 24) * 3600
+    return PricingProvider(source, cache_path, ttl_seconds).start()
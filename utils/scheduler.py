@@ -0,0 +1,76 @@
+import math
+import time
+
+
+class TickScheduler:
+    """Works out when the next status check should run.
+
+    Without pending deadlines, ticks land on a fixed grid of `max_interval`
+    seconds measured on a monotonic clock from the first tick, so the time a
+    tick takes doesn't push later ticks back. Deadlines added during a tick
+    (a shutdown threshold, a cooldown expiry, ...) pull the next wake-up
+    forward to just after the earliest one, but never closer than
+    `min_interval` to the start of the current tick.
+    """
+
+    def __init__(self, max_interval, min_interval=10, slack_seconds=1.0,
+                 clock=time.monotonic, sleep=time.sleep):
+        self.max_interval = max_interval
+        self.min_interval = min(min_interval, max_interval)
+        self.slack_seconds = slack_seconds
+        self.clock = clock
+        self._sleep = sleep
+        self._anchor = None
+        self._tick_start = None
+        self._deadline = None
+        self._planned = None
+        self.lag = 0.0
+
+    def start_tick(self):
+        """Mark the start of a tick and clear the previous tick's deadlines.
+
+        `lag` is set to how late this tick started compared with the
+        wake-up planned by the last `sleep`."""
+        self._tick_start = self.clock()
+        if self._anchor is None:
+            self._anchor = self._tick_start
+        if self._planned is not None:
+            self.lag = max(self._tick_start - self._planned, 0.0)
+        self._deadline = None
+
+    def elapsed(self):
+        """Return the seconds since the current tick started."""
+        if self._tick_start is None:
+            return 0.0
+        return self.clock() - self._tick_start
+
+    def add_deadline(self, seconds_from_now):
+        """Ask for a tick shortly after `seconds_from_now` seconds. Ignores None."""
+        if seconds_from_now is None:
+            return
+        deadline = self.clock() + max(seconds_from_now, 0)
+        if self._deadline is None or deadline < self._deadline:
+            self._deadline = deadline
+
+    def next_wakeup(self):
+        """Return the monotonic time the next tick should start."""
+        if self._tick_start is None:
+            self.start_tick()
+        elapsed = self._tick_start - self._anchor
+        grid = self._anchor + (math.floor(elapsed / self.max_interval) + 1) * self.max_interval
+
+        wakeup = grid
+        if self._deadline is not None:
+            wakeup = min(wakeup, self._deadline + self.slack_seconds)
+        return max(wakeup, self._tick_start + self.min_interval)
+
+    def seconds_until_next(self):
+        """Return how long to wait before the next tick."""
+        return max(self.next_wakeup() - self.clock(), 0)
+
+    def sleep(self):
+        """Sleep until the next tick is due."""
+        self._planned = self.next_wakeup()
+        delay = self.seconds_until_next()
+        if delay > 0:
+            self._sleep(delay)
@@ -0,0 +1,81 @@
+import logging
+import mmap
+import os
+import pickle
+import struct
+import zlib
+
+from utils.records import HistoryRecord
+
+_MAGIC = b'RPMS'
+_VERSION = 1
+_HEADER = struct.Struct('<4sHIQ')  # magic, version, CRC-32 and length of the payload
+
+
+class _PlainUnpickler(pickle.Unpickler):
+    """Unpickler that only builds plain data, so a snapshot can't run code."""
+
+    def find_class(self, module, name):
+        raise pickle.UnpicklingError(f"state snapshots hold plain data only, not {module}.{name}")
+
+
+def save_state(path, state):
+    """Write `state` (plain dicts, lists, tuples, strings and numbers) atomically."""
+    payload = pickle.dumps(state, protocol=pickle.HIGHEST_PROTOCOL)
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'wb') as f:
+        f.write(_HEADER.pack(_MAGIC, _VERSION, zlib.crc32(payload), len(payload)))
+        f.write(payload)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+
+
+def load_state(path):
+    """Load a snapshot written by `save_state`, or None if it is missing or unusable.
+
+    The file is memory-mapped and unpickled in place after its checksum is
+    verified, so a damaged or truncated snapshot is never half applied."""
+    try:
+        with open(path, 'rb') as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as data:
+            magic, version, crc, length = _HEADER.unpack_from(data)
+            if magic != _MAGIC or version != _VERSION:
+                raise ValueError("not a state snapshot of this version")
+            if len(data) != _HEADER.size + length:
+                raise ValueError("truncated")
+            with memoryview(data) as view:
+                if zlib.crc32(view[_HEADER.size:]) != crc:
+                    raise ValueError("checksum mismatch")
+            data.seek(_HEADER.size)
+            return _PlainUnpickler(data).load()
+    except FileNotFoundError:
+        return None
+    except (OSError, ValueError, EOFError, struct.error, pickle.UnpicklingError) as e:
+        logging.warning(f"Ignoring unusable state snapshot {path}: {e}")
+        return None
+
+
+def fingerprint(paths):
+    """Return (size, mtime) for each path (None if missing), to tell if files changed."""
+    stamps = []
+    for path in paths:
+        try:
+            stat = os.stat(path)
+            stamps.append((stat.st_size, stat.st_mtime_ns))
+        except FileNotFoundError:
+            stamps.append(None)
+    return stamps
+
+
+def encode_history(history):
+    """Return history as plain data: pod records become tuples in __slots__ order."""
+    return {
+        'meta': {key: value for key, value in history.items() if key != 'pods'},
+        'pods': {pod_id: record.to_tuple() for pod_id, record in history['pods'].items()},
+    }
+
+
+def decode_history(data):
+    history = dict(data['meta'])
+    history['pods'] = {pod_id: HistoryRecord(*values) for pod_id, values in data['pods'].items()}
+    return history
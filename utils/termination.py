@@ -0,0 +1,161 @@
+import logging
+import threading
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
+
+TerminationResult = namedtuple('TerminationResult',
+                               ['pod_id', 'success', 'attempts', 'error', 'context'])
+
+
+class TerminationExecutor:
+    """Terminates pods in a bounded worker pool with retries and confirmation.
+
+    `terminate` is called with a pod id and returns True on success. If
+    `pod_exists` is given, it is polled after a successful call until the pod
+    is gone; a pod that is still listed counts as a failed attempt. Failed
+    attempts are retried with exponential backoff. A pod is never submitted
+    twice while a kill is in flight, or again once it has been confirmed
+    terminated while it is still listed (see `retain`). Finished kills are collected with `drain_results`.
+
+    With `terminate_many` (a list of pod ids -> {pod_id: success}), pods
+    submitted together are held until `flush` and their first attempt is
+    one batched call; confirmation and retries then go per pod as usual.
+    """
+
+    def __init__(self, terminate, pod_exists=None, max_workers=4, max_attempts=4,
+                 backoff_seconds=5, confirm_attempts=3, confirm_interval_seconds=2,
+                 terminate_many=None):
+        self.terminate = terminate
+        self.terminate_many = terminate_many
+        self.pod_exists = pod_exists
+        self.max_attempts = max_attempts
+        self.backoff_seconds = backoff_seconds
+        self.confirm_attempts = confirm_attempts
+        self.confirm_interval_seconds = confirm_interval_seconds
+        self._executor = ThreadPoolExecutor(max_workers=max_workers,
+                                            thread_name_prefix='terminate')
+        self._lock = threading.Lock()
+        self._in_flight = set()
+        self._terminated = set()
+        self._results = []
+        self._batch = []
+        self._stopping = threading.Event()
+
+    def submit(self, pod_id, context=None):
+        """Queue a pod for termination. Returns False if it is already handled."""
+        with self._lock:
+            if pod_id in self._in_flight or pod_id in self._terminated:
+                return False
+            self._in_flight.add(pod_id)
+            if self.terminate_many is not None:
+                self._batch.append((pod_id, context))
+                return True
+        self._executor.submit(self._run, pod_id, context)
+        return True
+
+    def flush(self):
+        """Start the kills held for batching since the last flush."""
+        with self._lock:
+            batch, self._batch = self._batch, []
+        if len(batch) == 1:
+            self._executor.submit(self._run, *batch[0])
+        elif batch:
+            self._executor.submit(self._run_batch, batch)
+
+    def is_pending(self, pod_id):
+        """Return True if a kill for this pod is in flight."""
+        with self._lock:
+            return pod_id in self._in_flight
+
+    def pending(self):
+        """Return the ids of pods with a kill in flight."""
+        with self._lock:
+            return set(self._in_flight)
+
+    def retain(self, pod_ids):
+        """Forget confirmed kills of pods that are no longer listed."""
+        with self._lock:
+            self._terminated.intersection_update(pod_ids)
+
+    def drain_results(self):
+        """Return and clear the results of kills finished since the last call."""
+        with self._lock:
+            results, self._results = self._results, []
+        return results
+
+    def shutdown(self, wait=True):
+        """Stop retrying and wait for running kills to finish."""
+        self.flush()
+        self._stopping.set()
+        self._executor.shutdown(wait=wait)
+
+    def _run_batch(self, batch):
+        pod_ids = [pod_id for pod_id, _ in batch]
+        try:
+            outcomes = self.terminate_many(pod_ids)
+        except Exception as e:
+            logging.error(f"Error terminating pods {', '.join(pod_ids)}: {e}")
+            outcomes = {}
+        for pod_id, context in batch:
+            first = bool(outcomes.get(pod_id))
+            try:
+                self._executor.submit(self._run, pod_id, context, first)
+            except RuntimeError:  # Shutting down: finish here instead
+                self._run(pod_id, context, first)
+
+    def _run(self, pod_id, context, first=None):
+        # `first` is the outcome of a batched first attempt, if there was one
+        error = None
+        attempt = 0
+        success = False
+        # Shutting down stops retries, but the first attempt (which a batch
+        # may already have made) is always seen through and recorded
+        while attempt < self.max_attempts:
+            if attempt:
+                delay = self.backoff_seconds * 2 ** (attempt - 1)
+                logging.info(f"Retrying termination of pod {pod_id} in {delay}s")
+                if self._stopping.wait(delay):
+                    break
+            attempt += 1
+            try:
+                if first is not None and attempt == 1:
+                    terminated = first
+                else:
+                    terminated = self.terminate(pod_id)
+                if not terminated:
+                    error = 'terminate call failed'
+                    continue
+                if not self._confirm(pod_id):
+                    error = 'pod still listed after termination'
+                    continue
+                success = True
+                break
+            except Exception as e:
+                error = str(e)
+                logging.error(f"Error terminating pod {pod_id} (attempt {attempt}): {e}")
+
+        with self._lock:
+            self._in_flight.discard(pod_id)
+            if success:
+                self._terminated.add(pod_id)
+            self._results.append(TerminationResult(pod_id, success, attempt,
+                                                   None if success else error, context))
+        if not success:
+            logging.error(f"Giving up on terminating pod {pod_id} after {attempt} attempts: {error}")
+
+    def _confirm(self, pod_id):
+        if self.pod_exists is None:
+            return True
+        exists = None
+        for check in range(self.confirm_attempts):
+            if check and self._stopping.wait(self.confirm_interval_seconds):
+                exists = None  # Shutting down; don't keep polling
+                break
+            exists = self.pod_exists(pod_id)
+            if exists is False:
+                return True
+        if exists is None:
+            # The source couldn't tell either way; trust the successful terminate call
+            logging.warning(f"Could not confirm termination of pod {pod_id}")
+            return True
+        return False
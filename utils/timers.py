@@ -0,0 +1,118 @@
+import heapq
+import itertools
+
+
+class TimerIndex:
+    """Min-heap of per-pod timers keyed by due time (epoch seconds).
+
+    Each pod has at most one timer per kind, e.g. 'notify', 'shutdown' or
+    'reminder'. Rescheduling or cancelling marks the old heap entry dead
+    instead of searching for it; dead entries are dropped as they reach the
+    top of the heap or when the heap is rebuilt.
+    """
+
+    def __init__(self):
+        self._heap = []
+        self._entries = {}
+        self._by_pod = {}
+        self._counter = itertools.count()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __contains__(self, key):
+        return key in self._entries
+
+    def due_time(self, kind, pod_id):
+        """Return when the timer is due, or None if it isn't scheduled."""
+        entry = self._entries.get((kind, pod_id))
+        return entry[0] if entry else None
+
+    def schedule(self, kind, pod_id, due, tolerance=0):
+        """Set a timer, replacing any existing one of the same kind for the pod.
+
+        An existing timer within `tolerance` seconds of `due` is left alone.
+        Returns True if the index changed."""
+        key = (kind, pod_id)
+        entry = self._entries.get(key)
+        if entry is not None:
+            if abs(entry[0] - due) <= tolerance:
+                return False
+            entry[-1] = False
+
+        entry = [due, next(self._counter), kind, pod_id, True]
+        heapq.heappush(self._heap, entry)
+        self._entries[key] = entry
+        self._by_pod.setdefault(pod_id, set()).add(kind)
+        self._maybe_rebuild()
+        return True
+
+    def load(self, items):
+        """Schedule (kind, pod_id, due) timers in bulk, building the heap in one pass."""
+        for kind, pod_id, due in items:
+            key = (kind, pod_id)
+            entry = self._entries.get(key)
+            if entry is not None:
+                entry[-1] = False
+            entry = [due, next(self._counter), kind, pod_id, True]
+            self._heap.append(entry)
+            self._entries[key] = entry
+            self._by_pod.setdefault(pod_id, set()).add(kind)
+        heapq.heapify(self._heap)
+        self._maybe_rebuild()
+
+    def cancel(self, kind, pod_id):
+        """Remove a timer if it is scheduled."""
+        entry = self._entries.pop((kind, pod_id), None)
+        if entry is None:
+            return False
+        entry[-1] = False
+        kinds = self._by_pod.get(pod_id)
+        if kinds is not None:
+            kinds.discard(kind)
+            if not kinds:
+                del self._by_pod[pod_id]
+        return True
+
+    def retain(self, kinds, pod_ids):
+        """Cancel timers of the given kinds for pods not in `pod_ids`."""
+        removed = 0
+        for pod_id in self._by_pod.keys() - set(pod_ids):
+            for kind in self._by_pod[pod_id] & set(kinds):
+                removed += self.cancel(kind, pod_id)
+        return removed
+
+    def pop_due(self, now, kinds=None):
+        """Remove and return (kind, pod_id, due) for every timer due at or before `now`.
+
+        If `kinds` is given, due timers of other kinds stay scheduled."""
+        due = []
+        skipped = []
+        while self._heap and self._heap[0][0] <= now:
+            entry = heapq.heappop(self._heap)
+            if not entry[-1]:
+                continue
+            if kinds is not None and entry[2] not in kinds:
+                skipped.append(entry)
+                continue
+            self.cancel(entry[2], entry[3])
+            due.append((entry[2], entry[3], entry[0]))
+        for entry in skipped:
+            heapq.heappush(self._heap, entry)
+        return due
+
+    def next_due(self):
+        """Return the earliest due time, or None if nothing is scheduled."""
+        while self._heap and not self._heap[0][-1]:
+            heapq.heappop(self._heap)
+        return self._heap[0][0] if self._heap else None
+
+    def items(self):
+        """Return (kind, pod_id, due) for every scheduled timer."""
+        return [(kind, pod_id, entry[0]) for (kind, pod_id), entry in self._entries.items()]
+
+    def _maybe_rebuild(self):
+        # Keep dead entries from piling up when timers are rescheduled often
+        if len(self._heap) > 2 * len(self._entries) + 64:
+            self._heap = [entry for entry in self._heap if entry[-1]]
+            heapq.heapify(self._heap)
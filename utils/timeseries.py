@@ -0,0 +1,370 @@
+import json
+import logging
+import os
+import struct
+import sys
+from array import array
+from collections import OrderedDict
+
+RESOLUTIONS = {'1m': 60, '1h': 3600, '1d': 86400}
+
+_MAGIC = b'RPTS'
+_VERSION = 1
+_HEADER = struct.Struct('<4sHI')  # magic, version, JSON index length
+
+# Rollup buckets keep these columns; the raw ring keeps (ts, value)
+_ROLLUP_FIELDS = ('ts', 'count', 'sum', 'min', 'max', 'last')
+_AGGREGATES = ('mean', 'min', 'max', 'sum', 'last', 'count')
+
+# Rough size of a series' Python objects (arrays, dicts, open buckets), counted
+# against the memory limit so many small series can't slip under it
+_SERIES_OVERHEAD = 2048
+
+
+class _Ring:
+    """Fixed-capacity ring of float rows stored column-wise in arrays.
+
+    Columns grow until `capacity` rows are held, then the oldest row is
+    overwritten. Rows are expected in timestamp order (column 0)."""
+    __slots__ = ('capacity', 'columns', 'start')
+
+    def __init__(self, capacity, width):
+        self.capacity = capacity
+        self.columns = [array('d') for _ in range(width)]
+        self.start = 0
+
+    def __len__(self):
+        return len(self.columns[0])
+
+    def append(self, row):
+        """Add a row. Returns the number of bytes the ring grew by."""
+        if len(self.columns[0]) < self.capacity:
+            for column, value in zip(self.columns, row):
+                column.append(value)
+            return 8 * len(self.columns)
+        for column, value in zip(self.columns, row):
+            column[self.start] = value
+        self.start = (self.start + 1) % self.capacity
+        return 0
+
+    def nbytes(self):
+        return 8 * len(self.columns) * len(self)
+
+    def row(self, i):
+        index = (self.start + i) % len(self)
+        return tuple(column[index] for column in self.columns)
+
+    def first_ts(self):
+        return self.columns[0][self.start] if len(self) else None
+
+    def last_ts(self):
+        return self.columns[0][self.start - 1] if len(self) else None
+
+    def bisect(self, ts):
+        """Return the logical index of the first row with timestamp >= ts."""
+        times, size, start = self.columns[0], len(self), self.start
+        lo, hi = 0, size
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if times[(start + mid) % size] < ts:
+                lo = mid + 1
+            else:
+                hi = mid
+        return lo
+
+    def rows(self, start=None, end=None):
+        """Yield rows with start <= ts <= end, oldest first."""
+        size = len(self)
+        i = self.bisect(start) if start is not None else 0
+        times = self.columns[0]
+        while i < size:
+            index = (self.start + i) % size
+            if end is not None and times[index] > end:
+                break
+            yield tuple(column[index] for column in self.columns)
+            i += 1
+
+    def ordered(self):
+        """Return the columns rotated into logical order."""
+        return [column[self.start:] + column[:self.start] for column in self.columns]
+
+
+class _Rollup:
+    """Downsamples samples into fixed-width buckets of count/sum/min/max/last."""
+    __slots__ = ('width', 'ring', 'open')
+
+    def __init__(self, width, capacity):
+        self.width = width
+        self.ring = _Ring(capacity, len(_ROLLUP_FIELDS))
+        self.open = None
+
+    def add(self, ts, value):
+        bucket = ts - ts % self.width
+        grown = 0
+        current = self.open
+        if current is not None and current[0] != bucket:
+            grown = self.ring.append(current)
+            current = None
+        if current is None:
+            self.open = [bucket, 1, value, value, value, value]
+        else:
+            current[1] += 1
+            current[2] += value
+            if value < current[3]:
+                current[3] = value
+            if value > current[4]:
+                current[4] = value
+            current[5] = value
+        return grown
+
+    def rows(self, start=None, end=None):
+        if start is not None:
+            start -= start % self.width
+        yield from self.ring.rows(start, end)
+        if self.open is not None and (start is None or self.open[0] >= start) \
+                and (end is None or self.open[0] <= end):
+            yield tuple(self.open)
+
+    def first_ts(self):
+        first = self.ring.first_ts()
+        if first is None and self.open is not None:
+            return self.open[0]
+        return first
+
+
+class Series:
+    """Raw samples for one metric plus its 1m/1h/1d rollups."""
+    __slots__ = ('raw', 'rollups')
+
+    def __init__(self, raw_capacity, rollup_capacities):
+        self.raw = _Ring(raw_capacity, 2)
+        self.rollups = {name: _Rollup(RESOLUTIONS[name], capacity)
+                        for name, capacity in rollup_capacities.items()}
+
+    def add(self, ts, value):
+        grown = self.raw.append((ts, value))
+        for rollup in self.rollups.values():
+            grown += rollup.add(ts, value)
+        return grown
+
+    def nbytes(self):
+        return (_SERIES_OVERHEAD + self.raw.nbytes()
+                + sum(r.ring.nbytes() for r in self.rollups.values()))
+
+
+class TimeSeriesStore:
+    """In-memory time series of per-tick samples in fixed-size ring buffers.
+
+    Every sample goes into the series' raw ring and into each rollup as it
+    arrives, so downsampling costs O(1) per sample. Memory use is bounded
+    by `max_bytes`: when it is exceeded, the series updated least recently
+    (typically those of pods that are gone) are dropped first. Series
+    sampled at the current or previous timestamp are never dropped, so a
+    fleet too big for the limit goes over it (with a warning) instead of
+    dropping and rebuilding its live series every tick.
+    """
+
+    def __init__(self, max_bytes=32 * 1024 * 1024, raw_capacity=720,
+                 rollup_capacities=None):
+        self.max_bytes = max_bytes
+        self.raw_capacity = raw_capacity
+        self.rollup_capacities = rollup_capacities or {'1m': 1440, '1h': 24 * 31, '1d': 366}
+        self._series = OrderedDict()
+        self._bytes = 0
+        self._ts = self._prev_ts = None  # Latest and previous sample timestamps
+        self._over_limit = False  # Warned that live series alone exceed max_bytes
+
+    def __contains__(self, name):
+        return name in self._series
+
+    def __len__(self):
+        return len(self._series)
+
+    @property
+    def nbytes(self):
+        """Approximate bytes held by all series."""
+        return self._bytes
+
+    def names(self, prefix=''):
+        """Return the names of series starting with `prefix`."""
+        return [name for name in self._series if name.startswith(prefix)]
+
+    def add(self, name, ts, value):
+        """Record a sample for a series, creating the series if needed."""
+        if ts != self._ts:
+            self._prev_ts, self._ts = self._ts, ts
+        series = self._series.get(name)
+        if series is None:
+            series = self._series[name] = Series(self.raw_capacity, self.rollup_capacities)
+            grown = _SERIES_OVERHEAD
+        else:
+            self._series.move_to_end(name)
+            grown = 0
+        grown += series.add(ts, float(value))
+        if grown:
+            self._bytes += grown
+            if self._bytes > self.max_bytes:
+                self._evict(live_since=ts if self._prev_ts is None else self._prev_ts)
+
+    def add_many(self, ts, samples):
+        """Record samples for several series from a {name: value} mapping."""
+        for name, value in samples.items():
+            self.add(name, ts, value)
+
+    def drop(self, name):
+        series = self._series.pop(name, None)
+        if series is not None:
+            self._bytes -= series.nbytes()
+
+    def latest(self, name):
+        """Return the most recent (ts, value), or None."""
+        series = self._series.get(name)
+        if series is None or not len(series.raw):
+            return None
+        return series.raw.row(len(series.raw) - 1)
+
+    def range(self, name, start=None, end=None, resolution=None, field='mean'):
+        """Return [(ts, value)] for a series between `start` and `end`.
+
+        `resolution` is 'raw', '1m', '1h' or '1d'; by default the finest one
+        that still reaches back to `start` is used. For rollups, `field`
+        picks the bucket value: mean, min, max, sum, last or count."""
+        series = self._series.get(name)
+        if series is None:
+            return []
+        resolution = resolution or self._pick_resolution(series, start)
+        if resolution == 'raw':
+            return list(series.raw.rows(start, end))
+        if field not in _AGGREGATES:
+            raise ValueError(f"Unknown field: {field}")
+        return [(row[0], _bucket_value(row, field))
+                for row in series.rollups[resolution].rows(start, end)]
+
+    def aggregate(self, name, start=None, end=None, fn='mean', resolution=None):
+        """Aggregate a series over a time range. Returns None if there is no data."""
+        if fn not in _AGGREGATES:
+            raise ValueError(f"Unknown aggregate: {fn}")
+        series = self._series.get(name)
+        if series is None:
+            return None
+        resolution = resolution or self._pick_resolution(series, start)
+        if resolution == 'raw':
+            rows = [(ts, 1, value, value, value, value) for ts, value in series.raw.rows(start, end)]
+        else:
+            rows = list(series.rollups[resolution].rows(start, end))
+        if not rows:
+            return None
+        if fn == 'count':
+            return sum(row[1] for row in rows)
+        if fn == 'sum':
+            return sum(row[2] for row in rows)
+        if fn == 'mean':
+            return sum(row[2] for row in rows) / sum(row[1] for row in rows)
+        if fn == 'min':
+            return min(row[3] for row in rows)
+        if fn == 'max':
+            return max(row[4] for row in rows)
+        return rows[-1][5]
+
+    def _pick_resolution(self, series, start):
+        if start is None:
+            return 'raw'
+        first = series.raw.first_ts()
+        if first is not None and first <= start:
+            return 'raw'
+        for name in sorted(series.rollups, key=RESOLUTIONS.get):
+            first = series.rollups[name].first_ts()
+            if first is not None and first <= start:
+                return name
+        return max(series.rollups, key=RESOLUTIONS.get) if series.rollups else 'raw'
+
+    def _evict(self, live_since=None):
+        # Series are in update order, so once the oldest was sampled at or
+        # after `live_since` every series left is live
+        while self._bytes > self.max_bytes and len(self._series) > 1:
+            name, series = next(iter(self._series.items()))
+            last = series.raw.last_ts()
+            if live_since is not None and last is not None and last >= live_since:
+                if not self._over_limit:
+                    logging.warning(f"Time series of listed pods need "
+                                    f"{self._bytes / 2 ** 20:.0f} MB, over the "
+                                    f"{self.max_bytes / 2 ** 20:.0f} MB limit; "
+                                    f"raise timeseries_max_mb")
+                    self._over_limit = True
+                return
+            self.drop(name)
+            logging.debug(f"Dropped time series {name} to stay within memory limit")
+        self._over_limit = False
+
+    def save(self, path):
+        """Write all series to a compact binary file (atomically)."""
+        index = []
+        blobs = []
+        for name, series in self._series.items():
+            entry = {'name': name, 'raw': len(series.raw), 'rollups': {}}
+            blobs.extend(series.raw.ordered())
+            for res, rollup in series.rollups.items():
+                entry['rollups'][res] = {'size': len(rollup.ring), 'open': rollup.open}
+                blobs.extend(rollup.ring.ordered())
+            index.append(entry)
+        header = json.dumps({'byteorder': sys.byteorder, 'series': index},
+                            separators=(',', ':')).encode('utf-8')
+
+        tmp_path = path + '.tmp'
+        with open(tmp_path, 'wb') as f:
+            f.write(_HEADER.pack(_MAGIC, _VERSION, len(header)))
+            f.write(header)
+            for blob in blobs:
+                blob.tofile(f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+
+    def load(self, path):
+        """Load series saved with `save`. Missing or unreadable files are ignored."""
+        try:
+            with open(path, 'rb') as f:
+                magic, version, header_len = _HEADER.unpack(f.read(_HEADER.size))
+                if magic != _MAGIC or version != _VERSION:
+                    raise ValueError("not a time series file")
+                header = json.loads(f.read(header_len))
+                swap = header['byteorder'] != sys.byteorder
+
+                def read(count):
+                    column = array('d')
+                    column.fromfile(f, count)
+                    if swap:
+                        column.byteswap()
+                    return column
+
+                for entry in header['series']:
+                    series = Series(self.raw_capacity, self.rollup_capacities)
+                    _fill(series.raw, [read(entry['raw']) for _ in range(2)])
+                    for res, saved in entry['rollups'].items():
+                        columns = [read(saved['size']) for _ in _ROLLUP_FIELDS]
+                        rollup = series.rollups.get(res)
+                        if rollup is not None:
+                            _fill(rollup.ring, columns)
+                            rollup.open = saved['open']
+                    self.drop(entry['name'])
+                    self._series[entry['name']] = series
+                    self._bytes += series.nbytes()
+        except FileNotFoundError:
+            return
+        except (OSError, ValueError, KeyError, EOFError, struct.error) as e:
+            logging.warning(f"Could not load time series from {path}: {e}")
+        if self._bytes > self.max_bytes:
+            self._evict()
+
+
+def _fill(ring, columns):
+    """Load saved columns into a ring, keeping the newest rows if it got smaller."""
+    keep = min(len(columns[0]), ring.capacity)
+    ring.columns = [column[len(column) - keep:] for column in columns]
+    ring.start = 0
+
+
+def _bucket_value(row, field):
+    if field == 'mean':
+        return row[2] / row[1]
+    return row[_ROLLUP_FIELDS.index(field)]
@@ -0,0 +1,186 @@
+import cProfile
+import io
+import json
+import os
+import pstats
+import threading
+import time
+from collections import deque
+
+
+class _NullSpan:
+    """Span used while tracing is off; entering and leaving it does nothing."""
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+_NULL_SPAN = _NullSpan()
+
+
+class _Span:
+    __slots__ = ('tracer', 'name', 'args', 'start')
+
+    def __init__(self, tracer, name, args):
+        self.tracer = tracer
+        self.name = name
+        self.args = args
+
+    def __enter__(self):
+        self.start = time.perf_counter_ns()
+        return self
+
+    def __exit__(self, *exc):
+        self.tracer._record(self.name, self.start, time.perf_counter_ns() - self.start, self.args)
+        return False
+
+
+class Tracer:
+    """Times named stages and keeps them as Chrome trace events.
+
+    `span(name)` is used as a context manager around a stage. While the
+    tracer is disabled it returns a shared no-op object, so instrumented
+    code costs one method call per stage. The newest `max_events` spans are
+    kept for export; per-stage totals cover everything since `reset`.
+    """
+
+    def __init__(self, enabled=False, max_events=200000):
+        self.enabled = enabled
+        self._events = deque(maxlen=max_events)
+        self._totals = {}
+        self._thread_names = {}
+        self._lock = threading.Lock()
+        self._origin = time.perf_counter_ns()
+        self._pid = os.getpid()
+
+    def span(self, name, **args):
+        if not self.enabled:
+            return _NULL_SPAN
+        return _Span(self, name, args)
+
+    def _record(self, name, start, duration, args):
+        thread = threading.current_thread()
+        event = {'name': name, 'ph': 'X', 'pid': self._pid, 'tid': thread.ident,
+                 'ts': (start - self._origin) / 1000, 'dur': duration / 1000}
+        if args:
+            event['args'] = args
+        with self._lock:
+            self._thread_names[thread.ident] = thread.name  # Worker threads may be gone by export
+            self._events.append(event)
+            total = self._totals.get(name)
+            if total is None:
+                self._totals[name] = [1, duration, duration]
+            else:
+                total[0] += 1
+                total[1] += duration
+                if duration > total[2]:
+                    total[2] = duration
+
+    def stage_totals(self):
+        """Return {stage: (count, total_seconds, max_seconds)}."""
+        with self._lock:
+            return {name: (count, total / 1e9, longest / 1e9)
+                    for name, (count, total, longest) in self._totals.items()}
+
+    def reset(self):
+        with self._lock:
+            self._events.clear()
+            self._totals = {}
+
+    def export(self, path):
+        """Write the recorded spans as a Chrome trace (open in Perfetto or chrome://tracing)."""
+        with self._lock:
+            events = list(self._events)
+            thread_names = dict(self._thread_names)
+        metadata = [{'name': 'thread_name', 'ph': 'M', 'pid': self._pid, 'tid': tid,
+                     'args': {'name': name}} for tid, name in thread_names.items()]
+        tmp_path = path + '.tmp'
+        with open(tmp_path, 'w') as f:
+            json.dump({'traceEvents': metadata + events, 'displayTimeUnit': 'ms'}, f)
+        os.replace(tmp_path, path)
+
+
+def format_stage_totals(totals):
+    """Render stage totals as a table, slowest first."""
+    lines = [f"{'stage':<28} {'count':>7} {'total s':>10} {'mean ms':>10} {'max ms':>10}"]
+    for name, (count, total, longest) in sorted(totals.items(), key=lambda item: -item[1][1]):
+        lines.append(f"{name:<28} {count:>7} {total:>10.3f} {total / count * 1000:>10.2f} "
+                     f"{longest * 1000:>10.2f}")
+    return '\n'.join(lines)
+
+
+class TickProfiler:
+    """Runs cProfile over the next `ticks` status checks and writes a report.
+
+    The report goes to `output_dir`: profile.pstats for further analysis
+    (e.g. with snakeviz) and profile_summary.txt with per-stage timings from
+    the tracer and the functions with the highest cumulative time.
+    """
+
+    def __init__(self, ticks, output_dir, tracer):
+        self.remaining = ticks
+        self.ticks = ticks
+        self.output_dir = output_dir
+        self.tracer = tracer
+        self.profile = cProfile.Profile()
+        self._was_enabled = tracer.enabled
+        tracer.enabled = True
+        tracer.reset()
+
+    @property
+    def active(self):
+        return self.remaining > 0
+
+    def tick(self):
+        """Context manager that profiles one tick while profiling is active."""
+        if not self.active:
+            return _NULL_SPAN
+        return _ProfiledTick(self)
+
+    def _finish_tick(self):
+        self.remaining -= 1
+        if self.remaining == 0:
+            self.write()
+            self.tracer.enabled = self._was_enabled
+
+    def write(self):
+        """Write the pstats file and summary. Returns the summary path."""
+        os.makedirs(self.output_dir, exist_ok=True)
+        self.profile.dump_stats(os.path.join(self.output_dir, 'profile.pstats'))
+        functions = io.StringIO()
+        pstats.Stats(self.profile, stream=functions).sort_stats('cumulative').print_stats(30)
+        summary_path = os.path.join(self.output_dir, 'profile_summary.txt')
+        with open(summary_path, 'w') as f:
+            f.write(f"Profiled {self.ticks - self.remaining} ticks\n\n")
+            f.write(format_stage_totals(self.tracer.stage_totals()))
+            f.write('\n\n')
+            f.write(functions.getvalue())
+        return summary_path
+
+
+class _ProfiledTick:
+    __slots__ = ('profiler',)
+
+    def __init__(self, profiler):
+        self.profiler = profiler
+
+    def __enter__(self):
+        self.profiler.profile.enable()
+        return self
+
+    def __exit__(self, *exc):
+        self.profiler.profile.disable()
+        self.profiler._finish_tick()
+        return False
+
+
+_tracer = Tracer()
+
+
+def get_tracer():
+    """Return the process-wide tracer (disabled until enabled by the caller)."""
+    return _tracer